@@ -1,8 +1,9 @@
 """ Authenticated related dependencies """
 from collections.abc import Generator
+from contextlib import AbstractContextManager, contextmanager
 from typing import Annotated
 
-from fastapi import Depends, HTTPException, status
+from fastapi import Depends, FastAPI, Header, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 from jose import JWTError, jwt
 from pydantic import ValidationError
@@ -11,6 +12,7 @@ from sqlmodel import Session
 from app.core import security
 from app.core.config import settings
 from app.core.db import engine
+from app.core.timing import segment
 from app.models import User, TokenPayload
 
 reusable_oauth2 = OAuth2PasswordBearer(
@@ -24,21 +26,30 @@ def get_db() -> Generator[Session, None, None]:
 
 
 SessionDep = Annotated[Session, Depends(get_db)]
+
+
+def open_session(app: FastAPI) -> AbstractContextManager[Session]:
+    # Short session outside the dependencies of a request (long-lived connections must not
+    # hold one), honouring the overrides of get_db
+    return contextmanager(app.dependency_overrides.get(get_db, get_db))()
 TokenDep = Annotated[str, Depends(reusable_oauth2)]
+# Queue tokens of waiting rooms (comma separated)
+QueueTokenDep = Annotated[str | None, Header(alias="X-Queue-Token")]
 
 
 def get_current_user(session: SessionDep, token: TokenDep) -> User:
-    try:
-        payload = jwt.decode(
-            token, settings.SECRET_KEY, algorithms=[security.ALGORITHM]
-        )
-        token_data = TokenPayload(**payload)
-    except (JWTError, ValidationError):
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="Could not validate credentials",
-        )
-    user = session.get(User, token_data.sub)
+    with segment("auth"):
+        try:
+            payload = jwt.decode(
+                token, settings.SECRET_KEY, algorithms=[security.ALGORITHM]
+            )
+            token_data = TokenPayload(**payload)
+        except (JWTError, ValidationError):
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail="Could not validate credentials",
+            )
+        user = session.get(User, token_data.sub)
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
     if not user.is_active:
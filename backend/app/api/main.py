@@ -1,7 +1,8 @@
 """ Main API routes definition """
 from fastapi import APIRouter
 
-from app.api.routes import login, teams, users, utils, competitions, matches, account, orders
+from app.api.routes import login, teams, users, utils, competitions, matches, account, orders, waiting_room
+from app.core.config import settings
 
 api_router = APIRouter()
 api_router.include_router(login.router, tags=["login"])
@@ -11,4 +12,6 @@ api_router.include_router(users.router, prefix="/users", tags=["users"])
 api_router.include_router(utils.router, prefix="/utils", tags=["utils"])
 api_router.include_router(competitions.router, prefix="/competitions", tags=["competitions"])
 api_router.include_router(account.router, prefix="/account", tags=["account"])
-api_router.include_router(orders.router, prefix="/orders", tags=["orders"])
\ No newline at end of file
+api_router.include_router(orders.router, prefix="/orders", tags=["orders"])
+if settings.WAITING_ROOM_ENABLED:
+    api_router.include_router(waiting_room.router, prefix="/waiting-room", tags=["waiting-room"])
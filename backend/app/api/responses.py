@@ -0,0 +1,67 @@
+""" JSON responses
+
+With FAST_JSON_RESPONSES, responses are rendered with orjson (when installed) instead of
+json.dumps, and the routes with large responses return their models through
+model_response: serialised by pydantic-core straight to bytes, without the
+response_model validation and jsonable_encoder steps (the route already built and
+validated them). The response_model of the route still documents the response.
+Responses of catalog routes are also cached with the catalog (catalog_response).
+"""
+from collections.abc import Callable, Hashable
+from functools import cache
+from typing import Any
+
+from fastapi import Request
+from fastapi.responses import JSONResponse, ORJSONResponse, Response
+from pydantic import TypeAdapter
+from sqlmodel import Session
+
+from app.core.catalog import catalog
+from app.core.compression import CompressedBody
+from app.core.config import settings
+from app.core.timing import segment
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover
+    orjson = None
+
+
+def default_response_class() -> type[JSONResponse]:
+    if settings.FAST_JSON_RESPONSES and orjson is not None:
+        return ORJSONResponse
+    return JSONResponse
+
+
+@cache
+def type_adapter(type_: Any) -> TypeAdapter:
+    return TypeAdapter(type_)
+
+
+def model_response(content: Any, type_: Any = None, exclude_unset: bool = False) -> Any:
+    """
+    Response with the content (model or list of models of type_, the type of the
+    content by default) already serialised, the content itself without fast responses.
+    """
+    if not settings.FAST_JSON_RESPONSES:
+        return content
+    return Response(serialise(content, type_, exclude_unset), media_type="application/json")
+
+
+def serialise(content: Any, type_: Any = None, exclude_unset: bool = False) -> bytes:
+    with segment("serialize"):
+        return type_adapter(type_ or type(content)).dump_json(content, by_alias=True, exclude_unset=exclude_unset)
+
+
+def catalog_response(session: Session, request: Request, key: Hashable, build: Callable[[], Any],
+                     exclude_unset: bool = False) -> Any:
+    """
+    Response of a route that only depends on the catalog (teams and competitions): the
+    content built by build() is cached, with its compressed bodies, until the catalog
+    changes. Same as model_response without catalog cache or fast responses.
+    """
+    if settings.FAST_JSON_RESPONSES:
+        body = catalog.response(session, key, lambda: CompressedBody(serialise(build(), exclude_unset=exclude_unset)))
+        if body is not None:
+            return body.response(request.headers.get("accept-encoding"))
+    return model_response(build(), exclude_unset=exclude_unset)
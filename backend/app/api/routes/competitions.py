@@ -1,40 +1,103 @@
 """ Competition management routes """
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Request
 
 from app.crud.competition import *
-from app.crud.team import get_team_by_name
+from app.crud.team import get_teams_by_names
 from app.api.deps import SessionDep, get_current_active_superuser
+from app.api.responses import catalog_response, model_response
+from app.core.catalog import catalog
 from app.models import (
     Competition,
     CompetitionOut,
+    CompetitionDetail,
     CompetitionCreateOut,
     CompetitionCreateAPI,
     CompetitionCreateDB,
+    CompetitionCreateIds,
     CompetitionMessage,
-    CompetitionUpdate
+    CompetitionUpdate,
+    BulkItemError,
+    BulkMessage
 )
 
 router = APIRouter()
 
-@router.get("/{competition_name}", response_model=CompetitionOut)
-def read_competition(session: SessionDep, competition_name: str) -> Competition | None:
+# Nested lists that can be included in a competition detail
+COMPETITION_INCLUDES = ("teams", "matches")
+
+def competition_detail(session: SessionDep, competition: Competition, include: str | None,
+                       matches_limit: int | None, matches_after: int | None) -> CompetitionDetail:
+    # Check nested lists to include (all by default)
+    included = COMPETITION_INCLUDES
+    if include is not None:
+        included = [i.strip() for i in include.split(",") if i.strip()]
+        invalid = [i for i in included if i not in COMPETITION_INCLUDES]
+        if invalid:
+            raise HTTPException(status_code=400, detail=f"Invalid competition includes: {', '.join(invalid)}")
+
+    # Check matches page size
+    if matches_limit is not None and matches_limit < 1:
+        raise HTTPException(status_code=400, detail="The matches limit must be positive")
+
+    detail = {"name": competition.name, "category": competition.category, "sport": competition.sport}
+    if "teams" in included:
+        # Teams loaded with the competition (fixed number of queries)
+        loaded = get_competition_with_teams(session, competition.id)
+        if loaded is None:
+            # Deleted by another worker (the catalog cache of this one is not updated yet)
+            raise HTTPException(status_code=404, detail=f"Competition {competition.name} not found")
+        detail["teams"] = loaded.teams
+    if "matches" in included:
+        matches = get_competition_matches(session, competition.id, after=matches_after, limit=matches_limit)
+        detail["matches"] = matches
+        if matches_limit is not None and len(matches) == matches_limit:
+            detail["matches_next"] = matches[-1].id
+    return CompetitionDetail.model_validate(detail)
+
+def competition_response(session: SessionDep, request: Request, competition: Competition, include: str | None,
+                         matches_limit: int | None, matches_after: int | None):
+    def build() -> CompetitionDetail:
+        return competition_detail(session, competition, include, matches_limit, matches_after)
+
+    # Without matches (available tickets change) the detail is cached with the catalog
+    if include is not None and "matches" not in (i.strip() for i in include.split(",")):
+        return catalog_response(session, request, ("competition", competition.id, include), build,
+                                exclude_unset=True)
+    return model_response(build(), exclude_unset=True)
+
+@router.get("/{competition_name}", response_model=CompetitionDetail, response_model_exclude_unset=True)
+def read_competition(session: SessionDep, request: Request, competition_name: str, include: str | None = None,
+                     matches_limit: int | None = None, matches_after: int | None = None) -> CompetitionDetail:
     """
     Get a competition by name.
+
+    Teams and matches are included by default (include=teams,matches), matches can
+    be paginated by id (matches after the given id, use matches_next from the response).
     """
-    competition = get_competition_by_name(session, competition_name)
+    competition = catalog.get_competition_by_name(session, competition_name)
     if competition is None:
         raise HTTPException(status_code=404, detail=f"Competition {competition_name} not found")
-    return competition
+    return competition_response(session, request, competition, include, matches_limit, matches_after)
 
-@router.get("/", response_model=CompetitionOut)
-def read_competition_by_id(session: SessionDep, competition_id: int) -> Competition | None:
+@router.get("/", response_model=CompetitionDetail, response_model_exclude_unset=True)
+def read_competition_by_id(session: SessionDep, request: Request, competition_id: int, include: str | None = None,
+                           matches_limit: int | None = None, matches_after: int | None = None) -> CompetitionDetail:
     """
     Get a competition by id.
+
+    Same optional parameters as getting a competition by name.
     """
-    competition = get_competition(session, competition_id)
+    competition = catalog.get_competition(session, competition_id)
     if competition is None:
         raise HTTPException(status_code=404, detail=f"Competition with id {competition_id} not found")
-    return competition
+    return competition_response(session, request, competition, include, matches_limit, matches_after)
+
+def missing_teams_detail(missing: set[str]) -> str:
+    # Error message for teams not found (all reported at once)
+    missing = sorted(missing)
+    if len(missing) == 1:
+        return f"Team {missing[0]} not found"
+    return f"Teams {', '.join(missing)} not found"
 
 @router.post(
     "/", 
@@ -46,25 +109,59 @@ def create_competition(session: SessionDep, competition_in: CompetitionCreateAPI
     Create new competition.
     """
     # Check competition does not exist
-    if get_competition_by_name(session, competition_in.name) is not None:
+    if catalog.get_competition_by_name(session, competition_in.name) is not None:
         raise HTTPException(
             status_code=400,
             detail=f"A competition named {competition_in.name} already exists in the system"
         )
     
-    # Get teams for the competition (avoiding repetitions, checking all exist)
-    teams = []
-    for name in set(competition_in.teams):
-        team = get_team_by_name(session, name)
-        if team is None:
-            raise HTTPException(status_code=401, detail=f"Team {name} not found")
-        teams.append(team)
+    # Get teams for the competition (avoiding repetitions, checking all exist in one query)
+    names = set(competition_in.teams)
+    teams = get_teams_by_names(session, names)
+    missing = names - teams.keys()
+    if missing:
+        raise HTTPException(status_code=401, detail=missing_teams_detail(missing))
 
     # Update in object with teams found and create competition
     competition_in = CompetitionCreateDB(name=competition_in.name, category=competition_in.category,
-                                         sport=competition_in.sport, teams=teams)
+                                         sport=competition_in.sport, teams=list(teams.values()))
     return add_competition(session, competition_in)
 
+@router.post(
+    "/bulk", 
+    dependencies=[Depends(get_current_active_superuser)], 
+    response_model=BulkMessage
+)
+def create_competitions(session: SessionDep, competitions_in: list[CompetitionCreateAPI]) -> BulkMessage:
+    """
+    Create competitions in bulk (one transaction), reporting errors per competition.
+    """
+    # Existing competition names and teams of all competitions (one query each)
+    names = get_existing_competition_names(session, [c.name for c in competitions_in])
+    teams = get_teams_by_names(session, [name for c in competitions_in for name in c.teams])
+
+    valid = []
+    errors = []
+    for index, competition_in in enumerate(competitions_in):
+        missing = set(competition_in.teams) - teams.keys()
+        if competition_in.name in names:
+            errors.append(BulkItemError(
+                index=index, status_code=400,
+                detail=f"A competition named {competition_in.name} already exists in the system"
+            ))
+        elif missing:
+            errors.append(BulkItemError(index=index, status_code=401, detail=missing_teams_detail(missing)))
+        else:
+            # Names are unique within the request too
+            names.add(competition_in.name)
+            valid.append(CompetitionCreateIds(
+                name=competition_in.name, category=competition_in.category, sport=competition_in.sport,
+                team_ids=[teams[name].id for name in competition_in.teams]
+            ))
+
+    return BulkMessage(message=f"{len(valid)} competitions created successfully",
+                       ids=add_competitions(session, valid), errors=errors)
+
 @router.delete(
     "/{competition_name}", 
     dependencies=[Depends(get_current_active_superuser)],
@@ -74,7 +171,7 @@ def delete_competition(session: SessionDep, competition_name: str) -> Competitio
     """
     Delete a competition by name.
     """
-    # Check competition exists
+    # Check competition exists (loaded in this session, cached records are detached)
     competition = get_competition_by_name(session, competition_name)
     if competition is None:
         raise HTTPException(status_code=404, detail=f"Competition {competition_name} not found")
@@ -101,7 +198,7 @@ def update_competition(session: SessionDep, competition_name: str, competition_i
     name = competition_in.name
     if (name is not None and name != competition_name):
         # Check whether competition with name for update exists
-        if (get_competition_by_name(session, name) is not None):
+        if (catalog.get_competition_by_name(session, name) is not None):
             raise HTTPException(
                 status_code=400,
                 detail=f"A competition named {name} already exists in the system"
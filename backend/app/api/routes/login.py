@@ -10,6 +10,7 @@ from app import crud
 from app.api.deps import CurrentUser, SessionDep, get_current_active_superuser, get_current_user
 from app.core import security
 from app.core.config import settings
+from app.core.metrics import logins
 from app.core.security import get_password_hash
 from app.models import Message, NewPassword, Token, UserOut
 from app.utils import (
@@ -33,9 +34,12 @@ def login_access_token(
         session=session, email=form_data.username, password=form_data.password
     )
     if not user:
+        logins.inc(result="failure")
         raise HTTPException(status_code=400, detail="Incorrect email or password")
     elif not user.is_active:
+        logins.inc(result="failure")
         raise HTTPException(status_code=400, detail="Inactive user")
+    logins.inc(result="success")
     access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
     return Token(
         access_token=security.create_access_token(
@@ -72,7 +76,9 @@ def recover_password(email: str, session: SessionDep) -> Message:
         email_to=user.email,
         subject=email_data.subject,
         html_content=email_data.html_content,
+        session=session,
     )
+    session.commit()
     return Message(message="Password recovery email sent")
 
 
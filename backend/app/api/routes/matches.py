@@ -1,36 +1,139 @@
 """ Match management routes """
-from fastapi import APIRouter, Depends, HTTPException
+import asyncio
+import json
+from collections.abc import AsyncIterator, Container
+
+from fastapi import APIRouter, Depends, FastAPI, HTTPException, Request, WebSocket, WebSocketDisconnect
+from fastapi.responses import StreamingResponse
+from starlette.background import BackgroundTask
+from starlette.concurrency import run_in_threadpool
 
 from app.crud.match import *
-from app.crud.team import get_team
-from app.crud.competition import get_competition
-from app.api.deps import SessionDep, get_current_active_superuser
+from app.crud.team import get_existing_team_ids
+from app.crud.competition import get_competitions_team_ids
+from app.api.deps import SessionDep, get_current_active_superuser, open_session
+from app.api.responses import model_response
+from app.core.broadcast import Subscriber, broadcaster
+from app.core.catalog import catalog
+from app.core.config import settings
 from app.models.match import *
+from app.models.bulk import BulkItemError, BulkMessage
 
 router = APIRouter()
 
+# Match with the information needed for frontend
+def match_json(match: Match) -> MatchJSON:
+    local = MatchTeamJSON(id=match.local_id,
+                          name=match.local_team.name,
+                          country=match.local_team.country)
+    visitor = MatchTeamJSON(id=match.visitor_id,
+                            name=match.visitor_team.name,
+                            country=match.visitor_team.country)
+    competition = MatchCompetitionJSON(name=match.competition.name,
+                                       category=match.competition.category,
+                                       sport=match.competition.sport)
+    return MatchJSON(id=match.id, local=local, visitor=visitor, date=match.date,
+                     tickets=match.total_available_tickets, competition=competition,
+                     price=match.price)
+
 @router.get("/", response_model=MatchesList)
 def read_matches(session: SessionDep) -> MatchesList:
     """
     Get matches list.
     """
     # Get list of matches with the information needed for frontend
-    matches = []
-    for match in get_all_matches(session):
-        local = MatchTeamJSON(id=match.local_id, 
-                              name=match.local_team.name, 
-                              country=match.local_team.country)
-        visitor = MatchTeamJSON(id=match.visitor_id, 
-                                name=match.visitor_team.name, 
-                                country=match.visitor_team.country)
-        competition = MatchCompetitionJSON(name=match.competition.name,
-                                           category=match.competition.category,
-                                           sport=match.competition.sport)
-        matches.append(MatchJSON(id=match.id, local=local, visitor=visitor, date=match.date,
-                                 tickets=match.total_available_tickets, competition=competition,  
-                                 price=match.price))
-        
-    return MatchesList(matches=matches)
+    return model_response(MatchesList(matches=[match_json(match) for match in get_all_matches(session)]))
+
+
+# Available tickets of the matches (all if ids is None), read with a short session so that
+# long-lived streams do not keep a connection
+def read_available_tickets(app: FastAPI, ids: list[int] | None) -> dict[int, int]:
+    with open_session(app) as session:
+        return get_available_tickets(session, ids)
+
+# Server-Sent Event with available tickets by match id
+def tickets_event(tickets: dict[int, int]) -> str:
+    return f"event: tickets\ndata: {json.dumps({'tickets': tickets}, separators=(',', ':'))}\n\n"
+
+async def tickets_events(subscriber: Subscriber, tickets: dict[int, int]) -> AsyncIterator[str]:
+    # Current tickets, then their changes (comments keep idle connections open)
+    yield tickets_event(tickets)
+    while True:
+        try:
+            changes = await asyncio.wait_for(subscriber.get(), settings.STREAM_KEEPALIVE_SECONDS)
+        except asyncio.TimeoutError:
+            yield ": keepalive\n\n"
+        else:
+            yield tickets_event(changes)
+
+def parse_match_ids(ids: str | None) -> list[int] | None:
+    if ids is None:
+        return None
+    try:
+        return [int(id) for id in ids.split(",") if id.strip()]
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Match ids must be comma separated integers")
+
+@router.get("/stream", response_class=StreamingResponse)
+async def stream_matches(request: Request, ids: str | None = None) -> StreamingResponse:
+    """
+    Live available tickets (Server-Sent Events) of all matches or the given ones (comma
+    separated ids): a "tickets" event with the current ones, then one with the changes.
+    """
+    match_ids = parse_match_ids(ids)
+    # Subscribed before reading the current tickets, no change is lost in between
+    subscriber = broadcaster.subscribe(match_ids)
+    try:
+        tickets = await run_in_threadpool(read_available_tickets, request.app, match_ids)
+    except BaseException:
+        broadcaster.unsubscribe(subscriber)
+        raise
+    return StreamingResponse(
+        tickets_events(subscriber, tickets),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+        background=BackgroundTask(broadcaster.unsubscribe, subscriber),
+    )
+
+@router.websocket("/stream")
+async def stream_matches_websocket(websocket: WebSocket) -> None:
+    """
+    Live available tickets (WebSocket). Clients send {"subscribe": [ids]} and
+    {"unsubscribe": [ids]}, and receive {"tickets": {id: tickets}} with the current
+    tickets of the new subscriptions and then with the changes.
+    """
+    await websocket.accept()
+    subscriber = broadcaster.subscribe([])
+
+    async def receive() -> None:
+        while True:
+            message = await websocket.receive_json()
+            try:
+                subscribe = [int(id) for id in message.get("subscribe", [])]
+                unsubscribe = [int(id) for id in message.get("unsubscribe", [])]
+            except (AttributeError, TypeError, ValueError):
+                await websocket.send_json({"error": "Expected {\"subscribe\": [ids]} or {\"unsubscribe\": [ids]}"})
+                continue
+            broadcaster.remove(subscriber, unsubscribe)
+            if subscribe:
+                broadcaster.add(subscriber, subscribe)
+                tickets = await run_in_threadpool(read_available_tickets, websocket.app, subscribe)
+                await websocket.send_json({"tickets": tickets})
+
+    async def send() -> None:
+        while True:
+            await websocket.send_json({"tickets": await subscriber.get()})
+
+    tasks = [asyncio.create_task(receive()), asyncio.create_task(send())]
+    try:
+        done, _ = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+        for task in done:
+            if not isinstance(task.exception(), WebSocketDisconnect):
+                task.result()
+    finally:
+        for task in tasks:
+            task.cancel()
+        broadcaster.unsubscribe(subscriber)
 
 
 # NOTE: Un match no té un nom que l'identifiqui, fem les operacions per ID.
@@ -45,14 +148,13 @@ def read_match_by_id(session: SessionDep, match_id: int) -> Match | None:
     return match
 
 
-@router.post(
-    "/", 
-    dependencies=[Depends(get_current_active_superuser)], 
-    response_model=MatchMessage
-)
-def create_match(session: SessionDep, match_in: MatchCreate) -> MatchMessage:
+def check_match(match_in: MatchCreate, team_ids: Container[int],
+                registered_ids: Container[int] | None) -> MatchCreate:
     """
-    Create new match.
+    Check a new match, given the existing ids among its teams and the ids of the teams
+    registered in its competition (None if the competition does not exist).
+    Returns a copy of the match with price rounded and available tickets set (the
+    request model is not modified).
     """
     #TODO: CHECK DATE FORMAT!!
 
@@ -67,13 +169,14 @@ def create_match(session: SessionDep, match_in: MatchCreate) -> MatchMessage:
     if match_in.number_of_seats < 0:
         raise HTTPException(status_code=403, detail="The number of seats cannot be negative")
     
-    if match_in.total_available_tickets is None:
+    available = match_in.total_available_tickets
+    if available is None:
         # Number of seats by default
-        match_in.total_available_tickets = match_in.number_of_seats
-    elif match_in.total_available_tickets < 0:
+        available = match_in.number_of_seats
+    elif available < 0:
         # Negative available tickets
         raise HTTPException(status_code=404, detail="Tickets available cannot be negative")
-    elif match_in.total_available_tickets > match_in.number_of_seats:
+    elif available > match_in.number_of_seats:
         # Available tickets greater than number of seats
         raise HTTPException(status_code=405, detail="More available tickets than number of seats")
     
@@ -88,22 +191,18 @@ def create_match(session: SessionDep, match_in: MatchCreate) -> MatchMessage:
         )
 
     # The local team must exist
-    local = get_team(session, local_id)
-    if local is None:
+    if local_id not in team_ids:
         raise HTTPException(status_code=407, detail=f"The local team does not exist")
     
     # The visitor team must exist
-    visitor = get_team(session, visitor_id)
-    if visitor is None:
+    if visitor_id not in team_ids:
         raise HTTPException(status_code=408, detail="The visitor team does not exist")
     
     # The competition must exist
-    competition = get_competition(session, match_in.competition_id)
-    if competition is None:
+    if registered_ids is None:
         raise HTTPException(status_code=409, detail="The competition does not exist")
     
     # Teams must be registered in competition
-    registered_ids = set([team.id for team in competition.teams])
     if local_id not in registered_ids:
         raise HTTPException(
             status_code=410, 
@@ -114,16 +213,55 @@ def create_match(session: SessionDep, match_in: MatchCreate) -> MatchMessage:
             status_code=411, 
             detail="The visitor team is not registered in the competition"
         )
-    
-    # Create match and return successful message
-    match_in = MatchCreateDB(date=match_in.date, price=price, competition=competition,
-                             number_of_seats=match_in.number_of_seats,
-                             total_available_tickets=match_in.total_available_tickets, 
-                             local_team=local, visitor_team=visitor)
-    match = add_match(session, match_in)
+
+    return match_in.model_copy(update={"price": price, "total_available_tickets": available})
+
+
+@router.post(
+    "/", 
+    dependencies=[Depends(get_current_active_superuser)], 
+    response_model=MatchMessage
+)
+def create_match(session: SessionDep, match_in: MatchCreate) -> MatchMessage:
+    """
+    Create new match.
+    """
+    # Existing teams and teams registered in the competition (catalog cache)
+    team_ids = {id for id in (match_in.local_id, match_in.visitor_id)
+                if catalog.get_team(session, id) is not None}
+    registered_ids = catalog.get_competition_team_ids(session, match_in.competition_id)
+    match_in = check_match(match_in, team_ids, registered_ids)
+
+    # Create match (by identifiers, teams and competition already checked) and return successful message
+    match = add_match_ids(session, match_in)
     return MatchMessage(message="Match created successfully", id=match.id)
 
 
+@router.post(
+    "/bulk", 
+    dependencies=[Depends(get_current_active_superuser)], 
+    response_model=BulkMessage
+)
+def create_matches(session: SessionDep, matches_in: list[MatchCreate]) -> BulkMessage:
+    """
+    Create matches in bulk (one transaction), reporting errors per match.
+    """
+    # Existing teams and teams registered in each competition (one query for teams, two for competitions)
+    team_ids = get_existing_team_ids(session, [id for m in matches_in for id in (m.local_id, m.visitor_id)])
+    registered_ids = get_competitions_team_ids(session, [m.competition_id for m in matches_in])
+
+    valid = []
+    errors = []
+    for index, match_in in enumerate(matches_in):
+        try:
+            valid.append(check_match(match_in, team_ids, registered_ids.get(match_in.competition_id)))
+        except HTTPException as e:
+            errors.append(BulkItemError(index=index, status_code=e.status_code, detail=e.detail))
+
+    return BulkMessage(message=f"{len(valid)} matches created successfully",
+                       ids=add_matches_ids(session, valid), errors=errors)
+
+
 @router.delete(
     "/{match_id}", 
     dependencies=[Depends(get_current_active_superuser)], 
@@ -180,4 +318,7 @@ def update_match(session: SessionDep, match_id: int, match_in: MatchUpdate) -> M
     # Update match and return it
     match_in = MatchUpdate(date=match_in.date, price=price, 
                            total_available_tickets=available)
-    return modify_match(session, match, match_in)
+    match = modify_match(session, match, match_in)
+    if available is not None and available != current:
+        broadcaster.publish(match_id, available)
+    return match
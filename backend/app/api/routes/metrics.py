@@ -0,0 +1,30 @@
+""" Metrics route (Prometheus) """
+import secrets
+
+from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi.responses import PlainTextResponse
+
+from app.core.config import settings
+from app.core.metrics import metrics
+
+router = APIRouter()
+
+
+def check_metrics_token(request: Request) -> None:
+    # Bearer METRICS_TOKEN (metrics include the revenue), not required in local environment
+    if settings.METRICS_TOKEN is None:
+        if settings.ENVIRONMENT == "local":
+            return
+        raise HTTPException(status_code=403, detail="Metrics require METRICS_TOKEN")
+    scheme, _, token = request.headers.get("authorization", "").partition(" ")
+    if scheme.lower() != "bearer" or not secrets.compare_digest(token.encode(), settings.METRICS_TOKEN.encode()):
+        raise HTTPException(status_code=403, detail="Could not validate credentials")
+
+
+@router.get("/metrics", response_class=PlainTextResponse, include_in_schema=False,
+            dependencies=[Depends(check_metrics_token)])
+def read_metrics() -> PlainTextResponse:
+    """
+    Metrics of all workers in Prometheus text format.
+    """
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
@@ -1,12 +1,18 @@
 """ Orders management routes """
+from collections import Counter
+
 from fastapi import APIRouter, Depends, HTTPException
 from pydantic import ValidationError
 from sqlalchemy.exc import IntegrityError
 from app.crud.order import *
 from app.crud.user import get_user_by_email
-from app.crud.account import get_account
-from app.crud.match import get_match_by_id
-from app.api.deps import CurrentUser, SessionDep
+from app.crud.account import get_account, get_account_for_update
+from app.crud.match import get_match_by_id, reserve_tickets
+from app.api.deps import CurrentUser, QueueTokenDep, SessionDep
+from app.api.routes.waiting_room import require_admission
+from app.api.responses import model_response
+from app.core.broadcast import broadcaster
+from app.core.metrics import orders_rejected, revenue, tickets_sold
 from app.models import (
     Order,
     OrderCreateAPI,
@@ -29,7 +35,7 @@ def read_orders_user(session: SessionDep, username: str) -> list[Order]:
         raise HTTPException(status_code=400, detail=f"User {username} not found")
     
     # Find orders for this user
-    return get_orders_by_account_id(session, user.id)
+    return model_response(get_orders_by_account_id(session, user.id), list[Order])
 
 @router.get("/", response_model=list[Order])
 def read_orders(session: SessionDep) -> list[Order]:
@@ -37,13 +43,18 @@ def read_orders(session: SessionDep) -> list[Order]:
     Get all orders.
     """
     # Find orders all orders
-    return get_all_orders(session)
+    return model_response(get_all_orders(session), list[Order])
 
 @router.post("/", response_model=Order)
-def create_order_user(session: SessionDep, current_user: CurrentUser, order_in: OrderCreateAPI) -> Order:
+def create_order_user(session: SessionDep, current_user: CurrentUser, order_in: OrderCreateAPI,
+                      queue_token: QueueTokenDep = None) -> Order:
     """
     Create an order for a user specified by authorization.
+
+    Matches with a waiting room need an admitted queue token (X-Queue-Token header).
     """
+    require_admission(queue_token, current_user.id, [order_in.match_id])
+
     # Check account for this user exists
     account = get_account(session, current_user.id)
     if account is None:
@@ -65,32 +76,54 @@ def create_order_user(session: SessionDep, current_user: CurrentUser, order_in:
     # Check user money
     available_money = account.available_money
     if available_money < money:
+        orders_rejected.inc(reason="insufficient_funds")
         raise HTTPException(status_code=404, detail="The user does not have enough money")
     
     # Check ticket availability
     available_tickets = match.total_available_tickets
     if num_tickets > available_tickets:
+        orders_rejected.inc(reason="sold_out")
         raise HTTPException(
             status_code=405, 
             detail="Wanted to order more tickets than the available amount for the match"
         )
     
-    # Transaction for avoiding race condition
+    # Transaction for avoiding race condition: tickets are reserved with a conditional update and
+    # the account is reloaded locked, so concurrent orders can neither oversell nor lose money
     try:
-        # Reload match and update its tickets
-        match = get_match_by_id(session, order_in.match_id)
-        match.total_available_tickets -= num_tickets
+        # Reserve tickets (the match is reloaded)
+        match = reserve_tickets(session, order_in.match_id, num_tickets)
+        if match is None:
+            session.rollback()
+            orders_rejected.inc(reason="sold_out")
+            raise HTTPException(
+                status_code=406,
+                detail="Less available tickets than expected. Unable to complete the order"
+            )
 
         # Reload account and update its money
-        account = get_account(session, current_user.id)
+        account = get_account_for_update(session, current_user.id)
+        if account.available_money < money:
+            session.rollback()
+            orders_rejected.inc(reason="insufficient_funds")
+            raise HTTPException(
+                status_code=407,
+                detail="Less available money than expected. Unable to complete the order"
+            )
         account.available_money -= money
+        available_tickets = match.total_available_tickets
 
         # Create and return Order (commit is made inside the add_order() function)
-        return add_order(session, OrderCreateDB(match=match,tickets_bought=num_tickets,account=account))
+        order = add_order(session, OrderCreateDB(match=match,tickets_bought=num_tickets,account=account))
+        tickets_sold.inc(num_tickets)
+        revenue.inc(money)
+        broadcaster.publish(order_in.match_id, available_tickets)
+        return order
     
     # Error due to available_tickets constraint
     except IntegrityError as e:
         session.rollback()
+        orders_rejected.inc(reason="sold_out")
         raise HTTPException(
             status_code=406,
             detail="Less available tickets than expected. Unable to complete the order"
@@ -99,18 +132,26 @@ def create_order_user(session: SessionDep, current_user: CurrentUser, order_in:
     # Error due to Account validation
     except ValidationError as e:
         session.rollback()
+        orders_rejected.inc(reason="insufficient_funds")
         raise HTTPException(
             status_code=407, 
             detail="Less available money than expected. Unable to complete the order"
         )
 
 @router.post("/purchase/", response_model=PurchaseMessage)
-def purchase_matches(session: SessionDep, current_user: CurrentUser, purchase_request: PurchaseRequest):
+def purchase_matches(session: SessionDep, current_user: CurrentUser, purchase_request: PurchaseRequest,
+                     queue_token: QueueTokenDep = None):
     """
     Purchase matches for user specified by authorization.
+
+    Matches with a waiting room need an admitted queue token (X-Queue-Token header,
+    comma separated tokens for several matches).
     """
+    require_admission(queue_token, current_user.id, [item.match_id for item in purchase_request.matches])
+
     total_cost = 0
     orders_to_create = []
+    requested = Counter()
 
     # Check account for this user exists
     account = get_account(session, current_user.id)
@@ -130,18 +171,38 @@ def purchase_matches(session: SessionDep, current_user: CurrentUser, purchase_re
             raise HTTPException(status_code=403, detail=f"At least one ticket is required for order in match {item.match_id}")
 
         # Check enough available tickets
-        if item.num_tickets > match.total_available_tickets:
+        requested[item.match_id] += item.num_tickets
+        if requested[item.match_id] > match.total_available_tickets:
             session.rollback()
+            orders_rejected.inc(reason="sold_out")
             raise HTTPException(status_code=403, detail=f"Not enough tickets for match with id {item.match_id}")
         
         total_cost += match.price * item.num_tickets
-        match.total_available_tickets -= item.num_tickets
         orders_to_create.append(OrderCreateDB(match=match, tickets_bought=item.num_tickets, account=account))
 
     if total_cost > account.available_money:
         session.rollback()
+        orders_rejected.inc(reason="insufficient_funds")
         raise HTTPException(status_code=404, detail=f"Insufficient funds (You have: {account.available_money:.2f}€, Total cost: {total_cost:.2f}€)")
-    
+
+    # Reserve tickets in match id order (same lock order in every transaction), the checks
+    # above may be outdated by concurrent purchases
+    available_tickets = {}
+    for match_id, num_tickets in sorted(requested.items()):
+        match = reserve_tickets(session, match_id, num_tickets)
+        if match is None:
+            session.rollback()
+            orders_rejected.inc(reason="sold_out")
+            raise HTTPException(status_code=403, detail=f"Not enough tickets for match with id {match_id}")
+        available_tickets[match_id] = match.total_available_tickets
+
+    # Reload account (locked) and update its money
+    account = get_account_for_update(session, current_user.id)
+    if total_cost > account.available_money:
+        session.rollback()
+        orders_rejected.inc(reason="insufficient_funds")
+        raise HTTPException(status_code=404, detail=f"Insufficient funds (You have: {account.available_money:.2f}€, Total cost: {total_cost:.2f}€)")
+
     account.available_money -= total_cost
 
     orders = []
@@ -151,6 +212,10 @@ def purchase_matches(session: SessionDep, current_user: CurrentUser, purchase_re
         orders.append(order)
 
     session.commit()
+    tickets_sold.inc(sum(requested.values()))
+    revenue.inc(total_cost)
+    for match_id, tickets in available_tickets.items():
+        broadcaster.publish(match_id, tickets)
 
     orderIds = []
     for order in orders:
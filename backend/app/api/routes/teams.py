@@ -1,32 +1,62 @@
 """ Team management routes """
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Request
 
 from app.crud.team import *
 from app.api.deps import SessionDep, get_current_active_superuser
+from app.api.responses import catalog_response
+from app.core.catalog import catalog
 from app.models import (
     Team,
     TeamsList,
+    TeamFields,
     TeamOut,
     TeamMessage,
-    TeamUpdate
+    TeamUpdate,
+    TeamCreateBulk,
+    BulkItemError,
+    BulkMessage
 )
 
 router = APIRouter()
 
-@router.get("/", response_model=TeamsList)
-def read_teams(session: SessionDep) -> TeamsList:
+@router.get("/", response_model=TeamsList, response_model_exclude_unset=True)
+def read_teams(session: SessionDep, request: Request, country: str | None = None, name_prefix: str | None = None,
+               fields: str | None = None, after: int | None = None, limit: int | None = None) -> TeamsList:
     """
     Get teams list.
+
+    Optionally filtered by country and name prefix, paginated by id (teams after the
+    given id, use next from the response) and with only some fields (comma separated).
     """
-    teams = get_all_teams(session)
-    return TeamsList(count=len(teams), data=teams)
+    # Check requested fields
+    columns = None
+    if fields is not None:
+        columns = [f.strip() for f in fields.split(",") if f.strip()]
+        invalid = [c for c in columns if c not in TEAM_COLUMNS]
+        if invalid:
+            raise HTTPException(status_code=400, detail=f"Invalid team fields: {', '.join(invalid)}")
+
+    # Check page size
+    if limit is not None and limit < 1:
+        raise HTTPException(status_code=400, detail="The limit must be positive")
+
+    def build() -> TeamsList:
+        rows = get_teams_page(session, columns=columns, country=country, name_prefix=name_prefix,
+                              after=after, limit=limit)
+        count = count_teams(session, country=country, name_prefix=name_prefix)
+        next_id = rows[-1]["id"] if limit is not None and len(rows) == limit else None
+        return TeamsList(count=count, data=[TeamFields(**row) for row in rows], next=next_id)
+
+    # Cached with the catalog (teams only)
+    key = ("teams", country, name_prefix, None if columns is None else tuple(columns), after, limit)
+    return catalog_response(session, request, key, build, exclude_unset=True)
 
 @router.get("/{team_name}", response_model=TeamOut)
 def read_team_by_name(session: SessionDep, team_name: str) -> Team | None:
     """
     Get a team by name.
     """
-    team = get_team_by_name(session, team_name)
+    team = catalog.get_team_by_name(session, team_name)
     if team is None:
         raise HTTPException(status_code=404, detail=f"Team {team_name} not found")
     return team
@@ -40,6 +70,7 @@ def delete_team_by_name(session: SessionDep, team_name: str) -> TeamMessage:
     """
     Delete a team by name.
     """
+    # Loaded in this session (cached records are detached), one query
     team = get_team_by_name(session, team_name)
     if team is None:
         raise HTTPException(status_code=404, detail=f"Team {team_name} not found")
@@ -58,7 +89,7 @@ def update_team_by_name(session: SessionDep, team_name: str, team_in: TeamUpdate
     # Check if name for update is used by a different team
     new_name = team_in.name
     if (new_name is not None and new_name != team_name):
-        if get_team_by_name(session, new_name):
+        if catalog.get_team_by_name(session, new_name):
             raise HTTPException(status_code=403, detail=f"A team named {new_name} already exists in the system")
         
     # Check if there is a team in the database with this name
@@ -94,7 +125,7 @@ def update_team_by_id(session: SessionDep, team_id: int, team_in: TeamUpdate) ->
     # Check if name for update is used by a different team
     new_name = team_in.name
     if (new_name is not None and new_name != team_name):
-        if get_team_by_name(session, new_name):
+        if catalog.get_team_by_name(session, new_name):
             raise HTTPException(status_code=403, detail=f"A team named {new_name} already exists in the system")
         
     # Check if there is a team in the database with this name
@@ -111,4 +142,41 @@ def update_team_by_id(session: SessionDep, team_id: int, team_in: TeamUpdate) ->
         # Update team
         team = modify_team(session, team, team_in)
         
-    return team
\ No newline at end of file
+    return team
+
+@router.post(
+    "/bulk", 
+    dependencies=[Depends(get_current_active_superuser)], 
+    response_model=BulkMessage
+)
+def create_teams(session: SessionDep, teams_in: list[TeamCreateBulk]) -> BulkMessage:
+    """
+    Create teams in bulk (one transaction), reporting errors per team.
+
+    Only new teams are created (existing names or ids are errors).
+    """
+    # Existing names and ids (one query each)
+    names = set(get_teams_by_names(session, [t.name for t in teams_in if t.name is not None]))
+    ids = get_existing_team_ids(session, [t.id for t in teams_in if t.id is not None])
+
+    valid = []
+    errors = []
+    for index, team_in in enumerate(teams_in):
+        if team_in.name is None or team_in.country is None:
+            errors.append(BulkItemError(index=index, status_code=404,
+                                        detail="Lack of information to create a new team"))
+        elif team_in.name in names:
+            errors.append(BulkItemError(index=index, status_code=403,
+                                        detail=f"A team named {team_in.name} already exists in the system"))
+        elif team_in.id in ids:
+            errors.append(BulkItemError(index=index, status_code=403,
+                                        detail=f"A team with id {team_in.id} already exists in the system"))
+        else:
+            # Names and ids are unique within the request too
+            names.add(team_in.name)
+            if team_in.id is not None:
+                ids.add(team_in.id)
+            valid.append(team_in)
+
+    return BulkMessage(message=f"{len(valid)} teams created successfully",
+                       ids=add_teams(session, valid), errors=errors)
@@ -10,6 +10,7 @@ from app.api.deps import (
     SessionDep,
     get_current_active_superuser,
 )
+from app.api.responses import model_response
 from app.core.config import settings
 from app.core.security import get_password_hash, verify_password
 from app.models import (
@@ -45,7 +46,7 @@ def read_users(session: SessionDep, skip: int = 0, limit: int = 100) -> Any:
     statement = select(User).offset(skip).limit(limit)
     users = session.exec(statement).all()
 
-    return UsersOut(data=users, count=count)
+    return model_response(UsersOut(data=users, count=count))
 
 
 @router.post(
@@ -77,7 +78,9 @@ def create_user(*, session: SessionDep, user_in: UserCreate) -> Any:
             email_to=user_in.email,
             subject=email_data.subject,
             html_content=email_data.html_content,
+            session=session,
         )
+        session.commit()
     return user
 
 
@@ -1,9 +1,12 @@
 """ Utility routes """
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import FileResponse
 from pydantic.networks import EmailStr
 
 from app.api.deps import get_current_active_superuser
-from app.models import Message
+from app.core.profiling import profiles
+from app.core.slow_queries import slow_queries
+from app.models import Message, ProfileOut, ProfilesOut, SlowQueriesOut, SlowQueryOut
 from app.utils import generate_test_email, send_email
 
 router = APIRouter()
@@ -25,3 +28,56 @@ def test_email(email_to: EmailStr) -> Message:
         html_content=email_data.html_content,
     )
     return Message(message="Test email sent")
+
+
+@router.get(
+    "/profiles/",
+    dependencies=[Depends(get_current_active_superuser)],
+    response_model=ProfilesOut,
+)
+def read_profiles() -> ProfilesOut:
+    """
+    Retrieve saved request profiles (newest first).
+    """
+    data = [ProfileOut(**profile) for profile in profiles.saved()]
+    return ProfilesOut(data=data, count=len(data))
+
+
+@router.get(
+    "/profiles/{id}",
+    dependencies=[Depends(get_current_active_superuser)],
+    response_class=FileResponse,
+)
+def read_profile(id: str) -> FileResponse:
+    """
+    Download a request profile (speedscope format).
+    """
+    path = profiles.path(id)
+    if path is None:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    return FileResponse(path, media_type="application/json", filename=f"profile-{id}.speedscope.json")
+
+
+@router.get(
+    "/slow-queries/",
+    dependencies=[Depends(get_current_active_superuser)],
+    response_model=SlowQueriesOut,
+)
+def read_slow_queries() -> SlowQueriesOut:
+    """
+    Retrieve the slow query log of the worker (slowest first).
+    """
+    data = [SlowQueryOut(**entry) for entry in slow_queries.recent()]
+    return SlowQueriesOut(data=data, count=len(data))
+
+
+@router.delete(
+    "/slow-queries/",
+    dependencies=[Depends(get_current_active_superuser)],
+)
+def delete_slow_queries() -> Message:
+    """
+    Empty the slow query log of the worker.
+    """
+    slow_queries.clear()
+    return Message(message="Slow query log emptied")
@@ -0,0 +1,105 @@
+""" Waiting room routes (high-demand matches) """
+import math
+import time
+
+from fastapi import APIRouter, Depends, HTTPException
+
+from app.crud.match import get_match_by_id
+from app.api.deps import CurrentUser, QueueTokenDep, SessionDep, get_current_active_superuser
+from app.core.config import settings
+from app.core.metrics import orders_rejected
+from app.core.waiting_room import Room, waiting_room
+from app.models import Message, QueuePosition, QueueToken, WaitingRoomOpen, WaitingRoomOut
+
+router = APIRouter()
+
+
+def room_out(room: Room) -> WaitingRoomOut:
+    return WaitingRoomOut(match_id=room.match_id, rate=room.rate, issued=room.issued,
+                          admitted=room.admitted(time.time()))
+
+def require_admission(queue_tokens: str | None, user_id: int, match_ids: list[int]) -> None:
+    """
+    Check the user has been admitted to the waiting rooms of the matches (matches without
+    a waiting room need no token), before any work of the order routes.
+    """
+    if not settings.WAITING_ROOM_ENABLED:
+        return
+    rooms = waiting_room.rooms(sorted(set(match_ids)))
+    if not rooms:
+        return
+    positions = waiting_room.positions(queue_tokens, user_id)
+    for match_id, room in rooms.items():
+        generation, position = positions.get(match_id, (None, None))
+        if generation != room.generation:
+            orders_rejected.inc(reason="waiting_room")
+            raise HTTPException(status_code=403,
+                                detail=f"Match {match_id} has a waiting room, join its queue first")
+        ticket = waiting_room.ticket(room, position)
+        if not ticket.admitted:
+            orders_rejected.inc(reason="waiting_room")
+            raise HTTPException(status_code=429, detail=f"Not admitted yet to match {match_id}, {ticket.ahead} users ahead",
+                                headers={"Retry-After": str(max(1, math.ceil(ticket.estimated_wait)))})
+
+
+@router.get("/{match_id}", response_model=WaitingRoomOut)
+def read_waiting_room(match_id: int) -> WaitingRoomOut:
+    """
+    Get the waiting room of a match.
+    """
+    room = waiting_room.room(match_id)
+    if room is None:
+        raise HTTPException(status_code=404, detail=f"Match {match_id} has no waiting room")
+    return room_out(room)
+
+@router.put(
+    "/{match_id}",
+    dependencies=[Depends(get_current_active_superuser)],
+    response_model=WaitingRoomOut
+)
+def open_waiting_room(session: SessionDep, match_id: int, room_in: WaitingRoomOpen) -> WaitingRoomOut:
+    """
+    Open the waiting room of a match, or change its admission rate (users per second).
+    """
+    if get_match_by_id(session, match_id) is None:
+        raise HTTPException(status_code=404, detail=f"Match {match_id} not found")
+    return room_out(waiting_room.open(match_id, room_in.rate))
+
+@router.delete(
+    "/{match_id}",
+    dependencies=[Depends(get_current_active_superuser)],
+    response_model=Message
+)
+def close_waiting_room(match_id: int) -> Message:
+    """
+    Close the waiting room of a match (orders need no queue token any more).
+    """
+    if not waiting_room.close(match_id):
+        raise HTTPException(status_code=404, detail=f"Match {match_id} has no waiting room")
+    return Message(message="Waiting room closed")
+
+@router.post("/{match_id}/join", response_model=QueueToken)
+def join_queue(current_user: CurrentUser, match_id: int) -> QueueToken:
+    """
+    Join the queue of a match: returns the queue token for the X-Queue-Token header of
+    its orders (joining again keeps the position).
+    """
+    joined = waiting_room.join(match_id, current_user.id)
+    if joined is None:
+        raise HTTPException(status_code=404, detail=f"Match {match_id} has no waiting room")
+    token, ticket = joined
+    return QueueToken(token=token, **ticket._asdict())
+
+@router.get("/{match_id}/position", response_model=QueuePosition)
+def read_queue_position(current_user: CurrentUser, match_id: int, queue_token: QueueTokenDep = None) -> QueuePosition:
+    """
+    Position in the queue of a match of the X-Queue-Token header, users ahead and
+    estimated wait (seconds).
+    """
+    room = waiting_room.room(match_id)
+    if room is None:
+        raise HTTPException(status_code=404, detail=f"Match {match_id} has no waiting room")
+    generation, position = waiting_room.positions(queue_token, current_user.id).get(match_id, (None, None))
+    if generation != room.generation:
+        raise HTTPException(status_code=403, detail="Invalid queue token")
+    return QueuePosition(**waiting_room.ticket(room, position)._asdict())
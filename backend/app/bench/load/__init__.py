@@ -0,0 +1,12 @@
+""" Load tests: concurrent virtual users running the ticket purchase flow
+
+    python -m app.bench.load --users 50 --duration 30
+    python -m app.bench.load --url http://localhost:8000 --users 200 --output load.json
+
+Without --url the ASGI app is driven in process (httpx ASGITransport) against the
+configured database, which must be initialized (prestart.sh) and have matches.
+"""
+from .runner import LoadConfig, run_load
+from .stats import LoadStats
+
+__all__ = ["LoadConfig", "LoadStats", "run_load"]
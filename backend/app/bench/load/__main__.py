@@ -0,0 +1,37 @@
+import argparse
+import asyncio
+from pathlib import Path
+
+from app.bench.results import write_results
+
+from .runner import LoadConfig, run_load
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Load test of the ticket purchase flow")
+    parser.add_argument("--users", type=int, default=10, help="concurrent virtual users")
+    parser.add_argument("--duration", type=float, default=10.0, help="seconds to run")
+    parser.add_argument("--iterations", type=int, default=None, help="flows per user (instead of --duration)")
+    parser.add_argument("--url", default=None, help="server to test (default: the app in process)")
+    parser.add_argument("--max-items", type=int, default=2, help="matches per purchase")
+    parser.add_argument("--max-tickets", type=int, default=2, help="tickets per match")
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--output", type=Path, default=None, help="JSON results file")
+    args = parser.parse_args()
+
+    config = LoadConfig(users=args.users, duration=args.duration, iterations=args.iterations, url=args.url,
+                        max_items=args.max_items, max_tickets=args.max_tickets, seed=args.seed)
+    results = asyncio.run(run_load(config))
+
+    print(f"{results['flows']} flows, {results['requests']} requests in {results['elapsed']:.1f}s "
+          f"({results['rps']:.1f} requests/s)")
+    print(f"{'endpoint':<28}{'requests':>9}{'errors':>8}{'req/s':>9}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}")
+    for endpoint, e in results["endpoints"].items():
+        print(f"{endpoint:<28}{e['requests']:>9}{e['errors']:>8}{e['rps']:>9.1f}"
+              f"{e['p50_ms']:>9.1f}{e['p95_ms']:>9.1f}{e['p99_ms']:>9.1f}")
+    if args.output:
+        write_results(args.output, results)
+
+
+if __name__ == "__main__":
+    main()
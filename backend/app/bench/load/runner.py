@@ -0,0 +1,125 @@
+""" Virtual users running the ticket purchase flow """
+import asyncio
+import random
+import time
+import uuid
+from typing import Any, NamedTuple
+
+import httpx
+
+from app.core.config import settings
+
+from .stats import LoadStats
+
+
+class LoadConfig(NamedTuple):
+    users: int = 10
+    # Seconds to run, unless a number of flows per user (iterations) is given
+    duration: float = 10.0
+    iterations: int | None = None
+    # Running server (e.g. local uvicorn), the app is driven in process otherwise
+    url: str | None = None
+    # Cart: up to max_items matches with up to max_tickets each
+    max_items: int = 2
+    max_tickets: int = 2
+    money: float = 1000000
+    password: str = "load-test-password"
+    seed: int | None = None
+
+
+class LoadError(Exception):
+    pass
+
+
+async def request(client: httpx.AsyncClient, stats: LoadStats, method: str, path: str,
+                  **kwargs: Any) -> httpx.Response:
+    endpoint = f"{method} {path}"
+    start = time.perf_counter()
+    try:
+        response = await client.request(method, path, **kwargs)
+    except httpx.HTTPError as e:
+        stats.record(endpoint, 0, time.perf_counter() - start)
+        raise LoadError(f"{endpoint}: {e!r}")
+    stats.record(endpoint, response.status_code, time.perf_counter() - start)
+    return response
+
+
+# Accounts of the virtual users (setup, not measured)
+async def create_accounts(client: httpx.AsyncClient, config: LoadConfig) -> list[str]:
+    run_id = uuid.uuid4().hex[:8]
+    emails = [f"load-{run_id}-{i}@example.com" for i in range(config.users)]
+    responses = await asyncio.gather(*(
+        client.post("/account/", json={"email": email, "password": config.password,
+                                       "available_money": config.money})
+        for email in emails
+    ))
+    for response in responses:
+        if response.status_code != 200:
+            raise LoadError(f"Account creation failed ({response.status_code}): {response.text}")
+    return emails
+
+
+# Login => list matches => purchase a random cart => check money
+async def purchase_flow(client: httpx.AsyncClient, stats: LoadStats, config: LoadConfig,
+                        email: str, rng: random.Random) -> None:
+    response = await request(client, stats, "POST", "/login/access-token",
+                             data={"username": email, "password": config.password})
+    if response.status_code != 200:
+        return
+    headers = {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+    response = await request(client, stats, "GET", "/matches/", headers=headers)
+    if response.status_code != 200:
+        return
+    available = [m["id"] for m in response.json()["matches"] if m["tickets"] > 0]
+    if available:
+        cart = [{"match_id": id, "num_tickets": rng.randint(1, config.max_tickets)}
+                for id in rng.sample(available, rng.randint(1, min(config.max_items, len(available))))]
+        await request(client, stats, "POST", "/orders/purchase/", json={"matches": cart}, headers=headers)
+
+    await request(client, stats, "GET", "/account/money", headers=headers)
+
+
+def make_client(config: LoadConfig) -> httpx.AsyncClient:
+    if config.url:
+        return httpx.AsyncClient(base_url=config.url.rstrip("/") + settings.API_V1_STR, timeout=60)
+    from app.main import app
+    return httpx.AsyncClient(transport=httpx.ASGITransport(app=app),
+                             base_url="http://load" + settings.API_V1_STR, timeout=60)
+
+
+async def run_load(config: LoadConfig, client: httpx.AsyncClient | None = None) -> dict[str, Any]:
+    """
+    Run the load test, returns its configuration and summary (LoadStats.summary).
+    """
+    client = client or make_client(config)
+    stats = LoadStats()
+    rng = random.Random(config.seed)
+
+    async with client:
+        emails = await create_accounts(client, config)
+
+        start = time.perf_counter()
+        deadline = start + config.duration
+
+        def running(flows: int) -> bool:
+            # Fixed iterations per user, or until the deadline
+            if config.iterations is not None:
+                return flows < config.iterations
+            return time.perf_counter() < deadline
+
+        async def virtual_user(email: str, seed: int) -> None:
+            user_rng = random.Random(seed)
+            flows = 0
+            while running(flows):
+                try:
+                    await purchase_flow(client, stats, config, email, user_rng)
+                except LoadError:
+                    pass
+                stats.flows += 1
+                flows += 1
+
+        await asyncio.gather(*(virtual_user(email, rng.random()) for email in emails))
+        elapsed = time.perf_counter() - start
+
+    return {"config": config._asdict(), **stats.summary(elapsed)}
@@ -0,0 +1,51 @@
+""" Latency and throughput statistics of a load test """
+import math
+from collections import Counter, defaultdict
+from typing import Any
+
+
+def percentile(values: list[float], q: float) -> float:
+    # Nearest rank of sorted values
+    if not values:
+        return 0.0
+    return values[max(0, math.ceil(q / 100 * len(values)) - 1)]
+
+
+class LoadStats:
+    """
+    Latencies (seconds) and status codes recorded per endpoint.
+    """
+
+    def __init__(self) -> None:
+        self.latencies: dict[str, list[float]] = defaultdict(list)
+        self.statuses: dict[str, Counter] = defaultdict(Counter)
+        self.flows = 0
+
+    def record(self, endpoint: str, status: int, latency: float) -> None:
+        self.latencies[endpoint].append(latency)
+        self.statuses[endpoint][status] += 1
+
+    def summary(self, elapsed: float) -> dict[str, Any]:
+        endpoints = {}
+        for endpoint, latencies in self.latencies.items():
+            values = sorted(latencies)
+            endpoints[endpoint] = {
+                "requests": len(values),
+                # Transport failures are recorded with status 0
+                "errors": sum(n for status, n in self.statuses[endpoint].items() if status == 0 or status >= 400),
+                "statuses": {str(status): n for status, n in sorted(self.statuses[endpoint].items())},
+                "rps": len(values) / elapsed if elapsed else 0.0,
+                "mean_ms": sum(values) / len(values) * 1000,
+                "p50_ms": percentile(values, 50) * 1000,
+                "p95_ms": percentile(values, 95) * 1000,
+                "p99_ms": percentile(values, 99) * 1000,
+                "max_ms": values[-1] * 1000,
+            }
+        requests = sum(e["requests"] for e in endpoints.values())
+        return {
+            "elapsed": elapsed,
+            "flows": self.flows,
+            "requests": requests,
+            "rps": requests / elapsed if elapsed else 0.0,
+            "endpoints": endpoints,
+        }
@@ -0,0 +1,273 @@
+""" Micro-benchmarks of crud, encryption, serialisation, JWT and email rendering hot paths
+
+    python -m app.bench.micro --size 1000
+    python -m app.bench.micro --size 100000 --only crud --compare .benchmarks/micro-100000-abc1234.json
+    python -m app.bench.micro --size 10000 --only response
+
+A scratch SQLite database with a synthetic dataset of the given size is created
+for every run (app.bench.dataset). Results are saved in .benchmarks/ named after the
+size and the current commit, --compare prints the ratio against a previous file.
+
+The response benchmarks time the whole rendering of a response body: response_model
+validation, jsonable_encoder and json.dumps (default, what FastAPI does), the same
+with orjson, and model_response (app.api.responses).
+"""
+import argparse
+import asyncio
+import json
+import statistics
+import tempfile
+import timeit
+from collections.abc import Callable
+from datetime import timedelta
+from pathlib import Path
+from typing import Any
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse, ORJSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_response_field
+from jinja2 import Template
+from jose import jwt
+from sqlalchemy import Engine
+from sqlalchemy.orm import selectinload
+from sqlmodel import Session, select
+
+from app import crud
+from app.api.responses import model_response, orjson
+from app.api.routes.matches import match_json
+from app.bench.dataset import create_dataset
+from app.bench.results import git_commit, read_results, write_results
+from app.core.config import settings
+from app.core.security import ALGORITHM, create_access_token
+from app.models import Competition, CompetitionOut, EncryptedFloat, Match, MatchesList, Order, User, UsersOut
+from app.utils import email_environment
+
+BENCHMARKS: dict[str, Callable[[Engine, int], Callable[[], Any]]] = {}
+
+
+# Register a benchmark: setup(engine, size) returns the function to time
+def benchmark(name: str):
+    def register(setup: Callable[[Engine, int], Callable[[], Any]]):
+        BENCHMARKS[name] = setup
+        return setup
+    return register
+
+
+@benchmark("crud.get_all_matches")
+def bench_get_all_matches(engine: Engine, size: int) -> Callable[[], Any]:
+    def run():
+        with Session(engine) as session:
+            return crud.match.get_all_matches(session)
+    return run
+
+
+@benchmark("crud.get_orders_by_account_id")
+def bench_get_orders_by_account_id(engine: Engine, size: int) -> Callable[[], Any]:
+    def run():
+        with Session(engine) as session:
+            return crud.order.get_orders_by_account_id(session, 1)
+    return run
+
+
+@benchmark("crud.get_team_by_name")
+def bench_get_team_by_name(engine: Engine, size: int) -> Callable[[], Any]:
+    # Last team, worst case without an index
+    name = f"Team {max(2, size // 10)}"
+
+    def run():
+        with Session(engine) as session:
+            return crud.team.get_team_by_name(session, name)
+    return run
+
+
+@benchmark("crypto.encrypt")
+def bench_encrypt(engine: Engine, size: int) -> Callable[[], Any]:
+    encrypted = EncryptedFloat()
+    return lambda: encrypted.process_bind_param(1234.56, engine.dialect)
+
+
+@benchmark("crypto.decrypt")
+def bench_decrypt(engine: Engine, size: int) -> Callable[[], Any]:
+    encrypted = EncryptedFloat()
+    value = encrypted.process_bind_param(1234.56, engine.dialect)
+    return lambda: encrypted.process_result_value(value, engine.dialect)
+
+
+def load_matches(engine: Engine) -> list[Match]:
+    with Session(engine, expire_on_commit=False) as session:
+        return list(session.exec(select(Match).options(
+            selectinload(Match.local_team), selectinload(Match.visitor_team), selectinload(Match.competition)
+        )))
+
+
+def load_competitions(engine: Engine) -> list[Competition]:
+    with Session(engine, expire_on_commit=False) as session:
+        return list(session.exec(select(Competition).options(
+            selectinload(Competition.teams), selectinload(Competition.matches)
+        )))
+
+
+@benchmark("serialize.matches_list.build")
+def bench_matches_list_build(engine: Engine, size: int) -> Callable[[], Any]:
+    matches = load_matches(engine)
+    return lambda: MatchesList(matches=[match_json(match) for match in matches])
+
+
+@benchmark("serialize.matches_list.dump")
+def bench_matches_list_dump(engine: Engine, size: int) -> Callable[[], Any]:
+    matches_list = MatchesList(matches=[match_json(match) for match in load_matches(engine)])
+    return lambda: json.dumps(jsonable_encoder(matches_list))
+
+
+@benchmark("serialize.competition_out.build")
+def bench_competition_out_build(engine: Engine, size: int) -> Callable[[], Any]:
+    competitions = load_competitions(engine)
+    return lambda: [CompetitionOut.model_validate(competition) for competition in competitions]
+
+
+@benchmark("serialize.competition_out.dump")
+def bench_competition_out_dump(engine: Engine, size: int) -> Callable[[], Any]:
+    competitions = [CompetitionOut.model_validate(c) for c in load_competitions(engine)]
+    return lambda: json.dumps(jsonable_encoder(competitions))
+
+
+# Responses of the routes: name => (response_model, load(engine) builds the content of the route)
+RESPONSES: dict[str, tuple[Any, Callable[[Engine], Any]]] = {
+    "matches_list": (MatchesList, lambda engine: MatchesList(matches=[match_json(m) for m in load_matches(engine)])),
+    "orders": (list[Order], lambda engine: load_all(engine, Order)),
+    "users_out": (UsersOut, lambda engine: UsersOut(data=load_all(engine, User), count=0)),
+    "competition_out": (list[CompetitionOut],
+                        lambda engine: [CompetitionOut.model_validate(c) for c in load_competitions(engine)]),
+}
+
+
+def load_all(engine: Engine, model) -> list:
+    with Session(engine, expire_on_commit=False) as session:
+        return list(session.exec(select(model)))
+
+
+def register_responses(name: str, type_: Any, load: Callable[[Engine], Any]) -> None:
+    field = create_response_field(name="Response", type_=type_, mode="serialization")
+
+    def response_model(response_class: type[JSONResponse]):
+        def setup(engine: Engine, size: int) -> Callable[[], Any]:
+            content = load(engine)
+            # One loop for all the runs (a new one per run would be timed too), closed by run_benchmarks
+            loop = asyncio.new_event_loop()
+
+            def run():
+                return response_class(loop.run_until_complete(
+                    serialize_response(field=field, response_content=content))).body
+            run.close = loop.close
+            return run
+        return setup
+
+    def fast(engine: Engine, size: int) -> Callable[[], Any]:
+        content = load(engine)
+        return lambda: model_response(content, type_).body
+
+    benchmark(f"response.{name}.default")(response_model(JSONResponse))
+    if orjson is not None:
+        benchmark(f"response.{name}.orjson")(response_model(ORJSONResponse))
+    benchmark(f"response.{name}.fast")(fast)
+
+
+for name, (type_, load) in RESPONSES.items():
+    register_responses(name, type_, load)
+
+
+@benchmark("jwt.encode")
+def bench_jwt_encode(engine: Engine, size: int) -> Callable[[], Any]:
+    return lambda: create_access_token(1, expires_delta=timedelta(minutes=60))
+
+
+@benchmark("jwt.decode")
+def bench_jwt_decode(engine: Engine, size: int) -> Callable[[], Any]:
+    token = create_access_token(1, expires_delta=timedelta(minutes=60))
+    return lambda: jwt.decode(token, settings.SECRET_KEY, algorithms=[ALGORITHM])
+
+
+# Email rendering: the MJML source (a template of the same size as the built HTML) compiled
+# for every email as before, and compiled once by the shared environment
+EMAIL_SOURCE = Path(__file__).parent.parent / "email-templates" / "src"
+EMAIL_CONTEXT = {"project_name": "Bench", "username": "user@example.com", "password": "secret",
+                 "email": "user@example.com", "link": "http://localhost"}
+
+
+@benchmark("email.render.template")
+def bench_email_template(engine: Engine, size: int) -> Callable[[], Any]:
+    path = EMAIL_SOURCE / "new_account.mjml"
+    return lambda: Template(path.read_text()).render(EMAIL_CONTEXT)
+
+
+@benchmark("email.render.environment")
+def bench_email_environment(engine: Engine, size: int) -> Callable[[], Any]:
+    templates = email_environment(EMAIL_SOURCE)
+    return lambda: templates.get_template("new_account.mjml").render(EMAIL_CONTEXT)
+
+
+def measure(func: Callable[[], Any], repeat: int) -> dict[str, float]:
+    # Calls per repetition so that a repetition takes at least 0.2s (timeit autorange)
+    timer = timeit.Timer(func)
+    number, _ = timer.autorange()
+    times = [t / number for t in timer.repeat(repeat=repeat, number=number)]
+    return {
+        "number": number,
+        "repeat": repeat,
+        "min_s": min(times),
+        "median_s": statistics.median(times),
+        "ops": 1 / min(times),
+    }
+
+
+def run_benchmarks(size: int, only: str | None = None, repeat: int = 5) -> dict[str, Any]:
+    """
+    Run the benchmarks (names starting with only) on a new dataset of the given size.
+    """
+    with tempfile.TemporaryDirectory() as directory:
+        engine = create_dataset(Path(directory) / "bench.sqlite", size)
+        try:
+            results = {}
+            for name, setup in BENCHMARKS.items():
+                if only is None or name.startswith(only):
+                    run = setup(engine, size)
+                    try:
+                        results[name] = measure(run, repeat)
+                    finally:
+                        # Benchmarks with resources (e.g. event loops) have a close()
+                        if hasattr(run, "close"):
+                            run.close()
+        finally:
+            engine.dispose()
+    return {"size": size, "benchmarks": results}
+
+
+def print_results(results: dict[str, Any], previous: dict[str, Any] | None = None) -> None:
+    print(f"{'benchmark':<36}{'min':>12}{'median':>12}{'ops/s':>12}" + (f"{'vs prev':>10}" if previous else ""))
+    for name, r in results["benchmarks"].items():
+        line = f"{name:<36}{r['min_s'] * 1000:>10.3f}ms{r['median_s'] * 1000:>10.3f}ms{r['ops']:>12.1f}"
+        if previous and name in previous["benchmarks"]:
+            line += f"{r['min_s'] / previous['benchmarks'][name]['min_s']:>9.2f}x"
+        print(line)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Micro-benchmarks of crud and serialisation hot paths")
+    parser.add_argument("--size", type=int, default=1000, help="rows of the dataset (e.g. 1000, 100000, 1000000)")
+    parser.add_argument("--only", default=None, help="benchmarks whose name starts with this prefix")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--output", type=Path, default=None,
+                        help="JSON results file (default: .benchmarks/micro-SIZE-COMMIT.json)")
+    parser.add_argument("--compare", type=Path, default=None, help="previous results file")
+    args = parser.parse_args()
+
+    results = run_benchmarks(args.size, args.only, args.repeat)
+    print_results(results, read_results(args.compare) if args.compare else None)
+    output = args.output or Path(".benchmarks") / f"micro-{args.size}-{git_commit() or 'local'}.json"
+    write_results(output, results)
+    print(f"Results saved in {output}")
+
+
+if __name__ == "__main__":
+    main()
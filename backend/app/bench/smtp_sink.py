@@ -0,0 +1,99 @@
+""" SMTP sink: local SMTP server keeping the received emails (aiosmtpd)
+
+    python -m app.bench.smtp_sink --port 1025
+
+Point the API to it (SMTP_HOST=localhost SMTP_PORT=1025 SMTP_TLS=false) to measure the
+email outbox without a mail server: received emails and opened connections are counted
+and printed every few seconds. Tests use SMTPSink directly.
+"""
+import argparse
+import socket
+import threading
+import time
+from email import message_from_bytes
+from email.message import Message
+from typing import Any
+
+from aiosmtpd.controller import Controller
+from aiosmtpd.smtp import SMTP, Envelope, Session
+
+
+class SMTPSink:
+    """
+    aiosmtpd handler keeping the received emails. Recipients in refuse are rejected
+    with a permanent error (550).
+    """
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0) -> None:
+        # Port 0: a free port
+        if not port:
+            with socket.socket() as probe:
+                probe.bind((host, 0))
+                port = probe.getsockname()[1]
+        self.messages: list[Message] = []
+        self.connections = 0
+        self.refuse: set[str] = set()
+        self._lock = threading.Lock()
+        self.controller = Controller(self, hostname=host, port=port)
+
+    @property
+    def host(self) -> str:
+        return self.controller.hostname
+
+    @property
+    def port(self) -> int:
+        return self.controller.port
+
+    async def handle_EHLO(self, server: SMTP, session: Session, envelope: Envelope, hostname: str,
+                          responses: list[str]) -> list[str]:
+        with self._lock:
+            self.connections += 1
+        session.host_name = hostname
+        return responses
+
+    async def handle_RCPT(self, server: SMTP, session: Session, envelope: Envelope, address: str,
+                          rcpt_options: list[str]) -> str:
+        if address in self.refuse:
+            return "550 Mailbox unavailable"
+        envelope.rcpt_tos.append(address)
+        return "250 OK"
+
+    async def handle_DATA(self, server: SMTP, session: Session, envelope: Envelope) -> str:
+        message = message_from_bytes(envelope.original_content or b"")
+        with self._lock:
+            self.messages.append(message)
+        return "250 Message accepted for delivery"
+
+    def start(self) -> "SMTPSink":
+        self.controller.start()
+        return self
+
+    def stop(self) -> None:
+        self.controller.stop()
+
+    def __enter__(self) -> "SMTPSink":
+        return self.start()
+
+    def __exit__(self, *args: Any) -> None:
+        self.stop()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=1025)
+    parser.add_argument("--interval", type=float, default=5.0, help="seconds between reports")
+    args = parser.parse_args()
+
+    with SMTPSink(args.host, args.port) as sink:
+        print(f"SMTP sink listening on {sink.host}:{sink.port}")
+        try:
+            while True:
+                time.sleep(args.interval)
+                print(f"{len(sink.messages)} emails received, {sink.connections} connections")
+        except KeyboardInterrupt:
+            pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,129 @@
+""" Startup benchmark: import time of the application (python -X importtime)
+
+    python -m app.bench.startup
+    python -m app.bench.startup --runs 10 --budget 1.0 --compare .benchmarks/startup-abc1234.json
+
+Every run is a new interpreter importing app.main and building the application, what a
+gunicorn worker pays before its first request. The import time is the total of the
+imports of the application reported by -X importtime (compiled bytecode already cached,
+the first run is discarded), the heaviest packages are listed with their cumulative time.
+Modules in LAZY_MODULES are only imported when their feature is used: their presence
+after the startup is reported as an error, like an import time over --budget.
+"""
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+from collections import defaultdict
+from pathlib import Path
+from typing import Any
+
+from app.bench.results import git_commit, read_results, write_results
+
+# Imported on first use only (email sending and templates, Sentry)
+LAZY_MODULES = ("sentry_sdk", "emails", "jinja2", "smtplib", "app.core.outbox")
+
+# Import time budget of the startup (seconds, median of the runs)
+IMPORT_BUDGET_SECONDS = 1.2
+
+CHILD = """
+import json, sys, time
+import app.main
+imported = time.perf_counter()
+app.main.app
+created = time.perf_counter()
+print(json.dumps({"create_s": created - imported, "loaded": [m for m in %r if m in sys.modules]}))
+"""
+
+
+def parse_importtime(output: str) -> dict[str, float]:
+    """
+    Cumulative seconds of the packages (first import of every top-level package, at any
+    depth) and of the application imports (import_s).
+    """
+    packages = {}
+    for line in output.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        seconds = int(cumulative) / 1e6
+        # Nested imports are indented by two spaces per level
+        top_level = not name.startswith("  ", 1)
+        name = name.strip()
+        if top_level and (name == "app" or name.startswith("app.")):
+            packages["import_s"] = packages.get("import_s", 0.0) + seconds
+        elif "." not in name and name != "app":
+            packages[name] = seconds
+    return packages
+
+
+def startup(module_names: tuple[str, ...] = LAZY_MODULES) -> dict[str, Any]:
+    # One interpreter importing and building the application
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", CHILD % (module_names,)],
+                            capture_output=True, text=True, check=True)
+    packages = parse_importtime(result.stderr)
+    return {"import_s": packages.pop("import_s"), "packages": packages,
+            **json.loads(result.stdout.splitlines()[-1])}
+
+
+def run_startup(runs: int = 5) -> dict[str, Any]:
+    startup()  # bytecode compilation
+    measured = [startup() for _ in range(runs)]
+    packages: dict[str, list[float]] = defaultdict(list)
+    for run in measured:
+        for name, seconds in run["packages"].items():
+            packages[name].append(seconds)
+    heaviest = sorted(((name, statistics.median(times)) for name, times in packages.items()),
+                      key=lambda item: item[1], reverse=True)[:15]
+    return {
+        "runs": runs,
+        "import_s": statistics.median(run["import_s"] for run in measured),
+        "create_s": statistics.median(run["create_s"] for run in measured),
+        "packages": dict(heaviest),
+        "loaded": sorted({name for run in measured for name in run["loaded"]}),
+    }
+
+
+def check_budget(results: dict[str, Any], budget: float = IMPORT_BUDGET_SECONDS) -> list[str]:
+    errors = []
+    if results["import_s"] > budget:
+        errors.append(f"import time {results['import_s']:.3f}s over the budget of {budget:.3f}s")
+    for name in results["loaded"]:
+        errors.append(f"{name} imported at startup (should be imported on first use)")
+    return errors
+
+
+def print_results(results: dict[str, Any], previous: dict[str, Any] | None = None) -> None:
+    for key, label in (("import_s", "imports"), ("create_s", "create_app")):
+        line = f"{label:<36}{results[key] * 1000:>10.1f}ms"
+        if previous:
+            line += f"{results[key] / previous[key]:>9.2f}x"
+        print(line)
+    print("heaviest packages (cumulative):")
+    for name, seconds in results["packages"].items():
+        print(f"  {name:<34}{seconds * 1000:>10.1f}ms")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Import time of the application startup")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--budget", type=float, default=IMPORT_BUDGET_SECONDS, help="import time budget (seconds)")
+    parser.add_argument("--output", type=Path, default=None,
+                        help="JSON results file (default: .benchmarks/startup-COMMIT.json)")
+    parser.add_argument("--compare", type=Path, default=None, help="previous results file")
+    args = parser.parse_args()
+
+    results = run_startup(args.runs)
+    print_results(results, read_results(args.compare) if args.compare else None)
+    output = args.output or Path(".benchmarks") / f"startup-{git_commit() or 'local'}.json"
+    write_results(output, results)
+    print(f"Results saved in {output}")
+    errors = check_budget(results, args.budget)
+    for error in errors:
+        print(error, file=sys.stderr)
+    sys.exit(1 if errors else 0)
+
+
+if __name__ == "__main__":
+    main()
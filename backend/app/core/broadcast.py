@@ -0,0 +1,125 @@
+""" Live ticket availability (in-process broadcaster)
+
+Routes that change the available tickets of a match publish the new value after
+committing (from any thread). Every STREAM_TICK_SECONDS the changes are fanned out to
+the subscribers of the changed matches (or of all matches) in the event loop, so a
+change costs one dict update per subscriber however many sockets are open, and
+bursts of orders are coalesced into one delta per tick.
+
+Available tickets never increase (orders take them, updates cannot add them), so
+changes are merged with min(): a late delta never undoes a newer one. Only the
+changes made by this worker are published.
+"""
+import asyncio
+import threading
+from collections import defaultdict
+from collections.abc import Iterable
+
+from app.core.config import settings
+
+
+def merge(target: dict[int, int], changes: dict[int, int]) -> None:
+    for id, tickets in changes.items():
+        target[id] = min(tickets, target.get(id, tickets))
+
+
+class Subscriber:
+    """
+    Changes of the subscribed matches (all of them if ids is None) not received yet.
+    """
+
+    def __init__(self, ids: Iterable[int] | None) -> None:
+        self.ids = None if ids is None else set(ids)
+        self.pending: dict[int, int] = {}
+        self.event = asyncio.Event()
+
+    async def get(self) -> dict[int, int]:
+        # Waits for changes, returns all of them (coalesced)
+        await self.event.wait()
+        self.event.clear()
+        changes, self.pending = self.pending, {}
+        return changes
+
+
+class TicketBroadcaster:
+    def __init__(self, tick: float = 0.5) -> None:
+        self.tick = tick
+        self._lock = threading.Lock()
+        self._changes: dict[int, int] = {}
+        self._by_match: dict[int, set[Subscriber]] = defaultdict(set)
+        self._everything: set[Subscriber] = set()
+        self._task: asyncio.Task | None = None
+
+    def publish(self, match_id: int, tickets: int) -> None:
+        """
+        New available tickets of a match (thread safe).
+        """
+        if not self._by_match and not self._everything:
+            return
+        with self._lock:
+            merge(self._changes, {match_id: tickets})
+
+    # Subscriptions are changed in the event loop only
+    def subscribe(self, ids: Iterable[int] | None = None) -> Subscriber:
+        subscriber = Subscriber(ids)
+        if subscriber.ids is None:
+            self._everything.add(subscriber)
+            self._start()
+        else:
+            self.add(subscriber, tuple(subscriber.ids))
+        return subscriber
+
+    def add(self, subscriber: Subscriber, ids: Iterable[int]) -> None:
+        for id in ids:
+            self._by_match[id].add(subscriber)
+            subscriber.ids.add(id)
+        # The ticker stops when there are no subscriptions
+        self._start()
+
+    def remove(self, subscriber: Subscriber, ids: Iterable[int]) -> None:
+        for id in list(ids):
+            subscribers = self._by_match.get(id)
+            if subscribers is not None:
+                subscribers.discard(subscriber)
+                if not subscribers:
+                    del self._by_match[id]
+            subscriber.ids.discard(id)
+
+    def unsubscribe(self, subscriber: Subscriber) -> None:
+        self._everything.discard(subscriber)
+        if subscriber.ids:
+            self.remove(subscriber, subscriber.ids)
+
+    def flush(self) -> None:
+        """
+        Send the changes since the last flush to their subscribers.
+        """
+        with self._lock:
+            changes, self._changes = self._changes, {}
+        touched = set()
+        for id, tickets in changes.items():
+            for subscriber in self._by_match.get(id, ()):
+                merge(subscriber.pending, {id: tickets})
+                touched.add(subscriber)
+        if changes:
+            for subscriber in self._everything:
+                merge(subscriber.pending, changes)
+                touched.add(subscriber)
+        for subscriber in touched:
+            subscriber.event.set()
+
+    def _start(self) -> None:
+        # One ticker per event loop, running while there are subscriptions
+        if not self._by_match and not self._everything:
+            return
+        loop = asyncio.get_running_loop()
+        if self._task is None or self._task.done() or self._task.get_loop() is not loop:
+            self._task = loop.create_task(self._run())
+
+    async def _run(self) -> None:
+        while self._by_match or self._everything:
+            await asyncio.sleep(self.tick)
+            self.flush()
+
+
+broadcaster = TicketBroadcaster(tick=settings.STREAM_TICK_SECONDS)
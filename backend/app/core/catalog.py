@@ -0,0 +1,182 @@
+""" In-process catalog cache (teams and competitions) """
+import threading
+import time
+from collections.abc import Callable, Hashable
+from typing import Any, NamedTuple, TypeVar
+
+from sqlalchemy import Connection, event, inspect
+from sqlalchemy.orm import SessionTransaction, UOWTransaction
+from sqlmodel import Session, select
+
+from app import crud
+from app.core.config import settings
+from app.crud.catalog import bump_version, get_version
+from app.models import Competition, CompetitionTeamLink, Team
+
+# Models whose changes invalidate the catalog
+CATALOG_MODELS = (Team, Competition, CompetitionTeamLink)
+
+T = TypeVar("T")
+
+
+class CatalogSnapshot(NamedTuple):
+    version: int
+    team_ids: dict[str, int]
+    teams: dict[int, Team]
+    competition_ids: dict[str, int]
+    competitions: dict[int, Competition]
+    competition_teams: dict[int, frozenset[int]]
+    # Responses of catalog routes by key (request parameters)
+    responses: dict[Hashable, Any]
+
+
+class CatalogCache:
+    """
+    Name => id and id => record maps for teams and competitions, plus the set of
+    team ids registered in each competition.
+
+    Records are detached copies (only table columns), so routes that need to modify
+    them or navigate their relationships must reload them in their own session.
+    The cache is reloaded when a write is committed in this process or when the
+    global version row (bumped on every catalog write) changes.
+    """
+
+    def __init__(self, enabled: bool = True, check_seconds: float = 1.0, responses_max: int = 256) -> None:
+        self.enabled = enabled
+        self.check_seconds = check_seconds
+        self.responses_max = responses_max
+        self._lock = threading.Lock()
+        self._snapshot: CatalogSnapshot | None = None
+        self._stale = True
+        self._checked_at = 0.0
+
+    def invalidate(self) -> None:
+        self._stale = True
+
+    def load(self, session: Session) -> CatalogSnapshot:
+        with self._lock:
+            # Invalidations from now on must trigger a new load
+            self._stale = False
+            self._checked_at = time.monotonic()
+
+            # Version first: a write committed while loading forces another reload
+            version = get_version(session)
+            teams = {t.id: Team.model_validate(t.model_dump()) for t in session.exec(select(Team))}
+            competitions = {c.id: Competition.model_validate(c.model_dump()) for c in session.exec(select(Competition))}
+            competition_teams: dict[int, set[int]] = {id: set() for id in competitions}
+            for link in session.exec(select(CompetitionTeamLink)):
+                competition_teams.setdefault(link.competition_id, set()).add(link.team_id)
+
+            self._snapshot = CatalogSnapshot(
+                version=version,
+                team_ids={t.name: id for id, t in teams.items()},
+                teams=teams,
+                competition_ids={c.name: id for id, c in competitions.items()},
+                competitions=competitions,
+                competition_teams={id: frozenset(ids) for id, ids in competition_teams.items()},
+                responses={},
+            )
+            return self._snapshot
+
+    def snapshot(self, session: Session) -> CatalogSnapshot | None:
+        if not self.enabled:
+            return None
+        snapshot = self._snapshot
+        if snapshot is None or self._stale:
+            return self.load(session)
+
+        # Check global version (writes from other workers) at most every check_seconds
+        now = time.monotonic()
+        if now - self._checked_at >= self.check_seconds:
+            self._checked_at = now
+            if get_version(session) != snapshot.version:
+                return self.load(session)
+        return snapshot
+
+    # Get team by id (database on a miss)
+    def get_team(self, session: Session, id: int) -> Team | None:
+        snapshot = self.snapshot(session)
+        if snapshot is not None and id in snapshot.teams:
+            return snapshot.teams[id]
+        return self._miss(crud.team.get_team(session, id))
+
+    # Get team by name (database on a miss)
+    def get_team_by_name(self, session: Session, name: str) -> Team | None:
+        snapshot = self.snapshot(session)
+        if snapshot is not None and name in snapshot.team_ids:
+            return snapshot.teams[snapshot.team_ids[name]]
+        return self._miss(crud.team.get_team_by_name(session, name))
+
+    # Get competition by id (database on a miss)
+    def get_competition(self, session: Session, id: int) -> Competition | None:
+        snapshot = self.snapshot(session)
+        if snapshot is not None and id in snapshot.competitions:
+            return snapshot.competitions[id]
+        return self._miss(crud.competition.get_competition(session, id))
+
+    # Get competition by name (database on a miss)
+    def get_competition_by_name(self, session: Session, name: str) -> Competition | None:
+        snapshot = self.snapshot(session)
+        if snapshot is not None and name in snapshot.competition_ids:
+            return snapshot.competitions[snapshot.competition_ids[name]]
+        return self._miss(crud.competition.get_competition_by_name(session, name))
+
+    # Get ids of the teams registered in a competition (database on a miss)
+    def get_competition_team_ids(self, session: Session, id: int) -> frozenset[int] | None:
+        snapshot = self.snapshot(session)
+        if snapshot is not None and id in snapshot.competition_teams:
+            return snapshot.competition_teams[id]
+        competition = self._miss(crud.competition.get_competition(session, id))
+        return None if competition is None else frozenset(t.id for t in competition.teams)
+
+    # Response of a catalog route, built once per catalog version (None without cache)
+    def response(self, session: Session, key: Hashable, build: Callable[[], Any]) -> Any:
+        snapshot = self.snapshot(session)
+        if snapshot is None:
+            return None
+        response = snapshot.responses.get(key)
+        if response is None:
+            response = build()
+            if len(snapshot.responses) < self.responses_max:
+                response = snapshot.responses.setdefault(key, response)
+        return response
+
+    def _miss(self, record: T | None) -> T | None:
+        # Found in database but not in cache: cache is outdated
+        if record is not None:
+            self.invalidate()
+        return record
+
+
+catalog = CatalogCache(enabled=settings.CATALOG_CACHE_ENABLED,
+                       check_seconds=settings.CATALOG_VERSION_CHECK_SECONDS,
+                       responses_max=settings.CATALOG_RESPONSES_MAX)
+
+
+# Whether a flush changes the catalog (Competition.matches is not part of it)
+def catalog_changed(session: Session) -> bool:
+    if any(isinstance(o, CATALOG_MODELS) for o in session.new | session.deleted):
+        return True
+    return any(
+        isinstance(o, CATALOG_MODELS) and any(
+            attr.key != "matches" and attr.history.has_changes() for attr in inspect(o).attrs
+        )
+        for o in session.dirty
+    )
+
+
+@event.listens_for(Session, "after_begin")
+def _catalog_after_begin(session: Session, transaction: SessionTransaction, connection: Connection) -> None:
+    session.info.pop("catalog_changed", None)
+
+
+@event.listens_for(Session, "after_flush")
+def _catalog_after_flush(session: Session, flush_context: UOWTransaction) -> None:
+    if not session.info.get("catalog_changed") and catalog_changed(session):
+        bump_version(session)
+
+
+@event.listens_for(Session, "after_commit")
+def _catalog_after_commit(session: Session) -> None:
+    if session.info.pop("catalog_changed", False):
+        catalog.invalidate()
@@ -0,0 +1,133 @@
+""" Response compression (gzip, and brotli when installed)
+
+The encoding is negotiated from the Accept-Encoding header (quality values, brotli
+preferred on ties). Responses are compressed when their whole body is at least
+COMPRESSION_MINIMUM_SIZE bytes and of a text type. Streamed responses and responses
+already encoded are sent as they are: cached responses keep their compressed
+versions in a CompressedBody so repeated hits do not compress again.
+"""
+import gzip
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.responses import Response
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.config import settings
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover
+    brotli = None
+
+# Supported encodings, by preference
+ENCODINGS = ("br", "gzip") if brotli is not None else ("gzip",)
+COMPRESSIBLE_TYPES = ("text/", "application/json", "application/javascript", "image/svg+xml")
+
+
+def negotiate(accept_encoding: str | None) -> str | None:
+    """
+    Best supported encoding of an Accept-Encoding header (None for identity).
+    """
+    qualities: dict[str, float] = {}
+    for item in (accept_encoding or "").split(","):
+        encoding, _, params = item.partition(";")
+        encoding = encoding.strip().lower()
+        quality = 1.0
+        for param in params.split(";"):
+            name, _, value = param.partition("=")
+            if name.strip().lower() == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        if encoding:
+            qualities[encoding] = quality
+    default = qualities.get("*", 0.0)
+    best = max(ENCODINGS, key=lambda e: qualities.get(e, default))
+    return best if qualities.get(best, default) > 0 else None
+
+
+def compress(body: bytes, encoding: str) -> bytes:
+    if encoding == "br":
+        return brotli.compress(body, quality=settings.BROTLI_QUALITY)
+    return gzip.compress(body, compresslevel=settings.GZIP_LEVEL, mtime=0)
+
+
+def compressible(headers: MutableHeaders) -> bool:
+    content_type = headers.get("content-type", "")
+    return content_type.startswith(COMPRESSIBLE_TYPES) and not content_type.startswith("text/event-stream")
+
+
+class CompressedBody:
+    """
+    Response body with its compressed versions (compressed on first use).
+    """
+
+    def __init__(self, body: bytes, media_type: str = "application/json") -> None:
+        self.body = body
+        self.media_type = media_type
+        self._encoded: dict[str, bytes] = {}
+
+    def encoded(self, encoding: str | None) -> bytes:
+        if encoding is None:
+            return self.body
+        if encoding not in self._encoded:
+            self._encoded[encoding] = compress(self.body, encoding)
+        return self._encoded[encoding]
+
+    def response(self, accept_encoding: str | None) -> Response:
+        """
+        Response with the best encoding for the client.
+        """
+        encoding = None
+        if settings.COMPRESSION_ENABLED and len(self.body) >= settings.COMPRESSION_MINIMUM_SIZE:
+            encoding = negotiate(accept_encoding)
+        headers = {"Vary": "Accept-Encoding"}
+        if encoding is not None:
+            headers["Content-Encoding"] = encoding
+        return Response(self.encoded(encoding), media_type=self.media_type, headers=headers)
+
+
+class CompressionMiddleware:
+    """
+    Compress the (not streamed) responses with the best encoding for the client.
+    """
+
+    def __init__(self, app: ASGIApp, minimum_size: int = 1000) -> None:
+        self.app = app
+        self.minimum_size = minimum_size
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        encoding = negotiate(Headers(scope=scope).get("accept-encoding")) if scope["type"] == "http" else None
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start: Message | None = None
+
+        async def send_compressed(message: Message) -> None:
+            nonlocal start
+            if message["type"] == "http.response.start":
+                # Sent with the first body message, once the body is known
+                start = message
+                return
+            if start is None:
+                await send(message)
+                return
+
+            headers = MutableHeaders(scope=start)
+            body = message.get("body", b"")
+            if (not message.get("more_body", False) and "content-encoding" not in headers
+                    and compressible(headers)):
+                if "accept-encoding" not in headers.get("vary", "").lower():
+                    headers.add_vary_header("Accept-Encoding")
+                if len(body) >= self.minimum_size:
+                    body = compress(body, encoding)
+                    headers["Content-Encoding"] = encoding
+                    headers["Content-Length"] = str(len(body))
+                    message = {**message, "body": body}
+            await send(start)
+            start = None
+            await send(message)
+
+        await self.app(scope, receive, send_compressed)
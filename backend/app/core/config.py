@@ -60,6 +60,8 @@ class Settings(BaseSettings):
     SECRET_KEY: str = secrets.token_urlsafe(32)
     # 60 minutes * 24 hours * 8 days = 8 days
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 60 * 24 * 8
+    # bcrypt cost factor (4-31), low values are only meant for tests
+    BCRYPT_ROUNDS: int = 12
     DOMAIN: str = "localhost"
     ENVIRONMENT: Literal["local", "staging", "production"] = "local"
 
@@ -142,6 +144,81 @@ class Settings(BaseSettings):
     FIRST_SUPERUSER_PASSWORD: str
     USERS_OPEN_REGISTRATION: bool = False
 
+    # In-process catalog cache (teams & competitions)
+    CATALOG_CACHE_ENABLED: bool = True
+    # Seconds between checks of the global catalog version (changes made by other workers)
+    CATALOG_VERSION_CHECK_SECONDS: float = 1.0
+    # Responses of catalog routes cached per catalog version (with their compressed bodies)
+    CATALOG_RESPONSES_MAX: int = 256
+
+    # Prometheus metrics (/metrics). Workers of a server (gunicorn) share them through
+    # METRICS_DIR, which should be emptied when the server starts. Scrapers send METRICS_TOKEN
+    # as a bearer token, /metrics is only open without it in local environment
+    METRICS_ENABLED: bool = True
+    METRICS_TOKEN: str | None = None
+    METRICS_DIR: str | None = None
+    METRICS_FLUSH_SECONDS: float = 1.0
+
+    # Server-Timing header (auth, db, crypto, serialize), by default only in local environment
+    SERVER_TIMING_ENABLED: bool | None = None
+
+    @computed_field  # type: ignore[misc]
+    @property
+    def server_timing(self) -> bool:
+        if self.SERVER_TIMING_ENABLED is None:
+            return self.ENVIRONMENT == "local"
+        return self.SERVER_TIMING_ENABLED
+
+    # On-demand profiling: requests of superusers with the X-Profile header and a random
+    # fraction of all requests, saved in PROFILES_DIR (temporary directory by default)
+    PROFILING_ENABLED: bool = False
+    PROFILING_SAMPLE_RATE: float = 0.0
+    PROFILING_INTERVAL: float = 0.001
+    PROFILES_DIR: str | None = None
+    PROFILES_MAX: int = 20
+
+    # Slow query log (/utils/slow-queries/), with the query plan of the slowest statements
+    SLOW_QUERY_ENABLED: bool = True
+    SLOW_QUERY_SECONDS: float = 0.2
+    SLOW_QUERY_EXPLAIN_SECONDS: float | None = None
+    SLOW_QUERY_LOG_SIZE: int = 200
+
+    # Fast JSON responses: orjson (if installed) and no re-validation of the large responses
+    FAST_JSON_RESPONSES: bool = True
+
+    # Response compression (gzip, brotli if installed) of bodies of at least COMPRESSION_MINIMUM_SIZE bytes
+    COMPRESSION_ENABLED: bool = True
+    COMPRESSION_MINIMUM_SIZE: int = 1000
+    GZIP_LEVEL: int = 6
+    BROTLI_QUALITY: int = 5
+
+    # Live ticket availability (/matches/stream): changes sent every tick, keepalives of idle event streams
+    STREAM_TICK_SECONDS: float = 0.5
+    STREAM_KEEPALIVE_SECONDS: float = 15.0
+
+    # Waiting rooms of high-demand matches (/waiting-room): queue tokens valid for WAITING_ROOM_TOKEN_SECONDS,
+    # state shared by the workers in the SQLite file WAITING_ROOM_DB (temporary directory by default)
+    WAITING_ROOM_ENABLED: bool = True
+    WAITING_ROOM_DB: str | None = None
+    WAITING_ROOM_TOKEN_SECONDS: int = 3600
+
+    # Email outbox: emails are saved with the request and sent by a worker thread of every
+    # server process (EMAIL_BATCH_SIZE per batch through one SMTP connection, kept open until
+    # idle for EMAIL_SMTP_IDLE_SECONDS). Failed emails are retried after EMAIL_RETRY_SECONDS,
+    # doubled on every attempt, up to EMAIL_MAX_ATTEMPTS. Without it emails are sent in the request
+    EMAIL_OUTBOX_ENABLED: bool = True
+    EMAIL_BATCH_SIZE: int = 50
+    EMAIL_POLL_SECONDS: float = 5.0
+    EMAIL_CLAIM_SECONDS: float = 300.0
+    EMAIL_MAX_ATTEMPTS: int = 5
+    EMAIL_RETRY_SECONDS: float = 30.0
+    EMAIL_SMTP_IDLE_SECONDS: float = 60.0
+
+    # Warm-up before serving requests: DB_POOL_WARMUP pool connections opened and pinged,
+    # mappers, cipher and email templates built and the catalog cache loaded (CATALOG_WARMUP)
+    DB_POOL_WARMUP: int = 5
+    CATALOG_WARMUP: bool = True
+
     def _check_default_secret(self, var_name: str, value: str | None) -> None:
         if value == "changethis":
             message = (
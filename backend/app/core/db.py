@@ -1,21 +1,79 @@
 """ Database configuration """
+from contextlib import ExitStack
+
+from sqlalchemy import Engine
 from sqlmodel import Session, create_engine, select
 
 from app import crud
 from app.core.config import settings
+from app.core.metrics import Gauge, metrics
+from app.core.security import get_password_hash
 from app.models import (
-    AccountCreateDB, User, UserCreate, TeamUpdate, MatchCreateDB, CompetitionCreateDB, 
-    CategoryEnum, SportEnum
+    Account, AccountCreateDB, User, UserCreate, Team, TeamCreateBulk, Competition, CompetitionCreateAPI,
+    CompetitionCreateIds, MatchCreate, CategoryEnum, SportEnum
 )
 
 engine = create_engine(str(settings.SQLALCHEMY_DATABASE_URI))
 
+db_pool = Gauge("db_pool_connections", "Connections of the database pool by state (size, checked_in, checked_out, overflow)")
+
+
+@metrics.collector
+def collect_pool_stats() -> None:
+    # Only pools with a size (QueuePool) have these stats
+    pool = engine.pool
+    for state in ("size", "checkedin", "checkedout", "overflow"):
+        if hasattr(pool, state):
+            # Overflow starts at -size (free slots of the pool)
+            db_pool.set(max(0, getattr(pool, state)()), state=state.replace("checked", "checked_"))
+
+
+def warm_pool(engine: Engine, connections: int) -> int:
+    """
+    Open and ping up to connections pool connections (at most the pool size), so the first
+    requests do not pay for connecting. Returns the number of connections opened.
+    """
+    # Pools without a size (e.g. NullPool) keep nothing
+    connections = min(connections, engine.pool.size()) if hasattr(engine.pool, "size") else 0
+    with ExitStack() as stack:
+        # Held together, so they are different connections
+        for _ in range(connections):
+            stack.enter_context(engine.connect()).exec_driver_sql("SELECT 1")
+    return connections
+
 
 # make sure all SQLModel models are imported (app.models) before initializing DB
 # otherwise, SQLModel might fail to initialize relationships properly
 # for more details: https://github.com/tiangolo/full-stack-fastapi-template/issues/28
 
 
+# Demo catalog: teams, competitions (with their teams) and matches (date, price, seats, local, visitor)
+DEMO_TEAMS = [
+    TeamCreateBulk(name="Arsenal", country="England", description="Best team"),
+    TeamCreateBulk(name="Liverpool", country="England", description="Worst team"),
+    TeamCreateBulk(name="Espanyol", country="Spain"),
+    TeamCreateBulk(name="Cubelles", country="Spain"),
+    TeamCreateBulk(name="Spain", country="Spain"),
+    TeamCreateBulk(name="Norway", country="Norway"),
+    TeamCreateBulk(name="Denmark", country="Denmark"),
+    TeamCreateBulk(name="Italy", country="Italy"),
+]
+DEMO_COMPETITIONS = [
+    (CompetitionCreateAPI(name="EFL championship", category=CategoryEnum.SENIOR,
+                          sport=SportEnum.FOOTBALL, teams=["Arsenal", "Liverpool"]),
+     [("30/05/2024", 100, 50000, "Arsenal", "Liverpool"), ("31/05/2024", 100, 50000, "Liverpool", "Arsenal")]),
+    (CompetitionCreateAPI(name="Catalan league", category=CategoryEnum.JUNIOR,
+                          sport=SportEnum.VOLLEYBALL, teams=["Espanyol", "Cubelles"]),
+     [("01/06/2024", 5, 200, "Espanyol", "Cubelles"), ("02/06/2024", 5, 200, "Cubelles", "Espanyol")]),
+    (CompetitionCreateAPI(name="UEFA championship", category=CategoryEnum.SENIOR,
+                          sport=SportEnum.FUTSAL, teams=["Spain", "Norway"]),
+     [("03/06/2024", 50, 8000, "Spain", "Norway"), ("04/06/2024", 50, 8000, "Norway", "Spain")]),
+    (CompetitionCreateAPI(name="Eurocup", category=CategoryEnum.SENIOR,
+                          sport=SportEnum.BASKETBALL, teams=["Denmark", "Italy"]),
+     [("04/06/2024", 125, 10000, "Denmark", "Italy"), ("05/06/2024", 125, 10000, "Italy", "Denmark")]),
+]
+
+
 def init_db(session: Session) -> None:
     # Tables should be created with Alembic migrations
     # But if you don't want to use migrations, create
@@ -26,65 +84,47 @@ def init_db(session: Session) -> None:
     # This works because the models are already imported and registered from app.models
     # SQLModel.metadata.create_all(engine)
 
+    # Everything is written in one transaction, skipping what already exists (idempotent)
     user = session.exec(select(User).where(User.email == settings.FIRST_SUPERUSER)).first()
     if user is None:
         user_in = UserCreate(email=settings.FIRST_SUPERUSER, is_superuser=True,
                              password=settings.FIRST_SUPERUSER_PASSWORD, is_active=True)
-        user = crud.user.create_user(session=session, user_create=user_in)
-        crud.account.add_account(session, AccountCreateDB(id=user.id, available_money=99999))
-
-    # Add football data
-    local = crud.team.create_team(session, TeamUpdate(name="Arsenal", country="England", description="Best team"))
-    visitor = crud.team.create_team(session, TeamUpdate(name="Liverpool", country="England", description="Worst team"))
-    competition_in = CompetitionCreateDB(name="EFL championship", category=CategoryEnum.SENIOR,
-                                         sport=SportEnum.FOOTBALL, teams=[local, visitor])
-    c = crud.competition.add_competition(session, competition_in)
-    match_in = MatchCreateDB(date="30/05/2024", price=100, number_of_seats=50000, competition=c,
-                             total_available_tickets=50000, local_team=local, visitor_team=visitor)
-    crud.match.add_match(session, match_in)
-    match_in.date = "31/05/2024"
-    match_in.visitor_team = local
-    match_in.local_team = visitor
-    crud.match.add_match(session, match_in)
-
-    # Add volleyball data
-    local = crud.team.create_team(session, TeamUpdate(name="Espanyol", country="Spain"))
-    visitor = crud.team.create_team(session, TeamUpdate(name="Cubelles", country="Spain"))
-    competition_in = CompetitionCreateDB(name="Catalan league", category=CategoryEnum.JUNIOR,
-                                         sport=SportEnum.VOLLEYBALL, teams=[local, visitor])
-    c = crud.competition.add_competition(session, competition_in)
-    match_in = MatchCreateDB(date="01/06/2024", price=5, number_of_seats=200, competition=c,
-                             total_available_tickets=200, local_team=local, visitor_team=visitor)
-    crud.match.add_match(session, match_in)
-    match_in.date = "02/06/2024"
-    match_in.visitor_team = local
-    match_in.local_team = visitor
-    crud.match.add_match(session, match_in)
-
-    # Add futsal data
-    local = crud.team.create_team(session, TeamUpdate(name="Spain", country="Spain"))
-    visitor = crud.team.create_team(session, TeamUpdate(name="Norway", country="Norway"))
-    competition_in = CompetitionCreateDB(name="UEFA championship", category=CategoryEnum.SENIOR,
-                                         sport=SportEnum.FUTSAL, teams=[local, visitor])
-    c = crud.competition.add_competition(session, competition_in)
-    match_in = MatchCreateDB(date="03/06/2024", price=50, number_of_seats=8000, competition=c,
-                             total_available_tickets=8000, local_team=local, visitor_team=visitor)
-    crud.match.add_match(session, match_in)
-    match_in.date = "04/06/2024"
-    match_in.visitor_team = local
-    match_in.local_team = visitor
-    crud.match.add_match(session, match_in)
-
-    # Add basketball data
-    local = crud.team.create_team(session, TeamUpdate(name="Denmark", country="Denmark"))
-    visitor = crud.team.create_team(session, TeamUpdate(name="Italy", country="Italy"))
-    competition_in = CompetitionCreateDB(name="Eurocup", category=CategoryEnum.SENIOR,
-                                         sport=SportEnum.BASKETBALL, teams=[local, visitor])
-    c = crud.competition.add_competition(session, competition_in)
-    match_in = MatchCreateDB(date="04/06/2024", price=125, number_of_seats=10000, competition=c,
-                             total_available_tickets=10000, local_team=local, visitor_team=visitor)
-    crud.match.add_match(session, match_in)
-    match_in.date = "05/06/2024"
-    match_in.visitor_team = local
-    match_in.local_team = visitor
-    crud.match.add_match(session, match_in)
+        user = User.model_validate(user_in, update={"hashed_password": get_password_hash(user_in.password)})
+        session.add(user)
+        session.flush()
+        session.add(Account.model_validate(AccountCreateDB(id=user.id, available_money=99999)))
+
+    seed_catalog(session, DEMO_TEAMS, DEMO_COMPETITIONS)
+    session.commit()
+
+
+def seed_catalog(session: Session, teams: list[TeamCreateBulk],
+                 competitions: list[tuple[CompetitionCreateAPI, list[tuple]]]) -> None:
+    """
+    Write teams, competitions and their matches with multi-row inserts (no commit).
+    Existing teams and competitions (by name, one lookup each) are skipped, and so
+    are the matches of existing competitions.
+    """
+    # Teams
+    team_ids = {name: id for name, id in session.exec(select(Team.name, Team.id))}
+    new_teams = [t for t in teams if t.name not in team_ids]
+    team_ids.update(zip([t.name for t in new_teams], crud.team.add_teams(session, new_teams, commit=False)))
+
+    # Competitions
+    existing = set(session.exec(select(Competition.name)))
+    new_competitions = [(c, matches) for c, matches in competitions if c.name not in existing]
+    competitions_create = [
+        CompetitionCreateIds(name=c.name, category=c.category, sport=c.sport,
+                             team_ids=[team_ids[name] for name in c.teams])
+        for c, _ in new_competitions
+    ]
+    competition_ids = crud.competition.add_competitions(session, competitions_create, commit=False)
+
+    # Matches (of the new competitions)
+    matches_create = [
+        MatchCreate(date=date, price=price, number_of_seats=seats, total_available_tickets=seats,
+                    competition_id=competition_id, local_id=team_ids[local], visitor_id=team_ids[visitor])
+        for competition_id, (_, matches) in zip(competition_ids, new_competitions)
+        for date, price, seats, local, visitor in matches
+    ]
+    crud.match.add_matches_ids(session, matches_create, commit=False)
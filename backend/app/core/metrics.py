@@ -0,0 +1,247 @@
+""" In-process metrics in Prometheus text format
+
+Counters, gauges and histograms are kept in memory. With several workers (gunicorn),
+every worker saves its values in METRICS_DIR (at most every METRICS_FLUSH_SECONDS,
+after requests, in the threadpool) and /metrics adds up the files of all workers:
+counters and histograms are summed, gauges are reported per worker (pid label).
+Without METRICS_ENABLED, metrics are not recorded.
+"""
+import atexit
+import json
+import os
+import threading
+import time
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager
+from pathlib import Path
+
+from starlette.concurrency import run_in_threadpool
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.config import settings
+
+# Prometheus default buckets (seconds)
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.075, 0.1, 0.25, 0.5, 0.75, 1.0, 2.5, 5.0, 7.5, 10.0)
+
+# Samples by labels ((name, value) pairs)
+Labels = tuple[tuple[str, str], ...]
+
+
+class Metric:
+    type = ""
+
+    def __init__(self, name: str, help: str, registry: "MetricsRegistry | None" = None) -> None:
+        self.name = name
+        self.help = help
+        self.samples: dict[Labels, float | list[float]] = {}
+        self.registry = registry or metrics
+        self.registry.register(self)
+
+    @staticmethod
+    def labels(labels: dict[str, str | int]) -> Labels:
+        return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+class Counter(Metric):
+    type = "counter"
+
+    def inc(self, amount: float = 1, **labels: str | int) -> None:
+        if not self.registry.enabled:
+            return
+        key = self.labels(labels)
+        with self.registry.lock:
+            self.samples[key] = self.samples.get(key, 0) + amount
+
+
+class Gauge(Metric):
+    type = "gauge"
+
+    def set(self, value: float, **labels: str | int) -> None:
+        if not self.registry.enabled:
+            return
+        with self.registry.lock:
+            self.samples[self.labels(labels)] = value
+
+
+class Histogram(Metric):
+    """
+    Samples are the counts of every bucket (not cumulative), then the sum and the count.
+    """
+    type = "histogram"
+
+    def __init__(self, name: str, help: str, buckets: tuple[float, ...] = DEFAULT_BUCKETS,
+                 registry: "MetricsRegistry | None" = None) -> None:
+        self.buckets = buckets
+        super().__init__(name, help, registry)
+
+    def observe(self, value: float, **labels: str | int) -> None:
+        if not self.registry.enabled:
+            return
+        key = self.labels(labels)
+        with self.registry.lock:
+            sample = self.samples.get(key)
+            if sample is None:
+                sample = self.samples[key] = [0.0] * (len(self.buckets) + 3)
+            index = next((i for i, bound in enumerate(self.buckets) if value <= bound), len(self.buckets))
+            sample[index] += 1
+            sample[-2] += value
+            sample[-1] += 1
+
+    @contextmanager
+    def time(self, **labels: str | int) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+
+class MetricsRegistry:
+    def __init__(self, directory: str | None = None, flush_seconds: float = 1.0, enabled: bool = True) -> None:
+        self.enabled = enabled
+        self.directory = Path(directory) if directory else None
+        self.flush_seconds = flush_seconds
+        self.lock = threading.Lock()
+        self.metrics: dict[str, Metric] = {}
+        self.collectors: list[Callable[[], None]] = []
+        self._flush_lock = threading.Lock()
+        self._flushed_at = 0.0
+
+    def register(self, metric: Metric) -> None:
+        self.metrics[metric.name] = metric
+
+    # Function that updates gauges before the values are saved or rendered
+    def collector(self, func: Callable[[], None]) -> Callable[[], None]:
+        self.collectors.append(func)
+        return func
+
+    def snapshot(self) -> dict:
+        for collect in self.collectors:
+            collect()
+        with self.lock:
+            return {
+                name: {"type": m.type, "help": m.help, "buckets": getattr(m, "buckets", None),
+                       "samples": [[list(key), value if m.type != "histogram" else list(value)]
+                                   for key, value in m.samples.items()]}
+                for name, m in self.metrics.items()
+            }
+
+    def flush(self) -> None:
+        # Atomic replace, readers never see half a file
+        with self._flush_lock:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            path = self.directory / f"metrics-{os.getpid()}.json"
+            tmp = path.with_suffix(".tmp")
+            tmp.write_text(json.dumps(self.snapshot()))
+            os.replace(tmp, path)
+            self._flushed_at = time.monotonic()
+
+    def flush_due(self) -> bool:
+        return self.directory is not None and time.monotonic() - self._flushed_at >= self.flush_seconds
+
+    def collect(self) -> dict:
+        """
+        Values of every worker (only this process without a directory), merged.
+        """
+        if self.directory is None:
+            return self.snapshot()
+        self.flush()
+        merged: dict = {}
+        for path in sorted(self.directory.glob("metrics-*.json")):
+            try:
+                snapshot = json.loads(path.read_text())
+            except (OSError, ValueError):
+                continue
+            pid = path.stem.removeprefix("metrics-")
+            for name, metric in snapshot.items():
+                target = merged.setdefault(name, {**metric, "samples": {}})
+                for key, value in metric["samples"]:
+                    key = tuple(map(tuple, key))
+                    if metric["type"] == "gauge":
+                        target["samples"][key + (("pid", pid),)] = value
+                    elif metric["type"] == "histogram":
+                        previous = target["samples"].get(key, [0.0] * len(value))
+                        target["samples"][key] = [a + b for a, b in zip(previous, value)]
+                    else:
+                        target["samples"][key] = target["samples"].get(key, 0) + value
+        for metric in merged.values():
+            metric["samples"] = [[list(key), value] for key, value in metric["samples"].items()]
+        return merged
+
+    def render(self) -> str:
+        """
+        Prometheus text exposition format (version 0.0.4).
+        """
+        lines = []
+        for name, metric in sorted(self.collect().items()):
+            lines.append(f"# HELP {name} {metric['help']}")
+            lines.append(f"# TYPE {name} {metric['type']}")
+            for key, value in metric["samples"]:
+                if metric["type"] == "histogram":
+                    cumulative = 0.0
+                    for bound, count in zip([*metric["buckets"], "+Inf"], value):
+                        cumulative += count
+                        lines.append(f"{name}_bucket{format_labels([*key, ['le', str(bound)]])} {cumulative:g}")
+                    lines.append(f"{name}_sum{format_labels(key)} {value[-2]:g}")
+                    lines.append(f"{name}_count{format_labels(key)} {value[-1]:g}")
+                else:
+                    lines.append(f"{name}{format_labels(key)} {value:g}")
+        return "\n".join(lines) + "\n"
+
+
+def format_labels(labels: list) -> str:
+    if not labels:
+        return ""
+    escaped = (v.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for _, v in labels)
+    return "{" + ",".join(f'{k}="{v}"' for (k, _), v in zip(labels, escaped)) + "}"
+
+
+metrics = MetricsRegistry(directory=settings.METRICS_DIR, flush_seconds=settings.METRICS_FLUSH_SECONDS,
+                          enabled=settings.METRICS_ENABLED)
+if metrics.enabled and metrics.directory is not None:
+    atexit.register(metrics.flush)
+
+
+# Application metrics
+http_requests = Counter("http_requests_total", "HTTP requests by route, method and status")
+http_request_duration = Histogram("http_request_duration_seconds", "HTTP request latency by route")
+tickets_sold = Counter("tickets_sold_total", "Tickets sold")
+revenue = Counter("revenue_euros_total", "Money paid for tickets (euros)")
+orders_rejected = Counter("orders_rejected_total", "Orders rejected by reason (sold_out, insufficient_funds, waiting_room)")
+logins = Counter("logins_total", "Login attempts by result (success, failure)")
+password_hashing = Histogram("password_hash_seconds", "bcrypt time by operation (hash, verify)",
+                             buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5))
+
+
+class MetricsMiddleware:
+    """
+    Count and time requests by route (unique id of the route, "unmatched" for 404s).
+    """
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status = 500
+        start = time.perf_counter()
+
+        async def send_status(message: Message) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_status)
+        finally:
+            route = scope.get("route")
+            route = getattr(route, "unique_id", None) or getattr(route, "path", None) or "unmatched"
+            http_request_duration.observe(time.perf_counter() - start, route=route)
+            http_requests.inc(route=route, method=scope["method"], status=status)
+            # File writes out of the event loop
+            if metrics.flush_due():
+                await run_in_threadpool(metrics.flush)
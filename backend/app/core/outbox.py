@@ -0,0 +1,203 @@
+""" Email outbox: background delivery of the emails of the API
+
+Routes add their emails to the outbox table (send_email) in the transaction of the
+request, so an email is only sent if the request commits, and return at once. A worker thread of every server process claims batches
+of due emails (EMAIL_BATCH_SIZE, claims expire after EMAIL_CLAIM_SECONDS so emails of
+a dead worker are sent by the others) and sends them through one SMTP connection,
+kept open between batches until it has been idle for EMAIL_SMTP_IDLE_SECONDS.
+Failed emails are retried with exponential backoff (EMAIL_RETRY_SECONDS, doubled on
+every attempt) up to EMAIL_MAX_ATTEMPTS, permanent SMTP errors (5xx) are not retried.
+
+The worker polls every EMAIL_POLL_SECONDS, and is woken at once by the emails added
+by its own process.
+"""
+import logging
+import smtplib
+import threading
+import time
+import uuid
+from email.message import EmailMessage
+from email.utils import formataddr
+
+from sqlalchemy import Connection, Engine
+from sqlmodel import Session
+
+from app import crud
+from app.core.config import settings
+from app.core.metrics import Counter
+from app.models import EmailOutbox
+
+logger = logging.getLogger(__name__)
+
+emails_sent = Counter("emails_total", "Outbox emails by result (sent, retried, failed)")
+
+
+def build_message(email: EmailOutbox) -> EmailMessage:
+    message = EmailMessage()
+    message["Subject"] = email.subject
+    message["From"] = formataddr((settings.EMAILS_FROM_NAME or "", settings.EMAILS_FROM_EMAIL or ""))
+    message["To"] = email.email_to
+    message.set_content(email.html_content, subtype="html")
+    return message
+
+
+class SMTPSender:
+    """
+    SMTP client reusing its connection (reconnects once when the server closed it).
+    """
+
+    def __init__(self, host: str, port: int, tls: bool = False, ssl: bool = False, user: str | None = None,
+                 password: str | None = None, idle_seconds: float = 60.0, timeout: float = 30.0) -> None:
+        self.host, self.port, self.tls, self.ssl = host, port, tls, ssl
+        self.user, self.password = user, password
+        self.idle_seconds = idle_seconds
+        self.timeout = timeout
+        self.connection: smtplib.SMTP | None = None
+        self.connections = 0
+        self._used_at = 0.0
+
+    @classmethod
+    def from_settings(cls) -> "SMTPSender":
+        return cls(settings.SMTP_HOST, settings.SMTP_PORT, tls=settings.SMTP_TLS, ssl=settings.SMTP_SSL,
+                   user=settings.SMTP_USER, password=settings.SMTP_PASSWORD,
+                   idle_seconds=settings.EMAIL_SMTP_IDLE_SECONDS)
+
+    def connect(self) -> smtplib.SMTP:
+        if self.connection is not None and time.monotonic() - self._used_at > self.idle_seconds:
+            self.close()
+        if self.connection is None:
+            if self.ssl:
+                connection = smtplib.SMTP_SSL(self.host, self.port, timeout=self.timeout)
+            else:
+                connection = smtplib.SMTP(self.host, self.port, timeout=self.timeout)
+                if self.tls:
+                    connection.starttls()
+            if self.user:
+                connection.login(self.user, self.password or "")
+            self.connection = connection
+            self.connections += 1
+        return self.connection
+
+    def send(self, message: EmailMessage) -> None:
+        try:
+            self.connect().send_message(message)
+        except (smtplib.SMTPServerDisconnected, ConnectionError):
+            # Closed by the server since the last message
+            self.close()
+            self.connect().send_message(message)
+        self._used_at = time.monotonic()
+
+    def close(self) -> None:
+        if self.connection is not None:
+            try:
+                self.connection.quit()
+            except (smtplib.SMTPException, OSError):
+                pass
+            self.connection = None
+
+
+def permanent(error: Exception) -> bool:
+    # 5xx replies will not succeed later
+    if isinstance(error, smtplib.SMTPRecipientsRefused):
+        return all(code >= 500 for code, _ in error.recipients.values())
+    return isinstance(error, smtplib.SMTPResponseException) and error.smtp_code >= 500
+
+
+class OutboxWorker:
+    def __init__(self, bind: Engine | Connection, sender: SMTPSender, batch_size: int = 50, poll_seconds: float = 5.0,
+                 claim_seconds: float = 300.0, max_attempts: int = 5, retry_seconds: float = 30.0) -> None:
+        self.bind = bind
+        self.sender = sender
+        self.batch_size = batch_size
+        self.poll_seconds = poll_seconds
+        self.claim_seconds = claim_seconds
+        self.max_attempts = max_attempts
+        self.retry_seconds = retry_seconds
+        self.id = uuid.uuid4().hex
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def retry_at(self, email: EmailOutbox, error: Exception, now: float) -> float | None:
+        # Attempts already made, without the failed one
+        if permanent(error) or email.attempts + 1 >= self.max_attempts:
+            return None
+        return now + self.retry_seconds * 2 ** email.attempts
+
+    def run_once(self) -> int:
+        """
+        Send a batch of due emails, returns the number of claimed emails.
+        """
+        # A connection is joined with savepoints (tests)
+        with Session(self.bind, join_transaction_mode="create_savepoint", expire_on_commit=False) as session:
+            emails = crud.email.claim_emails(session, self.id, self.batch_size, time.time(), self.claim_seconds)
+            for email in emails:
+                try:
+                    self.sender.send(build_message(email))
+                except Exception as e:
+                    retry_at = self.retry_at(email, e, time.time())
+                    crud.email.mark_failed(session, email, repr(e), retry_at)
+                    emails_sent.inc(result="failed" if retry_at is None else "retried")
+                    logger.warning("Email %s to %s failed (attempt %s): %r", email.id, email.email_to,
+                                   email.attempts, e)
+                else:
+                    crud.email.mark_sent(session, email, time.time())
+                    emails_sent.inc(result="sent")
+                # Every email is saved as soon as it is sent (never sent twice)
+                session.commit()
+        return len(emails)
+
+    def run(self) -> None:
+        while not self._stop.is_set():
+            try:
+                claimed = self.run_once()
+            except Exception:
+                logger.exception("Email outbox batch failed")
+                claimed = 0
+            # Full batches are followed by the next one at once
+            if claimed < self.batch_size:
+                self._wake.wait(self.poll_seconds)
+                self._wake.clear()
+        self.sender.close()
+
+    def wake(self) -> None:
+        self._wake.set()
+
+    def start(self) -> None:
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self.run, name="email-outbox", daemon=True)
+            self._thread.start()
+
+    def stop(self, timeout: float | None = 10.0) -> None:
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+
+# Worker of this process (started with the application when emails are enabled)
+worker: OutboxWorker | None = None
+
+
+def start_worker(engine: Engine) -> OutboxWorker:
+    global worker
+    if worker is None:
+        worker = OutboxWorker(engine, SMTPSender.from_settings(), batch_size=settings.EMAIL_BATCH_SIZE,
+                              poll_seconds=settings.EMAIL_POLL_SECONDS, claim_seconds=settings.EMAIL_CLAIM_SECONDS,
+                              max_attempts=settings.EMAIL_MAX_ATTEMPTS, retry_seconds=settings.EMAIL_RETRY_SECONDS)
+    worker.start()
+    return worker
+
+
+def stop_worker() -> None:
+    global worker
+    if worker is not None:
+        worker.stop()
+        worker = None
+
+
+def wake_worker() -> None:
+    if worker is not None:
+        worker.wake()
@@ -0,0 +1,219 @@
+""" On-demand request profiling (statistical, speedscope format)
+
+With PROFILING_ENABLED, a request is profiled when a superuser sends the X-Profile
+header, or at random with probability PROFILING_SAMPLE_RATE. While it runs, a sampler thread records the stacks
+of the other threads of the process every PROFILING_INTERVAL seconds, so sync routes
+(threadpool) and async routes (event loop) are both covered. Idle threads (waiting
+for work or events) are skipped, but concurrent requests of the same worker show up
+too, so profile under low load. One request per worker is profiled at a time.
+
+Profiles are saved in PROFILES_DIR, keeping the newest PROFILES_MAX files of all
+workers, and can be opened in https://www.speedscope.app. The response carries the
+X-Profile-Id header with the id of its profile.
+"""
+import json
+import os
+import random
+import re
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+from types import FrameType
+from typing import Any
+
+from jose import JWTError, jwt
+from pydantic import ValidationError
+from sqlmodel import Session
+from starlette.concurrency import run_in_threadpool
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core import security
+from app.core.config import settings
+from app.core.db import engine
+from app.models import TokenPayload, User
+
+PROFILE_HEADER = "X-Profile"
+PROFILE_ID_HEADER = "X-Profile-Id"
+# Leaf frames of threads waiting for work (threadpool) or events (event loop)
+IDLE_FRAMES = {("threading.py", "wait"), ("selectors.py", "select")}
+
+
+class Sampler(threading.Thread):
+    """
+    Stacks of all the other threads, sampled until stop() (weights are the seconds since
+    the previous sample).
+    """
+
+    def __init__(self, interval: float) -> None:
+        super().__init__(name="profiler", daemon=True)
+        self.interval = interval
+        self.frames: dict[tuple[str, str, int], int] = {}
+        self.samples: dict[int, list[tuple[list[int], float]]] = {}
+        self.start_time = self.end_time = 0.0
+        self._stop_event = threading.Event()
+
+    def run(self) -> None:
+        previous = self.start_time = time.perf_counter()
+        while not self._stop_event.wait(self.interval):
+            now = time.perf_counter()
+            for ident, frame in sys._current_frames().items():
+                if ident != self.ident and (stack := self.stack(frame)) is not None:
+                    self.samples.setdefault(ident, []).append((stack, now - previous))
+            previous = now
+        self.end_time = time.perf_counter()
+
+    def stop(self) -> None:
+        self._stop_event.set()
+        self.join()
+
+    def stack(self, frame: FrameType) -> list[int] | None:
+        # Frame indexes from the root to the leaf, None for idle threads
+        code = frame.f_code
+        if (os.path.basename(code.co_filename), code.co_name) in IDLE_FRAMES:
+            return None
+        stack = []
+        current: FrameType | None = frame
+        while current is not None:
+            code = current.f_code
+            key = (code.co_name, code.co_filename, code.co_firstlineno)
+            stack.append(self.frames.setdefault(key, len(self.frames)))
+            current = current.f_back
+        stack.reverse()
+        return stack
+
+    def speedscope(self, name: str) -> dict[str, Any]:
+        """
+        Speedscope file, with a sampled profile for every thread.
+        """
+        names = {thread.ident: thread.name for thread in threading.enumerate()}
+        return {
+            "$schema": "https://www.speedscope.app/file-format-schema.json",
+            "name": name,
+            "exporter": "app.core.profiling",
+            "shared": {"frames": [{"name": n, "file": f, "line": line} for n, f, line in self.frames]},
+            "profiles": [
+                {
+                    "type": "sampled",
+                    "name": names.get(ident, f"thread {ident}"),
+                    "unit": "seconds",
+                    "startValue": 0,
+                    "endValue": self.end_time - self.start_time,
+                    "samples": [stack for stack, _ in samples],
+                    "weights": [weight for _, weight in samples],
+                }
+                for ident, samples in self.samples.items()
+            ],
+        }
+
+
+class ProfileStore:
+    """
+    Ring of profile files (the oldest are removed), shared by the workers.
+    """
+    id_pattern = re.compile(r"\d+-\d+")
+
+    def __init__(self, directory: str | None, max_profiles: int) -> None:
+        self.directory = Path(directory or Path(tempfile.gettempdir()) / "profiles")
+        self.max_profiles = max_profiles
+
+    @staticmethod
+    def new_id() -> str:
+        # Sorted by creation time
+        return f"{time.time_ns()}-{os.getpid()}"
+
+    def path(self, id: str) -> Path | None:
+        path = self.directory / f"{id}.json"
+        return path if self.id_pattern.fullmatch(id) and path.is_file() else None
+
+    def save(self, id: str, profile: dict[str, Any]) -> None:
+        self.directory.mkdir(parents=True, exist_ok=True)
+        path = self.directory / f"{id}.json"
+        tmp = path.with_suffix(".tmp")
+        tmp.write_text(json.dumps(profile))
+        os.replace(tmp, path)
+        for old in sorted(self.directory.glob("*.json"), reverse=True)[self.max_profiles:]:
+            old.unlink(missing_ok=True)
+
+    def saved(self) -> list[dict[str, Any]]:
+        """
+        Saved profiles, newest first (from the file names, files are not read).
+        """
+        profiles = []
+        for path in sorted(self.directory.glob("*.json"), reverse=True):
+            if not self.id_pattern.fullmatch(path.stem):
+                continue
+            try:
+                size = path.stat().st_size
+            except OSError:
+                continue
+            profiles.append({"id": path.stem, "created": int(path.stem.split("-")[0]) / 1e9, "size": size})
+        return profiles
+
+
+profiles = ProfileStore(settings.PROFILES_DIR, settings.PROFILES_MAX)
+
+
+def token_subject(authorization: str | None) -> int | None:
+    # User id of a valid bearer token (no database access)
+    scheme, _, token = (authorization or "").partition(" ")
+    if scheme.lower() != "bearer":
+        return None
+    try:
+        payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[security.ALGORITHM])
+        return TokenPayload(**payload).sub
+    except (JWTError, ValidationError):
+        return None
+
+
+def is_superuser(user_id: int) -> bool:
+    with Session(engine) as session:
+        user = session.get(User, user_id)
+        return bool(user and user.is_active and user.is_superuser)
+
+
+class ProfilingMiddleware:
+    """
+    Profile the requests of superusers with the X-Profile header, and a random sample.
+    """
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+        self.lock = threading.Lock()
+
+    async def profile(self, scope: Scope) -> bool:
+        if settings.PROFILING_SAMPLE_RATE and random.random() < settings.PROFILING_SAMPLE_RATE:
+            return True
+        headers = Headers(scope=scope)
+        if PROFILE_HEADER not in headers:
+            return False
+        # Only valid tokens get to the database
+        user_id = token_subject(headers.get("authorization"))
+        return user_id is not None and await run_in_threadpool(is_superuser, user_id)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or not await self.profile(scope) or not self.lock.acquire(blocking=False):
+            await self.app(scope, receive, send)
+            return
+
+        id = profiles.new_id()
+        sampler = Sampler(settings.PROFILING_INTERVAL)
+
+        async def send_id(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                MutableHeaders(scope=message).append(PROFILE_ID_HEADER, id)
+            await send(message)
+
+        try:
+            sampler.start()
+            try:
+                await self.app(scope, receive, send_id)
+            finally:
+                sampler.stop()
+            route = getattr(scope.get("route"), "unique_id", None) or "unmatched"
+            profile = sampler.speedscope(f"{scope['method']} {scope['path']} ({route})")
+            await run_in_threadpool(profiles.save, id, profile)
+        finally:
+            self.lock.release()
@@ -1,13 +1,16 @@
 """ Security related methods """
 from datetime import datetime, timedelta
+from functools import cache
 from typing import Any
 
 from jose import jwt
 from passlib.context import CryptContext
 from cryptography.fernet import Fernet
 from app.core.config import settings
+from app.core.metrics import password_hashing
+from app.core.timing import segment
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=settings.BCRYPT_ROUNDS)
 
 
 ALGORITHM = "HS256"
@@ -21,16 +24,24 @@ def create_access_token(subject: str | Any, expires_delta: timedelta) -> str:
 
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
-    return pwd_context.verify(plain_password, hashed_password)
+    with segment("auth"), password_hashing.time(operation="verify"):
+        return pwd_context.verify(plain_password, hashed_password)
 
 
 def get_password_hash(password: str) -> str:
-    return pwd_context.hash(password)
+    with segment("auth"), password_hashing.time(operation="hash"):
+        return pwd_context.hash(password)
+
+
+# Cipher built once (the key is parsed and split on creation)
+@cache
+def get_cipher() -> Fernet:
+    return Fernet(settings.FERNET_KEY)
 
 
 def encrypt(data):
-    return Fernet(settings.FERNET_KEY).encrypt(data)
+    return get_cipher().encrypt(data)
 
 
 def decrypt(data):
-    return Fernet(settings.FERNET_KEY).decrypt(data)
+    return get_cipher().decrypt(data)
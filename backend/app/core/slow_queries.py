@@ -0,0 +1,144 @@
+""" Slow query log
+
+Statements slower than SLOW_QUERY_SECONDS are logged and kept in a bounded in-memory
+buffer (the last SLOW_QUERY_LOG_SIZE of the worker), listed to superusers by
+/utils/slow-queries/. Entries have the normalised SQL (literals and IN lists collapsed),
+the types of the parameters (never their values, so encrypted balances never leak),
+the duration, the route and the app.crud function that ran it. Statements slower
+than SLOW_QUERY_EXPLAIN_SECONDS also get their query plan.
+"""
+import logging
+import re
+import sys
+import threading
+import time
+from collections import deque
+from typing import Any
+
+from sqlalchemy import Engine, event
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+LITERALS = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+IN_LISTS = re.compile(r"\bIN \((?:\s*(?:\?|%\([^)]*\)s|%s|:\w+|\$\d+)\s*,?)+\)", re.IGNORECASE)
+EXPLAINABLE = ("SELECT", "UPDATE", "DELETE", "WITH")
+
+
+def normalise(statement: str) -> str:
+    statement = " ".join(statement.split())
+    return IN_LISTS.sub("IN (...)", LITERALS.sub("?", statement))
+
+
+def parameter_shape(parameters: Any, executemany: bool = False) -> str:
+    """
+    Types of the parameters, e.g. "(int, str)", "{id_1: int}" or "100 x (int, float)".
+    """
+    if executemany:
+        rows = list(parameters)
+        return f"{len(rows)} x {parameter_shape(rows[0])}" if rows else "0 x ()"
+    if isinstance(parameters, dict):
+        return "{" + ", ".join(f"{k}: {type(v).__name__}" for k, v in parameters.items()) + "}"
+    return "(" + ", ".join(type(v).__name__ for v in parameters or ()) + ")"
+
+
+def origin() -> tuple[str | None, str | None]:
+    # Route (outermost endpoint or dependency) and crud function (innermost) in the stack of the statement
+    route = crud = None
+    frame = sys._getframe(2)
+    while frame is not None:
+        module = frame.f_globals.get("__name__", "")
+        if crud is None and module.startswith("app.crud"):
+            crud = f"{module}.{frame.f_code.co_name}"
+        elif module.startswith("app.api"):
+            route = f"{module}.{frame.f_code.co_name}"
+        frame = frame.f_back
+    return route, crud
+
+
+def explain(connection, statement: str, parameters: Any) -> list[str]:
+    # New cursor: the one of the statement still has its rows. Outside SQLite, a failed
+    # EXPLAIN would abort the transaction of the request, so it runs in a SAVEPOINT
+    sqlite = connection.dialect.name == "sqlite"
+    cursor = connection.connection.cursor()
+    try:
+        if not sqlite:
+            cursor.execute("SAVEPOINT slow_query_explain")
+        try:
+            cursor.execute(("EXPLAIN QUERY PLAN " if sqlite else "EXPLAIN ") + statement, parameters)
+            plan = [" ".join(str(column) for column in row) for row in cursor.fetchall()]
+        except Exception as e:
+            if not sqlite:
+                cursor.execute("ROLLBACK TO SAVEPOINT slow_query_explain")
+            plan = [f"EXPLAIN failed: {e}"]
+        if not sqlite:
+            cursor.execute("RELEASE SAVEPOINT slow_query_explain")
+        return plan
+    except Exception as e:
+        return [f"EXPLAIN failed: {e}"]
+    finally:
+        cursor.close()
+
+
+class SlowQueryLog:
+    def __init__(self, threshold: float, explain_threshold: float | None = None, size: int = 200) -> None:
+        self.threshold = threshold
+        self.explain_threshold = explain_threshold
+        self.entries: deque[dict[str, Any]] = deque(maxlen=size)
+        self.lock = threading.Lock()
+
+    def listen(self, engine: Engine) -> None:
+        event.listen(engine, "before_cursor_execute", self.before)
+        event.listen(engine, "after_cursor_execute", self.after)
+        event.listen(engine, "handle_error", self.error)
+
+    def remove(self, engine: Engine) -> None:
+        event.remove(engine, "before_cursor_execute", self.before)
+        event.remove(engine, "after_cursor_execute", self.after)
+        event.remove(engine, "handle_error", self.error)
+
+    def before(self, conn, cursor, statement, parameters, context, executemany) -> None:
+        conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+    def error(self, context) -> None:
+        # Failed statements have no after_cursor_execute, drop their start time
+        conn = context.connection
+        if conn is not None and conn.info.get("query_start"):
+            conn.info["query_start"].pop()
+
+    def after(self, conn, cursor, statement, parameters, context, executemany) -> None:
+        duration = time.perf_counter() - conn.info["query_start"].pop()
+        if duration < self.threshold:
+            return
+        route, crud = origin()
+        entry = {
+            "sql": normalise(statement),
+            "parameters": parameter_shape(parameters, executemany),
+            "duration": duration,
+            "route": route,
+            "crud": crud,
+            "time": time.time(),
+            "plan": None,
+        }
+        if (self.explain_threshold is not None and duration >= self.explain_threshold and not executemany
+                and statement.lstrip().upper().startswith(EXPLAINABLE)):
+            entry["plan"] = explain(conn, statement, parameters)
+        logger.warning("Slow query (%.3fs) from %s: %s", duration, crud or route, entry["sql"])
+        with self.lock:
+            self.entries.append(entry)
+
+    def recent(self) -> list[dict[str, Any]]:
+        """
+        Logged statements, slowest first.
+        """
+        with self.lock:
+            return sorted(self.entries, key=lambda entry: entry["duration"], reverse=True)
+
+    def clear(self) -> None:
+        with self.lock:
+            self.entries.clear()
+
+
+slow_queries = SlowQueryLog(settings.SLOW_QUERY_SECONDS, settings.SLOW_QUERY_EXPLAIN_SECONDS,
+                            settings.SLOW_QUERY_LOG_SIZE)
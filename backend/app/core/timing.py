@@ -0,0 +1,150 @@
+""" Server-Timing header: time of every request split in segments (auth, db, crypto, serialize)
+
+Code reports into the timings of the current request with `with segment("name"):`,
+a shared no-op context when collection is disabled (one context variable lookup).
+Segments are exclusive: a nested segment pauses the enclosing one, so SQL run while
+authenticating counts as db, not auth. Enabled with settings.server_timing.
+"""
+import functools
+import inspect
+import time
+from collections import defaultdict
+from contextlib import contextmanager, nullcontext
+from contextvars import ContextVar
+from typing import Any, ContextManager, Iterator
+
+from fastapi import FastAPI
+from fastapi.routing import APIRoute
+from sqlalchemy import Engine, event
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+NO_TIMING = nullcontext()
+
+
+class RequestTimings:
+    """
+    Durations (seconds) by segment of one request. Only one segment runs at a time
+    (stack of started segments, the last one is running).
+    """
+
+    def __init__(self) -> None:
+        self.start = time.perf_counter()
+        self.durations: dict[str, float] = defaultdict(float)
+        self._stack: list[list] = []
+
+    def begin(self, name: str) -> None:
+        now = time.perf_counter()
+        if self._stack:
+            running = self._stack[-1]
+            self.durations[running[0]] += now - running[1]
+        self._stack.append([name, now])
+
+    def end(self) -> None:
+        if not self._stack:
+            return
+        now = time.perf_counter()
+        name, start = self._stack.pop()
+        self.durations[name] += now - start
+        if self._stack:
+            self._stack[-1][1] = now
+
+    def end_all(self) -> None:
+        while self._stack:
+            self.end()
+
+    @contextmanager
+    def segment(self, name: str) -> Iterator[None]:
+        self.begin(name)
+        try:
+            yield
+        finally:
+            self.end()
+
+    def header(self) -> str:
+        total = time.perf_counter() - self.start
+        segments = [f"{name};dur={duration * 1000:.2f}" for name, duration in self.durations.items()]
+        return ", ".join([*segments, f"total;dur={total * 1000:.2f}"])
+
+
+current_timings: ContextVar[RequestTimings | None] = ContextVar("current_timings", default=None)
+
+
+def segment(name: str) -> ContextManager:
+    timings = current_timings.get()
+    return NO_TIMING if timings is None else timings.segment(name)
+
+
+class ServerTimingMiddleware:
+    """
+    Collect the timings of every request and send them in the Server-Timing header.
+    """
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        timings = RequestTimings()
+        token = current_timings.set(timings)
+
+        async def send_timings(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                # Serialization (or anything else still running) ends when the response starts
+                timings.end_all()
+                MutableHeaders(scope=message).append("Server-Timing", timings.header())
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_timings)
+        finally:
+            current_timings.reset(token)
+
+
+# SQL statements (execution, not fetching rows) count as db
+def db_begin(*args: Any) -> None:
+    timings = current_timings.get()
+    if timings is not None:
+        timings.begin("db")
+
+
+def db_end(*args: Any) -> None:
+    timings = current_timings.get()
+    if timings is not None:
+        timings.end()
+
+
+def instrument_engine(engine: Engine) -> None:
+    # Listening twice is a no-op (one engine, many applications)
+    event.listen(engine, "before_cursor_execute", db_begin)
+    event.listen(engine, "after_cursor_execute", db_end)
+    event.listen(engine, "handle_error", db_end)
+
+
+def instrument_routes(app: FastAPI) -> None:
+    """
+    Time from the return of every endpoint to the start of its response (serialize).
+    """
+    def serialize_after(call):
+        if inspect.iscoroutinefunction(call):
+            @functools.wraps(call)
+            async def timed(*args: Any, **kwargs: Any) -> Any:
+                result = await call(*args, **kwargs)
+                if (timings := current_timings.get()) is not None:
+                    timings.begin("serialize")
+                return result
+        else:
+            @functools.wraps(call)
+            def timed(*args: Any, **kwargs: Any) -> Any:
+                result = call(*args, **kwargs)
+                if (timings := current_timings.get()) is not None:
+                    timings.begin("serialize")
+                return result
+        return timed
+
+    for route in app.routes:
+        if isinstance(route, APIRoute) and route.dependant.call is not None:
+            route.dependant.call = serialize_after(route.dependant.call)
@@ -0,0 +1,196 @@
+""" Virtual waiting room for high-demand matches
+
+Superusers open a waiting room for a match with an admission rate (users per second).
+Users join the queue of the match and get a signed queue token with their position
+(joining again returns the same position). Positions are admitted in order at the
+rate of the room, and orders of the match need an admitted token, so the order routes
+never see more buyers than the rate, however many users are waiting.
+
+The state is shared by the workers of a server in a SQLite file (WAITING_ROOM_DB): one
+row per room (rate, positions issued and the admission line, base_admitted positions
+at base_time) and one per queued user. Admission is computed from the room row, so
+checking a token is one primary key read. Unused admission time is not saved up: a
+room that was idle admits one user at once, then again at its rate.
+"""
+import hashlib
+import sqlite3
+import tempfile
+import threading
+import time
+from collections.abc import Iterator
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, NamedTuple
+
+from jose import JWTError, jwt
+
+from app.core.config import settings
+from app.core.security import ALGORITHM
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS room (
+    match_id INTEGER PRIMARY KEY,
+    rate REAL NOT NULL,
+    issued INTEGER NOT NULL,
+    base_admitted INTEGER NOT NULL,
+    base_time REAL NOT NULL,
+    generation INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS queued (
+    match_id INTEGER NOT NULL,
+    user_id INTEGER NOT NULL,
+    position INTEGER NOT NULL,
+    PRIMARY KEY (match_id, user_id)
+) WITHOUT ROWID;
+"""
+
+
+class Room(NamedTuple):
+    match_id: int
+    rate: float
+    issued: int
+    base_admitted: int
+    base_time: float
+    generation: int
+
+    def admitted(self, now: float) -> int:
+        # Positions below this one are admitted (never more than the issued ones)
+        return min(self.issued, self.base_admitted + int((now - self.base_time) * self.rate))
+
+    def wait(self, position: int, now: float) -> float:
+        # Seconds until the position is admitted
+        ahead = position - self.base_admitted + 1
+        return max(0.0, self.base_time + ahead / self.rate - now)
+
+
+class QueueTicket(NamedTuple):
+    match_id: int
+    position: int
+    ahead: int
+    admitted: bool
+    estimated_wait: float
+
+
+class WaitingRoom:
+    def __init__(self, path: str | None, token_seconds: int = 3600) -> None:
+        self.path = Path(path or Path(tempfile.gettempdir()) / "waiting-room.sqlite")
+        self.token_seconds = token_seconds
+        self._local = threading.local()
+
+    @property
+    def connection(self) -> sqlite3.Connection:
+        # One connection per thread (autocommit, explicit transactions for writes)
+        connection = getattr(self._local, "connection", None)
+        if connection is None or self._local.path != self.path:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            connection = sqlite3.connect(self.path, timeout=10, isolation_level=None, check_same_thread=False)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.executescript(SCHEMA)
+            self._local.connection, self._local.path = connection, self.path
+        return connection
+
+    @staticmethod
+    def key() -> str:
+        # Queue tokens are never valid access tokens (and the other way round)
+        return hashlib.sha256(f"waiting-room:{settings.SECRET_KEY}".encode()).hexdigest()
+
+    def rooms(self, match_ids: list[int]) -> dict[int, Room]:
+        """
+        Open rooms among the given matches (one query).
+        """
+        if not match_ids:
+            return {}
+        placeholders = ",".join("?" * len(match_ids))
+        rows = self.connection.execute(f"SELECT * FROM room WHERE match_id IN ({placeholders})", match_ids)
+        return {row[0]: Room(*row) for row in rows}
+
+    def room(self, match_id: int) -> Room | None:
+        return self.rooms([match_id]).get(match_id)
+
+    def open(self, match_id: int, rate: float) -> Room:
+        """
+        Open the room of a match, or change its rate (admitted positions stay admitted).
+        """
+        now = time.time()
+        with self.transaction() as connection:
+            room = self._room(connection, match_id)
+            if room is None:
+                # One position of admission time, the first user is admitted at once
+                room = Room(match_id, rate, 0, 0, now - 1 / rate, time.time_ns())
+            else:
+                room = room._replace(rate=rate, base_admitted=room.admitted(now), base_time=now)
+            connection.execute("INSERT OR REPLACE INTO room VALUES (?, ?, ?, ?, ?, ?)", room)
+        return room
+
+    def close(self, match_id: int) -> bool:
+        with self.transaction() as connection:
+            connection.execute("DELETE FROM queued WHERE match_id = ?", (match_id,))
+            return connection.execute("DELETE FROM room WHERE match_id = ?", (match_id,)).rowcount > 0
+
+    def join(self, match_id: int, user_id: int) -> tuple[str, QueueTicket] | None:
+        """
+        Queue token and ticket of the user (same position if already queued), None
+        without a room.
+        """
+        now = time.time()
+        with self.transaction() as connection:
+            room = self._room(connection, match_id)
+            if room is None:
+                return None
+            row = connection.execute("SELECT position FROM queued WHERE match_id = ? AND user_id = ?",
+                                     (match_id, user_id)).fetchone()
+            if row is not None:
+                position = row[0]
+            else:
+                position = room.issued
+                if room.base_admitted + (now - room.base_time) * room.rate >= room.issued + 1:
+                    # Idle room: the admission line restarts one position ahead of the queue
+                    room = room._replace(base_admitted=room.issued, base_time=now - 1 / room.rate)
+                room = room._replace(issued=room.issued + 1)
+                connection.execute("UPDATE room SET issued = ?, base_admitted = ?, base_time = ? WHERE match_id = ?",
+                                   (room.issued, room.base_admitted, room.base_time, match_id))
+                connection.execute("INSERT INTO queued VALUES (?, ?, ?)", (match_id, user_id, position))
+        token = jwt.encode({"sub": str(user_id), "match": match_id, "position": position, "room": room.generation,
+                            "exp": int(now) + self.token_seconds}, self.key(), algorithm=ALGORITHM)
+        return token, self.ticket(room, position, now)
+
+    @staticmethod
+    def ticket(room: Room, position: int, now: float | None = None) -> QueueTicket:
+        now = time.time() if now is None else now
+        admitted = room.admitted(now)
+        return QueueTicket(match_id=room.match_id, position=position, ahead=max(0, position - admitted),
+                           admitted=position < admitted, estimated_wait=room.wait(position, now))
+
+    def positions(self, tokens: str | None, user_id: int) -> dict[int, tuple[int, int]]:
+        """
+        (room generation, position) by match of the valid tokens of the user (comma separated).
+        """
+        positions = {}
+        for token in (tokens or "").split(","):
+            try:
+                payload: dict[str, Any] = jwt.decode(token.strip(), self.key(), algorithms=[ALGORITHM])
+                if int(payload["sub"]) == user_id:
+                    positions[int(payload["match"])] = (int(payload["room"]), int(payload["position"]))
+            except (JWTError, KeyError, TypeError, ValueError):
+                continue
+        return positions
+
+    @contextmanager
+    def transaction(self) -> Iterator[sqlite3.Connection]:
+        # Write transaction (BEGIN IMMEDIATE: workers queue for the lock instead of failing on upgrade)
+        connection = self.connection
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            yield connection
+        except BaseException:
+            connection.execute("ROLLBACK")
+            raise
+        connection.execute("COMMIT")
+
+    @staticmethod
+    def _room(connection: sqlite3.Connection, match_id: int) -> Room | None:
+        row = connection.execute("SELECT * FROM room WHERE match_id = ?", (match_id,)).fetchone()
+        return None if row is None else Room(*row)
+
+
+waiting_room = WaitingRoom(settings.WAITING_ROOM_DB, settings.WAITING_ROOM_TOKEN_SECONDS)
@@ -1,3 +1,3 @@
 """ CRUD package """
 # Import all modules
-from . import user, account, competition, match, team, order
+from . import user, account, competition, match, team, order, catalog, email
@@ -7,6 +7,10 @@ from app.models import Account, AccountCreateDB
 def get_account(session: Session, id: int) -> Account | None:
     return session.get(Account, id)
 
+# Get account by id, reloaded and locked until the end of the transaction (where supported)
+def get_account_for_update(session: Session, id: int) -> Account | None:
+    return session.get(Account, id, with_for_update=True, populate_existing=True)
+
 # Create account
 def add_account(session: Session, account_create: AccountCreateDB) -> Account:
     account = Account.model_validate(account_create)
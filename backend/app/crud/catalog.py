@@ -0,0 +1,20 @@
+""" Catalog version related CRUD methods """
+from sqlalchemy import insert, update
+from sqlmodel import Session, select
+
+from app.models import CatalogVersion
+
+# Get global catalog version
+def get_version(session: Session) -> int:
+    version = session.exec(select(CatalogVersion.version)).first()
+    return 0 if version is None else version
+
+# Bump global catalog version (once per transaction, committed with it)
+def bump_version(session: Session) -> None:
+    if session.info.get("catalog_changed"):
+        return
+    session.info["catalog_changed"] = True
+    connection = session.connection()
+    result = connection.execute(update(CatalogVersion).values(version=CatalogVersion.version + 1))
+    if result.rowcount == 0:
+        connection.execute(insert(CatalogVersion).values(id=1, version=1))
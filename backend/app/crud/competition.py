@@ -1,7 +1,14 @@
 """ Competition related CRUD methods """
+from collections.abc import Iterable
+
+from sqlalchemy import insert
+from sqlalchemy.orm import selectinload
 from sqlmodel import Session, select
 
-from app.models import Competition, CompetitionCreateDB, CompetitionUpdate
+from app.crud.catalog import bump_version
+from app.models import (
+    Competition, CompetitionCreateDB, CompetitionCreateIds, CompetitionTeamLink, CompetitionUpdate, Match
+)
 
 # Get competition by id
 def get_competition(session: Session, id: int) -> Competition | None:
@@ -11,14 +18,72 @@ def get_competition(session: Session, id: int) -> Competition | None:
 def get_competition_by_name(session: Session, name: str) -> Competition | None:
     return session.exec(select(Competition).where(Competition.name == name)).first()
 
-# Create competition
+# Get existing competition names among the given ones (one query)
+def get_existing_competition_names(session: Session, names: Iterable[str]) -> set[str]:
+    names = set(names)
+    if not names:
+        return set()
+    return set(session.exec(select(Competition.name).where(Competition.name.in_(names))))
+
+# Get ids of the teams registered in the given competitions (two queries), by competition id
+# (inexistent competitions are not in the result)
+def get_competitions_team_ids(session: Session, ids: Iterable[int]) -> dict[int, set[int]]:
+    ids = set(ids)
+    if not ids:
+        return {}
+    teams = {id: set() for id in session.exec(select(Competition.id).where(Competition.id.in_(ids)))}
+    links = select(CompetitionTeamLink).where(CompetitionTeamLink.competition_id.in_(teams))
+    for link in session.exec(links):
+        teams[link.competition_id].add(link.team_id)
+    return teams
+
+# Get competition by id, loading its teams eagerly (one extra query)
+def get_competition_with_teams(session: Session, id: int) -> Competition | None:
+    statement = select(Competition).where(Competition.id == id).options(selectinload(Competition.teams))
+    return session.exec(statement).first()
+
+# Get page of matches of a competition (keyset by id)
+def get_competition_matches(session: Session, id: int, after: int | None = None,
+                            limit: int | None = None) -> list[Match]:
+    statement = select(Match).where(Match.competition_id == id)
+    if after is not None:
+        statement = statement.where(Match.id > after)
+    return list(session.exec(statement.order_by(Match.id).limit(limit)))
+
+# Create competition (team links written with a single multi-row insert)
 def add_competition(session: Session, competition_create: CompetitionCreateDB) -> Competition:
-    competition = Competition.model_validate(competition_create)
+    competition = Competition.model_validate(competition_create.model_dump(exclude={"teams"}))
     session.add(competition)
+    session.flush()
+    team_ids = {team.id for team in competition_create.teams}
+    if team_ids:
+        links = [{"competition_id": competition.id, "team_id": id} for id in team_ids]
+        session.execute(insert(CompetitionTeamLink), links)
     session.commit()
     session.refresh(competition)
     return competition
 
+# Create competitions and their team links with multi-row inserts (one transaction unless
+# commit is False), returns their ids in the same order
+def add_competitions(session: Session, competitions_create: list[CompetitionCreateIds],
+                     commit: bool = True) -> list[int]:
+    if not competitions_create:
+        return []
+    rows = [c.model_dump(exclude={"team_ids"}) for c in competitions_create]
+    statement = insert(Competition).returning(Competition.id, sort_by_parameter_order=True)
+    ids = list(session.scalars(statement, rows))
+    links = [
+        {"competition_id": id, "team_id": team_id}
+        for id, c in zip(ids, competitions_create)
+        for team_id in set(c.team_ids)
+    ]
+    if links:
+        session.execute(insert(CompetitionTeamLink), links)
+    bump_version(session)
+    if commit:
+        session.commit()
+    return ids
+
 # Remove competition
 def remove_competition(session: Session, competition: Competition):
     session.delete(competition)
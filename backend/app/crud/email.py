@@ -0,0 +1,56 @@
+""" Email outbox related CRUD methods """
+import time
+
+from sqlalchemy import or_, update
+from sqlmodel import Session, func, select
+
+from app.models import EmailOutbox
+
+# Add an email to the outbox (committed with the transaction of the session, or at once if commit is True)
+def enqueue_email(session: Session, email_to: str, subject: str, html_content: str,
+                  commit: bool = False) -> EmailOutbox:
+    now = time.time()
+    email = EmailOutbox(email_to=email_to, subject=subject, html_content=html_content,
+                        next_attempt_at=now, created_at=now)
+    session.add(email)
+    if commit:
+        session.commit()
+    return email
+
+# Claim up to limit pending emails due at now until now + lease seconds (claims of other
+# workers are skipped until they expire), returns the claimed emails in id order
+def claim_emails(session: Session, worker: str, limit: int, now: float, lease: float) -> list[EmailOutbox]:
+    unclaimed = or_(EmailOutbox.locked_until.is_(None), EmailOutbox.locked_until < now)
+    due = (select(EmailOutbox.id)
+           .where(EmailOutbox.status == "pending", EmailOutbox.next_attempt_at <= now, unclaimed)
+           .order_by(EmailOutbox.id).limit(limit))
+    # The claim condition is checked again on the locked rows (concurrent claims)
+    session.exec(update(EmailOutbox).where(EmailOutbox.id.in_(due.scalar_subquery()), unclaimed)
+                 .values(claimed_by=worker, locked_until=now + lease))
+    session.commit()
+    return list(session.exec(select(EmailOutbox).where(EmailOutbox.claimed_by == worker,
+                                                       EmailOutbox.locked_until == now + lease)
+                             .order_by(EmailOutbox.id)))
+
+# Mark a claimed email as sent
+def mark_sent(session: Session, email: EmailOutbox, now: float) -> None:
+    email.status = "sent"
+    email.sent_at = now
+    email.attempts += 1
+    email.locked_until = None
+    session.add(email)
+
+# Record a failed attempt: retried at retry_at, or failed for good if retry_at is None
+def mark_failed(session: Session, email: EmailOutbox, error: str, retry_at: float | None) -> None:
+    email.attempts += 1
+    email.last_error = error[:1000]
+    email.locked_until = None
+    if retry_at is None:
+        email.status = "failed"
+    else:
+        email.next_attempt_at = retry_at
+    session.add(email)
+
+# Count emails by status
+def count_emails(session: Session, status: str) -> int:
+    return session.exec(select(func.count(EmailOutbox.id)).where(EmailOutbox.status == status)).one()
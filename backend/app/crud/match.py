@@ -1,6 +1,7 @@
 """ Match related CRUD methods """
+from sqlalchemy import insert, update
 from sqlmodel import Session, select
-from app.models import Match, MatchCreateDB, MatchUpdate
+from app.models import Match, MatchCreate, MatchCreateDB, MatchUpdate
     
 # Get all matches
 def get_all_matches(session: Session) -> list[Match]:
@@ -10,6 +11,26 @@ def get_all_matches(session: Session) -> list[Match]:
 def get_match_by_id(session: Session, id: int) -> Match | None:
     return session.get(Match, id)
 
+# Get available tickets by match id (of the given matches, all if None)
+def get_available_tickets(session: Session, ids: list[int] | None = None) -> dict[int, int]:
+    statement = select(Match.id, Match.total_available_tickets)
+    if ids is not None:
+        statement = statement.where(Match.id.in_(ids))
+    return {id: tickets for id, tickets in session.exec(statement)}
+
+# Reserve tickets of a match with an atomic conditional update (the row stays locked until the
+# end of the transaction), returns the reloaded match or None if there are not enough tickets
+def reserve_tickets(session: Session, id: int, num_tickets: int) -> Match | None:
+    statement = (
+        update(Match)
+        .where(Match.id == id, Match.total_available_tickets >= num_tickets)
+        .values(total_available_tickets=Match.total_available_tickets - num_tickets)
+        .execution_options(synchronize_session=False)
+    )
+    if session.execute(statement).rowcount != 1:
+        return None
+    return session.get(Match, id, populate_existing=True)
+
 # Create match
 def add_match(session: Session, match_create: MatchCreateDB) -> Match:
     match = Match.model_validate(match_create)
@@ -18,6 +39,25 @@ def add_match(session: Session, match_create: MatchCreateDB) -> Match:
     session.refresh(match)
     return match
 
+# Create match from competition and team identifiers
+def add_match_ids(session: Session, match_create: MatchCreate) -> Match:
+    match = Match.model_validate(match_create)
+    session.add(match)
+    session.commit()
+    session.refresh(match)
+    return match
+
+# Create matches from competition and team identifiers with a multi-row insert (one transaction
+# unless commit is False), returns their ids in the same order
+def add_matches_ids(session: Session, matches_create: list[MatchCreate], commit: bool = True) -> list[int]:
+    if not matches_create:
+        return []
+    statement = insert(Match).returning(Match.id, sort_by_parameter_order=True)
+    ids = list(session.scalars(statement, [m.model_dump() for m in matches_create]))
+    if commit:
+        session.commit()
+    return ids
+
 # Remove match
 def remove_match(session: Session, match: Match):
     session.delete(match)
@@ -1,12 +1,44 @@
 """ Team related CRUD methods """
-from sqlmodel import Session, select
+from collections.abc import Iterable
 
-from app.models import Team, TeamUpdate
+from sqlalchemy import insert
+from sqlmodel import Session, func, select
+
+from app.crud.catalog import bump_version
+from app.models import Team, TeamCreateBulk, TeamUpdate
+
+# Columns that can be selected in a teams page
+TEAM_COLUMNS = ("id", "name", "country", "description")
 
 # Get all teams
 def get_all_teams(session: Session) -> list[Team]:
     return list(session.exec(select(Team)))
 
+# Filter teams by country and name prefix
+def filter_teams(statement, country: str | None = None, name_prefix: str | None = None):
+    if country is not None:
+        statement = statement.where(Team.country == country)
+    if name_prefix:
+        statement = statement.where(Team.name.startswith(name_prefix, autoescape=True))
+    return statement
+
+# Count teams (with filters)
+def count_teams(session: Session, country: str | None = None, name_prefix: str | None = None) -> int:
+    statement = filter_teams(select(func.count()).select_from(Team), country, name_prefix)
+    return session.exec(statement).one()
+
+# Get page of teams (keyset by id) as rows with only the given columns (id always included)
+def get_teams_page(session: Session, columns: list[str] | None = None, country: str | None = None,
+                   name_prefix: str | None = None, after: int | None = None,
+                   limit: int | None = None) -> list[dict]:
+    columns = ["id"] + [c for c in (columns or TEAM_COLUMNS) if c != "id"]
+    statement = select(*[getattr(Team, c) for c in columns])
+    statement = filter_teams(statement, country, name_prefix)
+    if after is not None:
+        statement = statement.where(Team.id > after)
+    statement = statement.order_by(Team.id).limit(limit)
+    return [dict(row) for row in session.execute(statement).mappings()]
+
 # Get team by id
 def get_team(session: Session, id: int) -> Team | None:
     return session.get(Team, id)
@@ -15,6 +47,20 @@ def get_team(session: Session, id: int) -> Team | None:
 def get_team_by_name(session: Session, name: str) -> Team | None:
     return session.exec(select(Team).where(Team.name == name)).first()
 
+# Get teams with given names (one query), by name (missing names are not in the result)
+def get_teams_by_names(session: Session, names: Iterable[str]) -> dict[str, Team]:
+    names = set(names)
+    if not names:
+        return {}
+    return {t.name: t for t in session.exec(select(Team).where(Team.name.in_(names)))}
+
+# Get identifiers of the existing teams among the given ones (one query)
+def get_existing_team_ids(session: Session, ids: Iterable[int]) -> set[int]:
+    ids = set(ids)
+    if not ids:
+        return set()
+    return set(session.exec(select(Team.id).where(Team.id.in_(ids))))
+
 # Remove team
 def remove_team(session: Session, team: Team):
     session.delete(team)
@@ -43,4 +89,24 @@ def create_team_id(session: Session, team_id: int, team_in: TeamUpdate) -> Team:
     session.add(team)
     session.commit()
     session.refresh(team)
-    return team
\ No newline at end of file
+    return team
+
+# Create teams with multi-row inserts (one transaction unless commit is False),
+# returns their ids in the same order
+def add_teams(session: Session, teams_in: list[TeamCreateBulk], commit: bool = True) -> list[int]:
+    if not teams_in:
+        return []
+    # Teams with and without id are inserted separately (different columns)
+    ids: list[int | None] = [team_in.id for team_in in teams_in]
+    for with_id in (True, False):
+        positions = [i for i, team_in in enumerate(teams_in) if (team_in.id is not None) == with_id]
+        if not positions:
+            continue
+        rows = [teams_in[i].model_dump(exclude={"id"} if not with_id else set()) for i in positions]
+        statement = insert(Team).returning(Team.id, sort_by_parameter_order=True)
+        for i, id in zip(positions, session.scalars(statement, rows)):
+            ids[i] = id
+    bump_version(session)
+    if commit:
+        session.commit()
+    return ids
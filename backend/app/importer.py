@@ -0,0 +1,268 @@
+""" Command line importer for the catalog (teams, competitions and matches)
+
+Rows are streamed from CSV or JSONL files (constant memory), validated with the same
+rules as the API and written with multi-row inserts in chunks, committing every
+transaction size rows. Progress is saved next to the input file after every commit,
+so an interrupted import can be resumed from the last committed chunk (--resume).
+
+    python -m app.importer teams teams.csv
+    python -m app.importer competitions competitions.jsonl --chunk-size 500
+    python -m app.importer matches matches.csv --transaction-size 50000 --resume
+
+CSV competitions list their teams separated by "|". Matches may reference their
+competition and teams by id (competition_id, local_id, visitor_id) or by name
+(competition, local, visitor).
+"""
+import argparse
+import csv
+import json
+import logging
+import os
+import time
+from abc import ABC, abstractmethod
+from collections.abc import Iterator
+from pathlib import Path
+from typing import Any
+
+from fastapi import HTTPException
+from pydantic import ValidationError
+from sqlmodel import Session, select
+
+from app import crud
+from app.api.routes.matches import check_match
+from app.core.db import engine
+from app.models import (
+    Competition,
+    CompetitionCreateAPI,
+    CompetitionCreateIds,
+    CompetitionTeamLink,
+    MatchCreate,
+    Team,
+    TeamCreateBulk,
+)
+
+logger = logging.getLogger(__name__)
+
+
+class RowError(Exception):
+    pass
+
+
+# Read rows from a CSV or JSONL file (one at a time), empty CSV values are missing values.
+# Invalid JSONL lines are yielded as a RowError, rejected like any other invalid row
+def read_rows(path: Path, format: str) -> Iterator[dict[str, Any] | RowError]:
+    with open(path, newline="") as f:
+        if format == "csv":
+            for row in csv.DictReader(f):
+                yield {k: v for k, v in row.items() if v not in ("", None)}
+        else:
+            for line in f:
+                if line.strip():
+                    try:
+                        row = json.loads(line)
+                    except json.JSONDecodeError as e:
+                        row = RowError(f"Invalid JSON: {e}")
+                    if not isinstance(row, (dict, RowError)):
+                        row = RowError("Rows must be JSON objects")
+                    yield row
+
+
+class Importer(ABC):
+    """
+    Base importer: validates rows (prepare) and writes chunks of valid items (write).
+    Name => id maps are loaded once, so rows are resolved without queries.
+    """
+    kind = ""
+
+    def __init__(self, session: Session) -> None:
+        self.session = session
+
+    @abstractmethod
+    def prepare(self, row: dict[str, Any]) -> Any:
+        ...
+
+    @abstractmethod
+    def write(self, items: list[Any]) -> None:
+        ...
+
+
+class TeamImporter(Importer):
+    kind = "teams"
+
+    def __init__(self, session: Session) -> None:
+        super().__init__(session)
+        self.names = set(session.exec(select(Team.name)))
+        self.ids = set(session.exec(select(Team.id)))
+
+    def prepare(self, row: dict[str, Any]) -> TeamCreateBulk:
+        team_in = TeamCreateBulk.model_validate(row)
+        if team_in.name is None or team_in.country is None:
+            raise RowError("Lack of information to create a new team")
+        if team_in.name in self.names:
+            raise RowError(f"A team named {team_in.name} already exists in the system")
+        if team_in.id in self.ids:
+            raise RowError(f"A team with id {team_in.id} already exists in the system")
+        self.names.add(team_in.name)
+        if team_in.id is not None:
+            self.ids.add(team_in.id)
+        return team_in
+
+    def write(self, items: list[TeamCreateBulk]) -> None:
+        crud.team.add_teams(self.session, items, commit=False)
+
+
+class CompetitionImporter(Importer):
+    kind = "competitions"
+
+    def __init__(self, session: Session) -> None:
+        super().__init__(session)
+        self.names = set(session.exec(select(Competition.name)))
+        self.team_ids = {name: id for name, id in session.exec(select(Team.name, Team.id))}
+
+    def prepare(self, row: dict[str, Any]) -> CompetitionCreateIds:
+        if isinstance(row.get("teams"), str):
+            row["teams"] = [name.strip() for name in row["teams"].split("|") if name.strip()]
+        competition_in = CompetitionCreateAPI.model_validate(row)
+        if competition_in.name in self.names:
+            raise RowError(f"A competition named {competition_in.name} already exists in the system")
+        missing = sorted(set(competition_in.teams) - self.team_ids.keys())
+        if missing:
+            raise RowError(f"Teams {', '.join(missing)} not found")
+        self.names.add(competition_in.name)
+        return CompetitionCreateIds(name=competition_in.name, category=competition_in.category,
+                                    sport=competition_in.sport,
+                                    team_ids=[self.team_ids[name] for name in competition_in.teams])
+
+    def write(self, items: list[CompetitionCreateIds]) -> None:
+        crud.competition.add_competitions(self.session, items, commit=False)
+
+
+class MatchImporter(Importer):
+    kind = "matches"
+
+    def __init__(self, session: Session) -> None:
+        super().__init__(session)
+        self.team_ids = {name: id for name, id in session.exec(select(Team.name, Team.id))}
+        self.competition_ids = {name: id for name, id in session.exec(select(Competition.name, Competition.id))}
+        self.registered_ids: dict[int, set[int]] = {id: set() for id in self.competition_ids.values()}
+        for link in session.exec(select(CompetitionTeamLink)):
+            self.registered_ids[link.competition_id].add(link.team_id)
+        self.existing_team_ids = set(self.team_ids.values())
+
+    def resolve(self, row: dict[str, Any], key: str, ids: dict[str, int]) -> None:
+        # Reference by name (key) => identifier (key_id)
+        if f"{key}_id" not in row and key in row:
+            if row[key] not in ids:
+                raise RowError(f"{key.capitalize()} {row[key]} not found")
+            row[f"{key}_id"] = ids[row[key]]
+
+    def prepare(self, row: dict[str, Any]) -> MatchCreate:
+        self.resolve(row, "competition", self.competition_ids)
+        self.resolve(row, "local", self.team_ids)
+        self.resolve(row, "visitor", self.team_ids)
+        match_in = MatchCreate.model_validate(row)
+        try:
+            return check_match(match_in, self.existing_team_ids,
+                               self.registered_ids.get(match_in.competition_id))
+        except HTTPException as e:
+            raise RowError(e.detail)
+
+    def write(self, items: list[MatchCreate]) -> None:
+        crud.match.add_matches_ids(self.session, items, commit=False)
+
+
+IMPORTERS = {importer.kind: importer for importer in (TeamImporter, CompetitionImporter, MatchImporter)}
+
+
+# Progress file (rows of the input file already committed)
+def progress_path(path: Path) -> Path:
+    return path.with_name(path.name + ".progress")
+
+
+def read_progress(path: Path) -> int:
+    try:
+        return json.loads(progress_path(path).read_text())["rows"]
+    except FileNotFoundError:
+        return 0
+
+
+def write_progress(path: Path, rows: int) -> None:
+    # Atomic replace, the file always holds a committed position
+    tmp = progress_path(path).with_suffix(".tmp")
+    tmp.write_text(json.dumps({"rows": rows}))
+    os.replace(tmp, progress_path(path))
+
+
+def import_file(session: Session, kind: str, path: Path, format: str, chunk_size: int = 1000,
+                transaction_size: int = 10000, resume: bool = False) -> dict[str, int]:
+    """
+    Import a file, returns the number of rows read, imported and rejected.
+    """
+    importer = IMPORTERS[kind](session)
+    start = read_progress(path) if resume else 0
+    if start:
+        logger.info(f"Resuming {path} after row {start}")
+
+    rows = imported = errors = 0
+    committed = start
+    chunk: list[Any] = []
+    began = time.perf_counter()
+
+    def commit(position: int) -> None:
+        nonlocal committed
+        if chunk:
+            importer.write(chunk)
+            chunk.clear()
+        session.commit()
+        committed = position
+        write_progress(path, committed)
+        elapsed = time.perf_counter() - began
+        logger.info(f"{committed} rows committed ({imported} imported, {errors} rejected), "
+                    f"{rows / elapsed if elapsed else 0:.0f} rows/s")
+
+    for position, row in enumerate(read_rows(path, format), start=1):
+        if position <= start:
+            continue
+        rows += 1
+        try:
+            if isinstance(row, RowError):
+                raise row
+            chunk.append(importer.prepare(row))
+            imported += 1
+        except (RowError, ValidationError, ValueError) as e:
+            errors += 1
+            logger.warning(f"Row {position} rejected: {e}")
+
+        if len(chunk) >= chunk_size:
+            importer.write(chunk)
+            chunk.clear()
+        if (position - start) % transaction_size == 0:
+            commit(position)
+
+    if committed != start + rows:
+        commit(start + rows)
+    return {"rows": rows, "imported": imported, "rejected": errors}
+
+
+def main() -> None:
+    logging.basicConfig(level=logging.INFO)
+    parser = argparse.ArgumentParser(description="Import teams, competitions or matches from CSV/JSONL files")
+    parser.add_argument("kind", choices=list(IMPORTERS))
+    parser.add_argument("file", type=Path)
+    parser.add_argument("--format", choices=["csv", "jsonl"], default=None,
+                        help="file format (default: from the file extension)")
+    parser.add_argument("--chunk-size", type=int, default=1000, help="rows per multi-row insert")
+    parser.add_argument("--transaction-size", type=int, default=10000, help="rows per transaction")
+    parser.add_argument("--resume", action="store_true", help="continue after the last committed row")
+    args = parser.parse_args()
+
+    format = args.format or ("jsonl" if args.file.suffix in (".jsonl", ".json") else "csv")
+    logger.info(f"Importing {args.kind} from {args.file}")
+    with Session(engine) as session:
+        result = import_file(session, args.kind, args.file, format, chunk_size=args.chunk_size,
+                             transaction_size=args.transaction_size, resume=args.resume)
+    logger.info(f"Import finished: {result['imported']} {args.kind} imported, {result['rejected']} rows rejected")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,35 +1,131 @@
-""" Main application module """
-import sentry_sdk
+""" Main application module
+
+The application is built by create_app(), on the first access to app.main.app (uvicorn
+and gunicorn app.main:app, the tests) or with uvicorn --factory app.main:create_app.
+Rarely used subsystems (Sentry, email sending and templates) are imported only when
+enabled and used, python -m app.bench.startup measures the import time. The lifespan
+warms up the shared resources before serving requests and disposes them on shutdown.
+"""
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+from typing import Any
+
 from fastapi import FastAPI
 from fastapi.routing import APIRoute
+from sqlalchemy.orm import configure_mappers
+from sqlmodel import Session
 from starlette.middleware.cors import CORSMiddleware
 
 from app.api.main import api_router
+from app.api.responses import default_response_class
+from app.api.routes import metrics
+from app.core.catalog import catalog
+from app.core.compression import CompressionMiddleware
 from app.core.config import settings
+from app.core.db import engine, warm_pool
+from app.core.metrics import MetricsMiddleware
+from app.core.profiling import ProfilingMiddleware
+from app.core.security import get_cipher
+from app.core.slow_queries import slow_queries
+from app.core.timing import ServerTimingMiddleware, instrument_engine, instrument_routes
 
 
 def custom_generate_unique_id(route: APIRoute) -> str:
     return f"{route.tags[0]}-{route.name}"
 
-if settings.SENTRY_DSN:
-    sentry_sdk.init(dsn=str(settings.SENTRY_DSN), enable_tracing=True)
-
-app = FastAPI(
-    title=settings.PROJECT_NAME,
-    openapi_url=f"{settings.API_V1_STR}/openapi.json",
-    generate_unique_id_function=custom_generate_unique_id,
-)
-
-# Set all CORS enabled origins
-if settings.BACKEND_CORS_ORIGINS:
-    app.add_middleware(
-        CORSMiddleware,
-        allow_origins=[
-            str(origin).strip("/") for origin in settings.BACKEND_CORS_ORIGINS
-        ],
-        allow_credentials=True,
-        allow_methods=["*"],
-        allow_headers=["*"],
+
+def warm_up() -> None:
+    """
+    Build the shared resources before the first request (the first requests after a
+    deploy are as fast as the next ones).
+    """
+    warm_pool(engine, settings.DB_POOL_WARMUP)
+    # Relationships of all models (otherwise configured by the first query)
+    configure_mappers()
+    get_cipher()
+    if settings.emails_enabled:
+        from app.utils import load_email_templates
+        load_email_templates()
+    # Catalog cache (teams & competitions)
+    if settings.CATALOG_WARMUP:
+        with Session(engine) as session:
+            catalog.snapshot(session)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI) -> AsyncIterator[None]:
+    warm_up()
+    # Email outbox worker of this process
+    if settings.emails_enabled and settings.EMAIL_OUTBOX_ENABLED:
+        from app.core import outbox
+        outbox.start_worker(engine)
+    try:
+        yield
+    finally:
+        if settings.emails_enabled and settings.EMAIL_OUTBOX_ENABLED:
+            outbox.stop_worker()
+        engine.dispose()
+
+
+def create_app() -> FastAPI:
+    """
+    Build the application with the enabled features.
+    """
+    if settings.SENTRY_DSN:
+        import sentry_sdk
+        sentry_sdk.init(dsn=str(settings.SENTRY_DSN), enable_tracing=True)
+
+    app = FastAPI(
+        title=settings.PROJECT_NAME,
+        openapi_url=f"{settings.API_V1_STR}/openapi.json",
+        generate_unique_id_function=custom_generate_unique_id,
+        default_response_class=default_response_class(),
+        lifespan=lifespan,
     )
 
-app.include_router(api_router, prefix=settings.API_V1_STR)
+    # Set all CORS enabled origins
+    if settings.BACKEND_CORS_ORIGINS:
+        app.add_middleware(
+            CORSMiddleware,
+            allow_origins=[
+                str(origin).strip("/") for origin in settings.BACKEND_CORS_ORIGINS
+            ],
+            allow_credentials=True,
+            allow_methods=["*"],
+            allow_headers=["*"],
+        )
+
+    # Compress responses (gzip, brotli if installed)
+    if settings.COMPRESSION_ENABLED:
+        app.add_middleware(CompressionMiddleware, minimum_size=settings.COMPRESSION_MINIMUM_SIZE)
+
+    app.include_router(api_router, prefix=settings.API_V1_STR)
+
+    # Prometheus metrics (requests by route, orders, logins, database pool)
+    if settings.METRICS_ENABLED:
+        app.add_middleware(MetricsMiddleware)
+        app.include_router(metrics.router, tags=["metrics"])
+
+    # Server-Timing header (time of auth, SQL, encryption and serialization)
+    if settings.server_timing:
+        instrument_engine(engine)
+        instrument_routes(app)
+        app.add_middleware(ServerTimingMiddleware)
+
+    # Slow query log
+    if settings.SLOW_QUERY_ENABLED:
+        slow_queries.listen(engine)
+
+    # On-demand profiling (superusers with the X-Profile header, sample rate)
+    if settings.PROFILING_ENABLED:
+        app.add_middleware(ProfilingMiddleware)
+
+    return app
+
+
+def __getattr__(name: str) -> Any:
+    # app is built on first access, not when the module is imported
+    if name == "app":
+        app = globals()["app"] = create_app()
+        return app
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -6,3 +6,8 @@ from .team import *
 from .competition import *
 from .match import *
 from .order import *
+from .catalog import *
+from .bulk import *
+from .profile import *
+from .waiting_room import *
+from .email import *
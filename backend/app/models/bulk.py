@@ -0,0 +1,14 @@
+""" Bulk operation models """
+from .base import SQLModel
+
+# Error for an item of a bulk request (index in the request list)
+class BulkItemError(SQLModel):
+    index: int
+    status_code: int
+    detail: str
+
+# Bulk request result, identifiers of the items created (in request order) and errors of the rest
+class BulkMessage(SQLModel):
+    message: str
+    ids: list[int]
+    errors: list[BulkItemError]
@@ -0,0 +1,8 @@
+""" Catalog models """
+from sqlmodel import Field
+from .base import SQLModel
+
+# Global catalog version (single row), bumped whenever teams or competitions change
+class CatalogVersion(SQLModel, table=True):
+    id: int = Field(default=1, primary_key=True)
+    version: int = 0
@@ -29,7 +29,8 @@ class Competition(CompetitionBase, table=True):
     matches: list["Match"] = Relationship(back_populates="competition")
 
 # Match properties to return (avoid cyclic dependency)
-class CompetitionMatch(CompetitionBase):
+class CompetitionMatch(SQLModel):
+    id: int
     date: str
     price: float
     number_of_seats: int
@@ -43,6 +44,12 @@ class CompetitionOut(CompetitionBase):
     teams: list[TeamOut]
     matches: list[CompetitionMatch]
 
+# Competition detail, teams and matches only when included (matches_next is the cursor for the following matches page)
+class CompetitionDetail(CompetitionBase):
+    teams: list[TeamOut] | None = None
+    matches: list[CompetitionMatch] | None = None
+    matches_next: int | None = None
+
 # Identifier returned when competition created
 class CompetitionCreateOut(CompetitionOut):
     id: int
@@ -55,6 +62,10 @@ class CompetitionCreateAPI(CompetitionBase):
 class CompetitionCreateDB(CompetitionBase):
     teams: list[Team] = []
 
+# Properties to receive in DB on bulk creation (team identifiers)
+class CompetitionCreateIds(CompetitionBase):
+    team_ids: list[int] = []
+
 # Competition message
 class CompetitionMessage(SQLModel):
     message: str
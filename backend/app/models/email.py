@@ -0,0 +1,20 @@
+""" Email outbox model """
+from sqlmodel import Field
+
+from .base import SQLModel
+
+# Email waiting to be sent by the outbox worker (pending, sent or failed). Rows are claimed
+# by a worker until locked_until, retried at next_attempt_at
+class EmailOutbox(SQLModel, table=True):
+    id: int | None = Field(default=None, primary_key=True)
+    email_to: str
+    subject: str
+    html_content: str
+    status: str = Field(default="pending", index=True)
+    attempts: int = 0
+    next_attempt_at: float = Field(index=True)
+    locked_until: float | None = None
+    claimed_by: str | None = None
+    created_at: float
+    sent_at: float | None = None
+    last_error: str | None = None
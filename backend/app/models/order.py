@@ -7,6 +7,7 @@ from base64 import b64encode, b64decode
 from .base import SQLModel
 from .match import Match
 from app.core.security import encrypt, decrypt
+from app.core.timing import segment
 from typing import List
 
 
@@ -16,13 +17,15 @@ class EncryptedFloat(TypeDecorator):
 
     # float => base64 encoded string (encrypted)
     def process_bind_param(self, value, dialect):
-        encrypted_value = encrypt(str(value).encode())
-        return b64encode(encrypted_value).decode()
+        with segment("crypto"):
+            encrypted_value = encrypt(str(value).encode())
+            return b64encode(encrypted_value).decode()
 
     # base64 encoded string => float (decrypted)
     def process_result_value(self, value, dialect):
-        decrypted_value = decrypt(b64decode(value.encode()))
-        return float(decrypted_value.decode())
+        with segment("crypto"):
+            decrypted_value = decrypt(b64decode(value.encode()))
+            return float(decrypted_value.decode())
 
 
 """ User accounts model class """
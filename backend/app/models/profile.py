@@ -0,0 +1,26 @@
+""" Profiling models (request profiles, slow queries) """
+from .base import SQLModel
+
+# Saved request profile (speedscope file, named after the method, path and route of the request)
+class ProfileOut(SQLModel):
+    id: str
+    created: float
+    size: int
+
+class ProfilesOut(SQLModel):
+    data: list[ProfileOut]
+    count: int
+
+# Statement of the slow query log: normalised SQL, parameter types, seconds, route and crud function
+class SlowQueryOut(SQLModel):
+    sql: str
+    parameters: str
+    duration: float
+    route: str | None
+    crud: str | None
+    time: float
+    plan: list[str] | None
+
+class SlowQueriesOut(SQLModel):
+    data: list[SlowQueryOut]
+    count: int
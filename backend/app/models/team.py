@@ -23,10 +23,18 @@ class Team(TeamBase, table=True):
 class TeamOut(TeamBase):
     pass
 
-# Teams list
+# Team columns that can be requested (sparse fieldsets), all are optional
+class TeamFields(SQLModel):
+    id: int | None = None
+    name: str | None = None
+    country: str | None = None
+    description: str | None = None
+
+# Teams list (count of teams matching filters, next is the cursor for the following page)
 class TeamsList(SQLModel):
     count: int
-    data: list[Team]
+    data: list[TeamFields]
+    next: int | None = None
 
 # Team message, team code also required
 class TeamMessage(SQLModel):
@@ -37,4 +45,8 @@ class TeamMessage(SQLModel):
 class TeamUpdate(TeamBase):
     name: str | None = None
     country: str | None = None
-    description: str | None = None
\ No newline at end of file
+    description: str | None = None
+
+# Properties to receive via API on bulk creation (id is optional)
+class TeamCreateBulk(TeamUpdate):
+    id: int | None = None
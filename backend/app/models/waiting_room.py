@@ -0,0 +1,27 @@
+""" Waiting room models """
+from sqlmodel import Field
+
+from .base import SQLModel
+
+# Properties to receive via API on opening (or changing the rate of) a waiting room
+class WaitingRoomOpen(SQLModel):
+    rate: float = Field(gt=0, description="Users admitted per second")
+
+# Waiting room of a match: positions issued and admitted so far
+class WaitingRoomOut(SQLModel):
+    match_id: int
+    rate: float
+    issued: int
+    admitted: int
+
+# Position of a user in the queue of a match, estimated_wait in seconds
+class QueuePosition(SQLModel):
+    match_id: int
+    position: int
+    ahead: int
+    admitted: bool
+    estimated_wait: float
+
+# Queue token (X-Queue-Token header of the orders of the match) and its position
+class QueueToken(QueuePosition):
+    token: str
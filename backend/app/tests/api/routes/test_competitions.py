@@ -1,3 +1,5 @@
+from unittest.mock import patch
+
 from fastapi.testclient import TestClient
 from sqlmodel import Session
 
@@ -44,6 +46,67 @@ def test_get_competition(client: TestClient, db: Session) -> None:
     db.commit()
 
 
+def test_get_competition_detail(client: TestClient, db: Session) -> None:
+    # Create competition with two matches (same teams)
+    m1 = create_random_match(db)
+    m2 = Match(date=random_date(), price=m1.price, number_of_seats=10, total_available_tickets=10,
+               competition_id=m1.competition_id, local_id=m1.visitor_id, visitor_id=m1.local_id)
+    db.add(m2)
+    db.commit()
+    c = db.get(Competition, m1.competition_id)
+    url = f"{settings.API_V1_STR}/competitions/{c.name}"
+
+    # Get competition with teams and matches
+    r = client.get(url)
+    assert r.status_code == 200
+    competition = r.json()
+    assert sorted(t["name"] for t in competition["teams"]) == sorted(t.name for t in c.teams)
+    assert [m["id"] for m in competition["matches"]] == sorted([m1.id, m2.id])
+    assert "matches_next" not in competition
+
+    # Get competition without teams, first page of matches
+    first, second = sorted([m1, m2], key=lambda m: m.id)
+    r = client.get(f"{url}?include=matches&matches_limit=1")
+    assert r.status_code == 200
+    competition = r.json()
+    assert "teams" not in competition
+    assert competition["matches"][0]["id"] == first.id
+    assert competition["matches"][0]["local_id"] == first.local_id
+    assert competition["matches_next"] == first.id
+
+    # Get next page of matches (by id)
+    r = client.get(f"{settings.API_V1_STR}/competitions/?competition_id={c.id}"
+                   f"&include=matches&matches_limit=1&matches_after={first.id}")
+    assert r.status_code == 200
+    assert [m["id"] for m in r.json()["matches"]] == [second.id]
+
+    # Get competition without nested lists
+    r = client.get(f"{url}?include=")
+    assert r.status_code == 200
+    assert r.json() == {"name": c.name, "category": c.category, "sport": c.sport}
+
+    # Invalid include and limit
+    r = client.get(f"{url}?include=orders")
+    assert r.status_code == 400
+    assert r.json() == {"detail": "Invalid competition includes: orders"}
+    r = client.get(f"{url}?matches_limit=0")
+    assert r.status_code == 400
+
+    # Delete data created
+    db.delete(m2)
+    db.commit()
+    delete_match(db, m1)
+
+
+def test_get_competition_detail_deleted(client: TestClient, db: Session) -> None:
+    # Found in the catalog cache, deleted by another worker before the teams are loaded
+    c = create_random_competition(db)
+    with patch("app.api.routes.competitions.get_competition_with_teams", return_value=None):
+        r = client.get(f"{settings.API_V1_STR}/competitions/{c.name}?include=teams")
+    assert r.status_code == 404
+    assert r.json() == {"detail": f"Competition {c.name} not found"}
+
+
 def test_create_competition(client: TestClient, normal_user_token_headers: dict[str, str], 
                             superuser_token_headers: dict[str, str], db: Session) -> None:
     # Try to create competition unauthorized
@@ -82,6 +145,13 @@ def test_create_competition(client: TestClient, normal_user_token_headers: dict[
     assert r.status_code == 401
     assert r.json() == {"detail": f"Team {team_name} not found"}
 
+    # Try to create competition with several unexisting teams (all reported)
+    names = sorted([team_name, random_lower_string()])
+    r = client.post(f"{settings.API_V1_STR}/competitions/", json=dict(data, teams=names),
+                    headers=superuser_token_headers)
+    assert r.status_code == 401
+    assert r.json() == {"detail": f"Teams {names[0]}, {names[1]} not found"}
+
     # Create team (without competitions)
     t = create_random_team(db)
     assert t.competitions == []
@@ -113,6 +183,51 @@ def test_create_competition(client: TestClient, normal_user_token_headers: dict[
     db.commit()
 
 
+def test_create_competitions_bulk(client: TestClient, normal_user_token_headers: dict[str, str],
+                                  superuser_token_headers: dict[str, str], db: Session) -> None:
+    url = f"{settings.API_V1_STR}/competitions/bulk"
+
+    # Try to create competitions without being superuser
+    r = client.post(url, json=[], headers=normal_user_token_headers)
+    assert r.status_code == 400
+
+    # Create competitions, some of them invalid
+    c = create_random_competition(db)
+    t1 = create_random_team(db)
+    t2 = create_random_team(db)
+    name = random_lower_string()
+    missing = random_lower_string()
+    base = {"category": "Senior", "sport": "Football"}
+    data = [
+        dict(base, name=name, teams=[t1.name, t2.name, t1.name]),
+        dict(base, name=c.name),
+        dict(base, name=name),
+        dict(base, name=random_lower_string(), teams=[t1.name, missing]),
+        dict(base, name=random_lower_string()),
+    ]
+    r = client.post(url, json=data, headers=superuser_token_headers)
+    assert r.status_code == 200
+    result = r.json()
+    assert result["message"] == "2 competitions created successfully"
+    assert result["errors"] == [
+        {"index": 1, "status_code": 400, "detail": f"A competition named {c.name} already exists in the system"},
+        {"index": 2, "status_code": 400, "detail": f"A competition named {name} already exists in the system"},
+        {"index": 3, "status_code": 401, "detail": f"Team {missing} not found"},
+    ]
+
+    # Check persistence (with teams)
+    c1 = db.get(Competition, result["ids"][0])
+    c2 = db.get(Competition, result["ids"][1])
+    assert c1.name == name
+    assert sorted(t.id for t in c1.teams) == sorted([t1.id, t2.id])
+    assert c2.teams == []
+
+    # Delete data created
+    for x in (c, c1, c2, t1, t2):
+        db.delete(x)
+    db.commit()
+
+
 def test_delete_competition(client: TestClient, normal_user_token_headers: dict[str, str], 
                             superuser_token_headers: dict[str, str], db: Session) -> None:
     name = random_lower_string()
@@ -1,7 +1,13 @@
+import asyncio
+
+import pytest
 from fastapi.testclient import TestClient
 from sqlmodel import Session
 from app.tests.utils.utils import *
 from app.core.config import settings
+from app.core.broadcast import broadcaster
+from app.api.routes.matches import check_match, tickets_events
+from app.models import MatchCreate
 
 def test_get_matches_list(client: TestClient, db: Session) -> None:
     # Get matches list
@@ -189,6 +195,53 @@ def test_create_match(client: TestClient, normal_user_token_headers: dict[str, s
     db.commit()
 
 
+def test_create_matches_bulk(client: TestClient, normal_user_token_headers: dict[str, str],
+                             superuser_token_headers: dict[str, str], db: Session) -> None:
+    url = f"{settings.API_V1_STR}/matches/bulk"
+
+    # Try to create matches without being superuser
+    r = client.post(url, json=[], headers=normal_user_token_headers)
+    assert r.status_code == 400
+
+    # Create matches (same competition and teams as an existing one), some of them invalid
+    m = create_random_match(db)
+    t = create_random_team(db)
+    base = {"date": random_date(), "price": 10.254, "number_of_seats": 100,
+            "competition_id": m.competition_id, "local_id": m.local_id, "visitor_id": m.visitor_id}
+    data = [
+        base,
+        dict(base, price=-1),
+        dict(base, total_available_tickets=101),
+        dict(base, visitor_id=m.local_id),
+        dict(base, visitor_id=random_id()),
+        dict(base, competition_id=random_id()),
+        dict(base, visitor_id=t.id),
+        dict(base, local_id=m.visitor_id, visitor_id=m.local_id, total_available_tickets=50),
+    ]
+    r = client.post(url, json=data, headers=superuser_token_headers)
+    assert r.status_code == 200
+    result = r.json()
+    assert result["message"] == "2 matches created successfully"
+    assert [(e["index"], e["status_code"]) for e in result["errors"]] == [
+        (1, 402), (2, 405), (3, 406), (4, 408), (5, 409), (6, 411)
+    ]
+
+    # Check persistence
+    m1 = db.get(Match, result["ids"][0])
+    m2 = db.get(Match, result["ids"][1])
+    assert m1.price == 10.25
+    assert m1.total_available_tickets == 100
+    assert m2.local_id == m.visitor_id
+    assert m2.total_available_tickets == 50
+
+    # Delete data created
+    db.delete(m1)
+    db.delete(m2)
+    db.delete(t)
+    db.commit()
+    delete_match(db, m)
+
+
 def test_delete_match(client: TestClient, normal_user_token_headers: dict[str, str],
                       superuser_token_headers: dict[str, str], db: Session) -> None:
     id = random_id()
@@ -298,3 +351,67 @@ def test_update_match(client: TestClient, normal_user_token_headers: dict[str, s
     # Delete data created
     db.refresh(m)
     delete_match(db, m)
+
+
+def test_stream_matches(client: TestClient, superuser_token_headers: dict[str, str],
+                        db: Session, monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(broadcaster, "tick", 0.01)
+    m = create_random_match(db)
+    other = create_random_match(db)
+    email, password = random_email(), random_lower_string()
+    create_account(db, email, password, m.price * 10)
+    r = client.post(f"{settings.API_V1_STR}/login/access-token", data={"username": email, "password": password})
+    headers = {"Authorization": f"Bearer {r.json()['access_token']}"}
+
+    with client.websocket_connect(f"{settings.API_V1_STR}/matches/stream") as websocket:
+        # Current tickets of the subscribed matches
+        websocket.send_json({"subscribe": [m.id]})
+        assert websocket.receive_json() == {"tickets": {str(m.id): m.total_available_tickets}}
+
+        # Orders and updates send the changes of the subscribed matches
+        r = client.post(f"{settings.API_V1_STR}/orders/", headers=headers, json={"match_id": m.id, "num_tickets": 2})
+        assert r.status_code == 200
+        assert websocket.receive_json() == {"tickets": {str(m.id): m.total_available_tickets - 2}}
+
+        r = client.put(f"{settings.API_V1_STR}/matches/{other.id}", headers=superuser_token_headers,
+                       json={"total_available_tickets": 0})
+        assert r.status_code == 200
+        r = client.post(f"{settings.API_V1_STR}/orders/purchase/", headers=headers,
+                        json={"matches": [{"match_id": m.id, "num_tickets": 1}]})
+        assert r.status_code == 200
+        assert websocket.receive_json() == {"tickets": {str(m.id): m.total_available_tickets - 3}}
+
+        websocket.send_json({"subscribe": "x"})
+        assert "error" in websocket.receive_json()
+
+
+def test_stream_matches_events() -> None:
+    async def run() -> list[str]:
+        subscriber = broadcaster.subscribe([1])
+        events = tickets_events(subscriber, {1: 10, 2: 5})
+        try:
+            first = await anext(events)
+            broadcaster.publish(1, 9)
+            broadcaster.flush()
+            return [first, await anext(events)]
+        finally:
+            await events.aclose()
+            broadcaster.unsubscribe(subscriber)
+
+    assert asyncio.run(run()) == [
+        'event: tickets\ndata: {"tickets":{"1":10,"2":5}}\n\n',
+        'event: tickets\ndata: {"tickets":{"1":9}}\n\n',
+    ]
+
+
+def test_stream_matches_invalid_ids(client: TestClient) -> None:
+    r = client.get(f"{settings.API_V1_STR}/matches/stream?ids=1,x")
+    assert r.status_code == 400
+
+
+def test_check_match_copies_request() -> None:
+    match_in = MatchCreate(date="2024-06-01", price=10.556, number_of_seats=100,
+                           competition_id=1, local_id=1, visitor_id=2)
+    checked = check_match(match_in, {1, 2}, {1, 2})
+    assert (checked.price, checked.total_available_tickets) == (10.56, 100)
+    assert (match_in.price, match_in.total_available_tickets) == (10.556, None)
@@ -0,0 +1,66 @@
+import pytest
+from fastapi.testclient import TestClient
+from sqlmodel import Session
+from app.tests.utils.utils import *
+from app.core.config import settings
+
+
+def metric(client: TestClient, sample: str) -> float:
+    for line in client.get("/metrics").text.splitlines():
+        if line.startswith(sample + " "):
+            return float(line.split()[-1])
+    return 0
+
+
+def test_metrics(client: TestClient, db: Session) -> None:
+    # Request counted by route
+    r = client.get(f"{settings.API_V1_STR}/matches/")
+    assert r.status_code == 200
+    r = client.get("/metrics")
+    assert r.status_code == 200
+    assert r.headers["content-type"].startswith("text/plain")
+    assert 'http_requests_total{method="GET",route="matches-read_matches",status="200"}' in r.text
+    assert 'http_request_duration_seconds_count{route="matches-read_matches"}' in r.text
+
+    # Logins
+    failures = metric(client, 'logins_total{result="failure"}')
+    login = {"username": random_email(), "password": random_lower_string()}
+    client.post(f"{settings.API_V1_STR}/login/access-token", data=login)
+    assert metric(client, 'logins_total{result="failure"}') == failures + 1
+
+    # Tickets sold, revenue and rejected orders
+    m = create_random_match(db)
+    m.price = 10
+    m.total_available_tickets = 2
+    db.commit()
+    create_account(db, login["username"], login["password"], 35)
+    r = client.post(f"{settings.API_V1_STR}/login/access-token", data=login)
+    headers = {"Authorization": f"Bearer {r.json()['access_token']}"}
+    tickets, revenue = metric(client, "tickets_sold_total"), metric(client, "revenue_euros_total")
+    sold_out = metric(client, 'orders_rejected_total{reason="sold_out"}')
+    funds = metric(client, 'orders_rejected_total{reason="insufficient_funds"}')
+
+    r = client.post(f"{settings.API_V1_STR}/orders/", json={"match_id": m.id, "num_tickets": 4}, headers=headers)
+    assert r.status_code == 404
+    r = client.post(f"{settings.API_V1_STR}/orders/", json={"match_id": m.id, "num_tickets": 2}, headers=headers)
+    assert r.status_code == 200
+    r = client.post(f"{settings.API_V1_STR}/orders/", json={"match_id": m.id, "num_tickets": 1}, headers=headers)
+    assert r.status_code == 405
+
+    assert metric(client, "tickets_sold_total") == tickets + 2
+    assert metric(client, "revenue_euros_total") == pytest.approx(revenue + 20)
+    assert metric(client, 'orders_rejected_total{reason="sold_out"}') == sold_out + 1
+    assert metric(client, 'orders_rejected_total{reason="insufficient_funds"}') == funds + 1
+    assert 'password_hash_seconds_count{operation="verify"}' in client.get("/metrics").text
+
+
+def test_metrics_token(client: TestClient, monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(settings, "METRICS_TOKEN", "scraper-token")
+    assert client.get("/metrics").status_code == 403
+    assert client.get("/metrics", headers={"Authorization": "Bearer other"}).status_code == 403
+    assert client.get("/metrics", headers={"Authorization": "Bearer scraper-token"}).status_code == 200
+
+    # Without a token, only in local environment
+    monkeypatch.setattr(settings, "METRICS_TOKEN", None)
+    monkeypatch.setattr(settings, "ENVIRONMENT", "production")
+    assert client.get("/metrics").status_code == 403
@@ -26,6 +26,52 @@ def test_get_teams_list(client: TestClient, db: Session) -> None:
     db.commit()
 
 
+def test_get_teams_list_page(client: TestClient, db: Session) -> None:
+    # Create teams (same country and name prefix)
+    country = random_lower_string()
+    prefix = random_lower_string()
+    teams = [create_random_team(db) for _ in range(3)]
+    for t in teams:
+        t.country = country
+        t.name = prefix + t.name
+    db.commit()
+    ids = sorted(t.id for t in teams)
+
+    # Filter by country, only names
+    r = client.get(f"{settings.API_V1_STR}/teams/?country={country}&fields=name")
+    assert r.status_code == 200
+    data = r.json()
+    assert data["count"] == 3
+    assert data["next"] is None
+    assert [t["id"] for t in data["data"]] == ids
+    assert all(set(t) == {"id", "name"} for t in data["data"])
+
+    # Paginate by name prefix
+    r = client.get(f"{settings.API_V1_STR}/teams/?name_prefix={prefix}&limit=2")
+    assert r.status_code == 200
+    data = r.json()
+    assert data["count"] == 3
+    assert [t["id"] for t in data["data"]] == ids[:2]
+    assert set(data["data"][0]) == {"id", "name", "country", "description"}
+    r = client.get(f"{settings.API_V1_STR}/teams/?name_prefix={prefix}&limit=2&after={data['next']}")
+    assert r.status_code == 200
+    data = r.json()
+    assert [t["id"] for t in data["data"]] == ids[2:]
+    assert data["next"] is None
+
+    # Invalid fields and limit
+    r = client.get(f"{settings.API_V1_STR}/teams/?fields=name,hashed_password")
+    assert r.status_code == 400
+    assert r.json() == {"detail": "Invalid team fields: hashed_password"}
+    r = client.get(f"{settings.API_V1_STR}/teams/?limit=0")
+    assert r.status_code == 400
+
+    # Delete data created
+    for t in teams:
+        db.delete(t)
+    db.commit()
+
+
 def test_get_team_by_name(client: TestClient, db: Session) -> None:
     # Try get unexistent team
     name = random_lower_string()
@@ -197,3 +243,42 @@ def test_update_team_id(client: TestClient, normal_user_token_headers: dict[str,
     db.delete(t)
     db.delete(get_team(db, id))
     db.commit()
+
+
+def test_create_teams_bulk(client: TestClient, normal_user_token_headers: dict[str, str],
+                           superuser_token_headers: dict[str, str], db: Session) -> None:
+    url = f"{settings.API_V1_STR}/teams/bulk"
+
+    # Try to create teams without being superuser
+    r = client.post(url, json=[], headers=normal_user_token_headers)
+    assert r.status_code == 400
+
+    # Create teams (one with id), some of them invalid
+    t = create_random_team(db)
+    id = random_id()
+    name = random_lower_string()
+    data = [
+        {"name": name, "country": random_lower_string()},
+        {"name": random_lower_string()},
+        {"name": t.name, "country": random_lower_string()},
+        {"name": name, "country": random_lower_string()},
+        {"id": id, "name": random_lower_string(), "country": random_lower_string()},
+        {"id": t.id, "name": random_lower_string(), "country": random_lower_string()},
+    ]
+    r = client.post(url, json=data, headers=superuser_token_headers)
+    assert r.status_code == 200
+    result = r.json()
+    assert result["message"] == "2 teams created successfully"
+    assert result["ids"][1] == id
+    assert [(e["index"], e["status_code"]) for e in result["errors"]] == [(1, 404), (2, 403), (3, 403), (5, 403)]
+    assert result["errors"][1]["detail"] == f"A team named {t.name} already exists in the system"
+
+    # Check persistence
+    assert get_team(db, result["ids"][0]).name == name
+    assert get_team(db, id).name == data[4]["name"]
+
+    # Delete data created
+    db.delete(t)
+    for id in result["ids"]:
+        db.delete(get_team(db, id))
+    db.commit()
@@ -0,0 +1,32 @@
+from fastapi.testclient import TestClient
+from sqlmodel import Session
+from app.tests.utils.utils import *
+from app.core.config import settings
+
+
+def segments(header: str) -> dict[str, float]:
+    return {name: float(dur.removeprefix("dur=")) for name, dur in (s.split(";") for s in header.split(", "))}
+
+
+def test_server_timing(client: TestClient, db: Session) -> None:
+    assert settings.server_timing
+
+    r = client.get(f"{settings.API_V1_STR}/matches/")
+    assert r.status_code == 200
+    timings = segments(r.headers["Server-Timing"])
+    assert {"db", "serialize", "total"} <= timings.keys()
+    assert timings["total"] >= timings["db"]
+
+    # Authenticated route with encrypted money
+    email, password = random_email(), random_lower_string()
+    create_account(db, email, password, 10)
+    r = client.post(f"{settings.API_V1_STR}/login/access-token", data={"username": email, "password": password})
+    headers = {"Authorization": f"Bearer {r.json()['access_token']}"}
+    r = client.get(f"{settings.API_V1_STR}/account/money", headers=headers)
+    assert r.status_code == 200
+    assert {"auth", "db", "crypto", "serialize", "total"} <= segments(r.headers["Server-Timing"]).keys()
+
+    # Errors too
+    r = client.get(f"{settings.API_V1_STR}/account/money")
+    assert r.status_code == 401
+    assert "total" in segments(r.headers["Server-Timing"])
@@ -0,0 +1,68 @@
+import json
+from pathlib import Path
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.core.config import settings
+from app.core.profiling import profiles
+from app.core.slow_queries import slow_queries
+
+
+@pytest.fixture()
+def profiles_dir(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> Path:
+    monkeypatch.setattr(profiles, "directory", tmp_path)
+    return tmp_path
+
+
+def test_profile_request(
+    client: TestClient, superuser_token_headers: dict[str, str], profiles_dir: Path
+) -> None:
+    r = client.get(f"{settings.API_V1_STR}/users/", headers={**superuser_token_headers, "X-Profile": "1"})
+    assert r.status_code == 200
+    id = r.headers["X-Profile-Id"]
+
+    r = client.get(f"{settings.API_V1_STR}/utils/profiles/", headers=superuser_token_headers)
+    assert r.status_code == 200
+    assert r.json()["data"][0]["id"] == id
+
+    # Fast requests may have no samples
+    r = client.get(f"{settings.API_V1_STR}/utils/profiles/{id}", headers=superuser_token_headers)
+    assert r.status_code == 200
+    assert json.loads(r.content)["name"] == f"GET {settings.API_V1_STR}/users/ (users-read_users)"
+
+    r = client.get(f"{settings.API_V1_STR}/utils/profiles/1-1", headers=superuser_token_headers)
+    assert r.status_code == 404
+
+
+def test_profile_request_normal_user(
+    client: TestClient, normal_user_token_headers: dict[str, str], profiles_dir: Path
+) -> None:
+    r = client.get(f"{settings.API_V1_STR}/users/me", headers={**normal_user_token_headers, "X-Profile": "1"})
+    assert r.status_code == 200
+    assert "X-Profile-Id" not in r.headers
+    assert not list(profiles_dir.iterdir())
+
+    r = client.get(f"{settings.API_V1_STR}/utils/profiles/", headers=normal_user_token_headers)
+    assert r.status_code == 400
+
+
+def test_slow_queries(
+    client: TestClient, superuser_token_headers: dict[str, str], monkeypatch: pytest.MonkeyPatch
+) -> None:
+    slow_queries.clear()
+    monkeypatch.setattr(slow_queries, "threshold", 0)
+    r = client.get(f"{settings.API_V1_STR}/matches/")
+    assert r.status_code == 200
+    monkeypatch.setattr(slow_queries, "threshold", float("inf"))
+
+    r = client.get(f"{settings.API_V1_STR}/utils/slow-queries/", headers=superuser_token_headers)
+    assert r.status_code == 200
+    queries = r.json()["data"]
+    assert queries
+    assert "app.api.routes.matches.read_matches" in {q["route"] for q in queries}
+
+    r = client.delete(f"{settings.API_V1_STR}/utils/slow-queries/", headers=superuser_token_headers)
+    assert r.status_code == 200
+    r = client.get(f"{settings.API_V1_STR}/utils/slow-queries/", headers=superuser_token_headers)
+    assert r.json()["count"] == 0
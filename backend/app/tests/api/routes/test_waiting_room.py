@@ -0,0 +1,75 @@
+from fastapi.testclient import TestClient
+from sqlmodel import Session
+
+from app.core.config import settings
+from app.tests.utils.utils import create_account, create_random_match, random_email, random_lower_string
+
+
+def user_headers(client: TestClient, db: Session, money: float) -> dict[str, str]:
+    email, password = random_email(), random_lower_string()
+    create_account(db, email, password, money)
+    r = client.post(f"{settings.API_V1_STR}/login/access-token", data={"username": email, "password": password})
+    return {"Authorization": f"Bearer {r.json()['access_token']}"}
+
+
+def test_waiting_room(client: TestClient, superuser_token_headers: dict[str, str], db: Session) -> None:
+    m = create_random_match(db)
+    first = user_headers(client, db, m.price * 10)
+    second = user_headers(client, db, m.price * 10)
+    url = f"{settings.API_V1_STR}/waiting-room/{m.id}"
+
+    r = client.post(f"{url}/join", headers=first)
+    assert r.status_code == 404
+    r = client.put(url, headers=first, json={"rate": 0.001})
+    assert r.status_code == 400
+    r = client.put(url, headers=superuser_token_headers, json={"rate": 0})
+    assert r.status_code == 422
+    r = client.put(url, headers=superuser_token_headers, json={"rate": 0.001})
+    assert r.status_code == 200
+    assert r.json() == {"match_id": m.id, "rate": 0.001, "issued": 0, "admitted": 0}
+
+    try:
+        # Orders need a queue token
+        order = {"match_id": m.id, "num_tickets": 1}
+        r = client.post(f"{settings.API_V1_STR}/orders/", headers=first, json=order)
+        assert r.status_code == 403
+
+        r = client.post(f"{url}/join", headers=first)
+        assert r.status_code == 200
+        assert r.json()["position"] == 0
+        first_token = {**first, "X-Queue-Token": r.json()["token"]}
+        r = client.post(f"{url}/join", headers=second)
+        second_token = {**second, "X-Queue-Token": r.json()["token"]}
+
+        # Admitted (first) and waiting (second)
+        r = client.get(f"{url}/position", headers=first_token)
+        assert r.json()["admitted"] is True
+        r = client.get(f"{url}/position", headers=second_token)
+        assert r.status_code == 200
+        assert (r.json()["position"], r.json()["admitted"]) == (1, False)
+        r = client.post(f"{settings.API_V1_STR}/orders/purchase/", headers=second_token,
+                        json={"matches": [order]})
+        assert r.status_code == 429
+        assert int(r.headers["Retry-After"]) > 900
+
+        # Tokens belong to their users
+        r = client.post(f"{settings.API_V1_STR}/orders/", headers={**second, "X-Queue-Token": first_token["X-Queue-Token"]},
+                        json=order)
+        assert r.status_code == 403
+        r = client.post(f"{settings.API_V1_STR}/orders/", headers=first_token, json=order)
+        assert r.status_code == 200
+
+        r = client.get(url)
+        assert (r.json()["issued"], r.json()["admitted"]) == (2, 1)
+    finally:
+        r = client.delete(url, headers=superuser_token_headers)
+    assert r.status_code == 200
+
+    # Closed: orders without tokens
+    r = client.post(f"{settings.API_V1_STR}/orders/", headers=second, json=order)
+    assert r.status_code == 200
+
+
+def test_waiting_room_missing_match(client: TestClient, superuser_token_headers: dict[str, str]) -> None:
+    r = client.put(f"{settings.API_V1_STR}/waiting-room/999999", headers=superuser_token_headers, json={"rate": 1})
+    assert r.status_code == 404
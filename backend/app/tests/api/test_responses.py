@@ -0,0 +1,28 @@
+import pytest
+from fastapi.testclient import TestClient
+from sqlmodel import Session
+
+from app.core.config import settings
+from app.tests.utils.utils import *
+
+
+@pytest.mark.parametrize("path", [
+    "/matches/",
+    "/orders/",
+    "/users/",
+    "/teams/?limit=2&fields=name",
+    "/competitions/EFL championship",
+    "/competitions/?competition_id=1&include=teams",
+])
+def test_fast_responses(
+    client: TestClient, db: Session, superuser_token_headers: dict[str, str],
+    monkeypatch: pytest.MonkeyPatch, path: str
+) -> None:
+    # Same content as the response_model path
+    create_random_order(db)
+    r = client.get(f"{settings.API_V1_STR}{path}", headers=superuser_token_headers)
+    assert r.status_code == 200
+    assert r.headers["content-type"] == "application/json"
+    monkeypatch.setattr(settings, "FAST_JSON_RESPONSES", False)
+    expected = client.get(f"{settings.API_V1_STR}{path}", headers=superuser_token_headers)
+    assert r.json() == expected.json()
@@ -0,0 +1,70 @@
+from pathlib import Path
+
+import pytest
+from sqlmodel import Session, func, select
+
+from app.bench.dataset import DatasetConfig, create_dataset, generate
+from app.models import Account, Competition, CompetitionTeamLink, Match, Order, Team, User
+
+
+def test_create_dataset(tmp_path: Path) -> None:
+    engine = create_dataset(tmp_path / "bench.sqlite", 200)
+    with Session(engine) as session:
+        assert session.exec(select(func.count(Match.id))).one() == 200
+        assert session.exec(select(func.count(Order.id))).one() == 200
+        assert session.exec(select(func.count(Team.id))).one() == 20
+        assert session.exec(select(func.count(Competition.id))).one() == 2
+        assert session.exec(select(func.count(Account.id))).one() == 2
+
+        # Tickets of the matches decreased by their orders
+        sold = {id: n for id, n in session.exec(
+            select(Order.match_id, func.sum(Order.tickets_bought)).group_by(Order.match_id)
+        )}
+        for match in session.exec(select(Match)):
+            assert match.number_of_seats - match.total_available_tickets == sold.get(match.id, 0)
+    engine.dispose()
+
+
+def test_dataset_deterministic(tmp_path: Path) -> None:
+    def rows(seed: int) -> list:
+        engine = create_dataset(tmp_path / f"bench-{seed}.sqlite", 100, seed=seed)
+        with Session(engine) as session:
+            # Password hashes have a random salt, emails the seed
+            result = [[row.model_dump(exclude={"hashed_password"}) for row in session.exec(select(model))]
+                      for model in (User, Team, Competition, CompetitionTeamLink, Match, Order)]
+            result.append([account.available_money for account in session.exec(select(Account))])
+        engine.dispose()
+        return result
+
+    assert rows(1) == rows(1)
+    assert rows(1)[1:] != rows(2)[1:]
+
+
+def test_generate_appends(tmp_path: Path) -> None:
+    engine = create_dataset(tmp_path / "bench.sqlite", 100)
+    written = generate(engine, DatasetConfig(users=3, teams=4, competitions=2, teams_per_competition=2,
+                                             matches=5, orders=6))
+    assert written["team"] == 4
+    with Session(engine) as session:
+        assert session.exec(select(func.count(Team.id))).one() == 14
+        assert session.exec(select(func.count(Team.name.distinct()))).one() == 14
+        assert session.exec(select(func.count(User.id))).one() == 4
+    engine.dispose()
+
+
+def test_generate_emails(tmp_path: Path) -> None:
+    # Same seed twice: the emails follow the existing users
+    engine = create_dataset(tmp_path / "bench.sqlite", 100)
+    generate(engine, DatasetConfig(users=2, matches=0, orders=0))
+    with Session(engine) as session:
+        emails = session.exec(select(User.email)).all()
+    assert len(set(emails)) == len(emails) == 3
+    assert sorted(emails) == [f"dataset-0-{id}@example.com" for id in (1, 2, 3)]
+    engine.dispose()
+
+
+def test_generate_teams_per_competition(tmp_path: Path) -> None:
+    engine = create_dataset(tmp_path / "bench.sqlite", 100)
+    with pytest.raises(ValueError):
+        generate(engine, DatasetConfig(teams_per_competition=1))
+    engine.dispose()
@@ -0,0 +1,35 @@
+import asyncio
+
+from app.bench.load import LoadConfig, LoadStats, run_load
+from app.bench.load.stats import percentile
+
+
+def test_percentile() -> None:
+    values = [i / 100 for i in range(1, 101)]
+    assert percentile(values, 50) == 0.5
+    assert percentile(values, 99) == 0.99
+    assert percentile(values, 100) == 1
+    assert percentile([], 50) == 0
+
+
+def test_stats_summary() -> None:
+    stats = LoadStats()
+    stats.record("GET /matches/", 200, 0.01)
+    stats.record("GET /matches/", 404, 0.03)
+    stats.record("GET /matches/", 0, 0.02)
+    summary = stats.summary(elapsed=3)
+    endpoint = summary["endpoints"]["GET /matches/"]
+    assert summary["requests"] == 3
+    assert endpoint["errors"] == 2
+    assert endpoint["statuses"] == {"0": 1, "200": 1, "404": 1}
+    assert endpoint["rps"] == 1
+    assert endpoint["max_ms"] == 30
+
+
+def test_run_load() -> None:
+    results = asyncio.run(run_load(LoadConfig(users=1, iterations=2, seed=1)))
+    assert results["flows"] == 2
+    endpoints = results["endpoints"]
+    for endpoint in ("POST /login/access-token", "GET /matches/", "POST /orders/purchase/", "GET /account/money"):
+        assert endpoints[endpoint]["requests"] == 2
+        assert endpoints[endpoint]["errors"] == 0
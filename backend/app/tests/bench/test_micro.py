@@ -0,0 +1,36 @@
+import json
+from pathlib import Path
+
+from app.bench.dataset import create_dataset
+from app.bench.micro import BENCHMARKS, RESPONSES, run_benchmarks
+
+
+def test_run_benchmarks() -> None:
+    results = run_benchmarks(100, only="jwt", repeat=1)
+    assert results["size"] == 100
+    assert set(results["benchmarks"]) == {name for name in BENCHMARKS if name.startswith("jwt")}
+    for result in results["benchmarks"].values():
+        assert result["min_s"] > 0
+
+
+def test_response_benchmarks_same_body(tmp_path: Path) -> None:
+    engine = create_dataset(tmp_path / "bench.sqlite", 100)
+    try:
+        for name in RESPONSES:
+            variants = [setup for bench, setup in BENCHMARKS.items() if bench.startswith(f"response.{name}.")]
+            bodies = []
+            for setup in variants:
+                run = setup(engine, 100)
+                bodies.append(json.loads(run()))
+                if hasattr(run, "close"):
+                    run.close()
+            assert len(variants) >= 2
+            assert all(body == bodies[0] for body in bodies)
+    finally:
+        engine.dispose()
+
+
+def test_email_benchmarks_same_html() -> None:
+    html = [BENCHMARKS[name](None, 0)() for name in ("email.render.template", "email.render.environment")]
+    assert "Username: user@example.com" in html[0]
+    assert html[0] == html[1]
@@ -0,0 +1,33 @@
+import pytest
+
+from app.bench.startup import check_budget, parse_importtime, run_startup
+
+IMPORTTIME = """\
+import time: self [us] | cumulative | imported package
+import time:       300 |        300 | _io
+import time:      2000 |       5000 | app
+import time:      1000 |       1000 |       sqlalchemy.util
+import time:      3000 |      40000 |     sqlalchemy
+import time:       500 |      60000 |   sqlmodel
+import time:      1000 |     200000 | app.main
+"""
+
+
+def test_parse_importtime() -> None:
+    packages = parse_importtime(IMPORTTIME)
+    assert packages == {"_io": 0.0003, "sqlalchemy": 0.04, "sqlmodel": 0.06, "import_s": pytest.approx(0.205)}
+
+
+def test_check_budget() -> None:
+    assert check_budget({"import_s": 0.5, "loaded": []}, budget=1) == []
+    errors = check_budget({"import_s": 1.5, "loaded": ["jinja2"]}, budget=1)
+    assert len(errors) == 2
+    assert "jinja2" in errors[1]
+
+
+def test_startup_budget() -> None:
+    # Fails when the import time regresses or a lazy module is imported at startup
+    results = run_startup(runs=3)
+    assert results["create_s"] > 0
+    assert "fastapi" in results["packages"]
+    assert check_budget(results) == []
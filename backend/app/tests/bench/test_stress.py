@@ -0,0 +1,10 @@
+from app.bench.stress import StressConfig, run_stress
+
+
+def test_no_oversell() -> None:
+    # More buyers than tickets (some without enough money)
+    results = run_stress(StressConfig(threads=8, buyers=60, matches=2, tickets=20, seed=1))
+    assert results["errors"] == []
+    assert results["commits"] > 0
+    assert results["failed"] == 0
+    assert results["attempts"] >= 60
@@ -1,27 +1,109 @@
-""" Tests configuration module """
+""" Tests configuration module
+
+Every test runs inside an outer transaction of its own connection, rolled back at
+the end of the test. Commits (from the tests and from the API, through the get_db
+override) only release a SAVEPOINT, so tests see each other's data only within the
+same test and never need to clean up.
+
+With SQLite, every session (or xdist worker, pytest -n auto) uses its own database
+file, a copy of a migrated and seeded template cached in .pytest_cache (in the temp
+directory without the cache plugin, -p no:cacheprovider). Passwords are hashed with
+the minimum bcrypt cost.
+"""
+import os
+import tempfile
 from collections.abc import Generator
+from pathlib import Path
 
 import pytest
 from fastapi.testclient import TestClient
+from sqlalchemy import Connection, event
 from sqlmodel import Session, delete
 
 from app.core.config import settings
-from app.core.db import engine, init_db
-from app.main import app
-from app.models import User, Account
-from app.tests.utils.user import authentication_token_from_email
-from app.tests.utils.utils import get_superuser_token_headers
+
+# Test profile, set before the engine and the password context are created
+settings.BCRYPT_ROUNDS = 4
+# Optional features covered by the tests
+settings.PROFILING_ENABLED = True
+# Waiting rooms of this session only
+settings.WAITING_ROOM_DB = os.path.join(tempfile.mkdtemp(prefix="waiting-room-"), "waiting-room.sqlite")
+if settings.DB_ENGINE == "sqlite":
+    # One database file per session or xdist worker
+    settings.SQLALCHEMY_DATABASE_URI  # sets the default DB_NAME
+    root, ext = os.path.splitext(settings.DB_NAME)
+    settings.DB_NAME = f"{root}-{os.environ.get('PYTEST_XDIST_WORKER', 'tests')}{ext or '.sqlite'}"
+
+from app.api.deps import get_db  # noqa: E402
+from app.core.catalog import catalog  # noqa: E402
+from app.core.db import engine, init_db  # noqa: E402
+from app.main import app  # noqa: E402
+from app.models import User, Account  # noqa: E402
+from app.tests.utils.db import clone_template, get_template  # noqa: E402
+from app.tests.utils.user import authentication_token_from_email  # noqa: E402
+from app.tests.utils.utils import get_superuser_token_headers  # noqa: E402
+
+if engine.dialect.name == "sqlite":
+    # pysqlite handles transactions on its own and breaks SAVEPOINT, let SQLAlchemy emit BEGIN
+    # https://docs.sqlalchemy.org/en/20/dialects/sqlite.html#serializable-isolation-savepoints-transactional-ddl
+    @event.listens_for(engine, "connect")
+    def _sqlite_connect(dbapi_connection, connection_record) -> None:
+        dbapi_connection.isolation_level = None
+
+    @event.listens_for(engine, "begin")
+    def _sqlite_begin(connection: Connection) -> None:
+        connection.exec_driver_sql("BEGIN")
+
+
+# Connection of the running test (None outside tests, e.g. module fixtures)
+test_connection: Connection | None = None
+
+
+def get_test_db() -> Generator[Session, None, None]:
+    # API sessions join the transaction of the running test
+    with Session(bind=test_connection or engine, join_transaction_mode="create_savepoint") as session:
+        yield session
+
+
+def template_directory(config: pytest.Config) -> Path:
+    # config.cache only exists with the cache plugin (disabled by -p no:cacheprovider)
+    cache = getattr(config, "cache", None)
+    if cache is None:
+        return Path(tempfile.gettempdir()) / "db-templates"
+    return cache.mkdir("db-templates")
 
 
 @pytest.fixture(scope="session", autouse=True)
+def setup_db(request: pytest.FixtureRequest) -> Generator[None, None, None]:
+    if engine.dialect.name == "sqlite":
+        clone_template(get_template(template_directory(request.config)), settings.DB_NAME)
+    else:
+        with Session(engine) as session:
+            init_db(session)
+    app.dependency_overrides[get_db] = get_test_db
+    yield
+    app.dependency_overrides.pop(get_db)
+    if engine.dialect.name != "sqlite":
+        with Session(engine) as session:
+            session.execute(delete(Account))
+            session.execute(delete(User))
+            session.commit()
+
+
+@pytest.fixture(autouse=True)
 def db() -> Generator[Session, None, None]:
-    with Session(engine) as session:
-        init_db(session)
-        yield session
-        session.execute(delete(Account))
-        statement = delete(User)
-        session.execute(statement)
-        session.commit()
+    global test_connection
+    with engine.connect() as connection:
+        transaction = connection.begin()
+        test_connection = connection
+        try:
+            with Session(bind=connection, join_transaction_mode="create_savepoint") as session:
+                yield session
+        finally:
+            test_connection = None
+            transaction.rollback()
+            # The cache may hold rows that have just been rolled back
+            catalog.invalidate()
 
 
 @pytest.fixture(scope="module")
@@ -36,7 +118,9 @@ def superuser_token_headers(client: TestClient) -> dict[str, str]:
 
 
 @pytest.fixture(scope="module")
-def normal_user_token_headers(client: TestClient, db: Session) -> dict[str, str]:
-    return authentication_token_from_email(
-        client=client, email=settings.EMAIL_TEST_USER, db=db
-    )
+def normal_user_token_headers(client: TestClient) -> dict[str, str]:
+    # Committed for the whole module (outside the test transactions)
+    with Session(engine) as session:
+        return authentication_token_from_email(
+            client=client, email=settings.EMAIL_TEST_USER, db=session
+        )
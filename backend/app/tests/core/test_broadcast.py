@@ -0,0 +1,65 @@
+import asyncio
+
+from app.core.broadcast import TicketBroadcaster
+
+
+def test_broadcaster() -> None:
+    async def run() -> None:
+        broadcaster = TicketBroadcaster(tick=0.01)
+        one = broadcaster.subscribe([1])
+        everything = broadcaster.subscribe()
+
+        # Nothing published without subscribers of the match (but everything)
+        broadcaster.publish(1, 10)
+        broadcaster.publish(1, 8)
+        broadcaster.publish(1, 9)
+        broadcaster.publish(2, 5)
+        assert await asyncio.wait_for(one.get(), 1) == {1: 8}
+        assert await asyncio.wait_for(everything.get(), 1) == {1: 8, 2: 5}
+
+        # Changes of other matches are not sent
+        broadcaster.add(one, [3])
+        broadcaster.remove(one, [1])
+        broadcaster.publish(1, 7)
+        broadcaster.publish(3, 1)
+        assert await asyncio.wait_for(one.get(), 1) == {3: 1}
+
+        # Unsubscribed: the ticker stops
+        broadcaster.unsubscribe(one)
+        broadcaster.unsubscribe(everything)
+        await asyncio.sleep(0.05)
+        assert broadcaster._task.done()
+        broadcaster.publish(3, 0)
+        assert broadcaster._changes == {}
+
+    asyncio.run(run())
+
+
+def test_broadcaster_coalesces_slow_subscribers() -> None:
+    async def run() -> None:
+        broadcaster = TicketBroadcaster(tick=60)
+        subscriber = broadcaster.subscribe([1, 2])
+        for tickets in (5, 4):
+            broadcaster.publish(1, tickets)
+            broadcaster.flush()
+        broadcaster.publish(2, 3)
+        broadcaster.flush()
+        assert await subscriber.get() == {1: 4, 2: 3}
+        broadcaster.unsubscribe(subscriber)
+
+    asyncio.run(run())
+
+
+def test_broadcaster_restarts_ticker() -> None:
+    async def run() -> None:
+        broadcaster = TicketBroadcaster(tick=0.01)
+        # Without subscriptions yet (e.g. a new WebSocket), the ticker starts with the first one
+        subscriber = broadcaster.subscribe([])
+        assert subscriber.ids == set()
+        await asyncio.sleep(0.05)
+        broadcaster.add(subscriber, [1])
+        broadcaster.publish(1, 5)
+        assert await asyncio.wait_for(subscriber.get(), 1) == {1: 5}
+        broadcaster.unsubscribe(subscriber)
+
+    asyncio.run(run())
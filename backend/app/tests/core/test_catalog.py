@@ -0,0 +1,98 @@
+from sqlmodel import Session
+
+from app.core.catalog import CatalogCache, get_version
+from app.tests.utils.utils import *
+
+def test_catalog_load(db: Session) -> None:
+    # Create team registered in a competition
+    t = create_random_team(db)
+    c = create_random_competition(db)
+    c.teams.append(t)
+    db.commit()
+
+    # Load catalog
+    catalog = CatalogCache()
+    snapshot = catalog.load(db)
+
+    # Check data
+    assert snapshot.version == get_version(db)
+    assert snapshot.team_ids[t.name] == t.id
+    assert snapshot.teams[t.id].name == t.name
+    assert snapshot.competition_ids[c.name] == c.id
+    assert snapshot.competitions[c.id].sport == c.sport
+    assert snapshot.competition_teams[c.id] == {t.id}
+
+    # Delete data created
+    db.delete(c)
+    db.delete(t)
+    db.commit()
+
+
+def test_catalog_version(db: Session) -> None:
+    version = get_version(db)
+
+    # Catalog writes bump the version
+    t = create_random_team(db)
+    assert get_version(db) == version + 1
+
+    # Other writes do not
+    a = create_random_account(db)
+    assert get_version(db) == version + 1
+
+    # Delete data created
+    db.delete(t)
+    db.commit()
+    delete_account(db, a)
+    assert get_version(db) == version + 2
+
+
+def test_catalog_cache(db: Session) -> None:
+    catalog = CatalogCache(check_seconds=3600)
+    catalog.load(db)
+
+    # Team created in another worker (version changes, cache not invalidated): database fallback
+    t = create_random_team(db)
+    catalog._stale = False
+    assert catalog.get_team_by_name(db, t.name).id == t.id
+
+    # The miss marks the cache as outdated, so it is reloaded
+    assert catalog._stale
+    assert t.id in catalog.snapshot(db).teams
+    assert catalog.get_team(db, t.id).name == t.name
+
+    # Cached records are detached copies
+    assert catalog.get_team(db, t.id) is not t
+
+    # Inexistent team and competition
+    assert catalog.get_team_by_name(db, random_lower_string()) is None
+    assert catalog.get_competition(db, random_id()) is None
+    assert catalog.get_competition_team_ids(db, random_id()) is None
+
+    # Delete data created
+    db.delete(t)
+    db.commit()
+
+
+def test_catalog_responses(db: Session) -> None:
+    catalog = CatalogCache(responses_max=1)
+    builds = []
+
+    def build(value):
+        return lambda: builds.append(value) or value
+
+    # Built once per catalog version
+    assert catalog.response(db, "a", build("a1")) == "a1"
+    assert catalog.response(db, "a", build("a2")) == "a1"
+
+    # Bounded: other keys are built every time when full
+    assert catalog.response(db, "b", build("b1")) == "b1"
+    assert catalog.response(db, "b", build("b2")) == "b2"
+
+    # Catalog changes drop the responses
+    create_random_team(db)
+    catalog.invalidate()
+    assert catalog.response(db, "a", build("a3")) == "a3"
+    assert builds == ["a1", "b1", "b2", "a3"]
+
+    # No responses without cache
+    assert CatalogCache(enabled=False).response(db, "a", build("a4")) is None
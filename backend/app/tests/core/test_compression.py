@@ -0,0 +1,86 @@
+import gzip
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlmodel import Session
+
+from app.core import compression
+from app.core.compression import CompressedBody, negotiate
+from app.core.config import settings
+from app.tests.utils.utils import *
+
+
+def test_negotiate(monkeypatch: pytest.MonkeyPatch) -> None:
+    assert negotiate(None) is None
+    assert negotiate("") is None
+    assert negotiate("identity") is None
+    assert negotiate("gzip, deflate") == "gzip"
+    assert negotiate("GZIP;q=0.5") == "gzip"
+    assert negotiate("gzip;q=0") is None
+    assert negotiate("*") == compression.ENCODINGS[0]
+    assert negotiate("*;q=0, identity") is None
+
+    # Brotli preferred on ties, quality first
+    monkeypatch.setattr(compression, "ENCODINGS", ("br", "gzip"))
+    assert negotiate("gzip, deflate, br") == "br"
+    assert negotiate("gzip;q=1.0, br;q=0.8") == "gzip"
+
+
+def test_compressed_body(monkeypatch: pytest.MonkeyPatch) -> None:
+    calls = []
+    compress = compression.compress
+    monkeypatch.setattr(compression, "compress", lambda body, encoding: calls.append(encoding) or compress(body, encoding))
+
+    body = CompressedBody(b'{"a": "' + b"x" * settings.COMPRESSION_MINIMUM_SIZE + b'"}')
+    for _ in range(2):
+        r = body.response("gzip")
+        assert r.headers["content-encoding"] == "gzip"
+        assert r.headers["vary"] == "Accept-Encoding"
+        assert gzip.decompress(r.body) == body.body
+    assert calls == ["gzip"]
+
+    r = body.response("identity")
+    assert "content-encoding" not in r.headers
+    assert r.body == body.body
+
+    small = CompressedBody(b"{}")
+    assert "content-encoding" not in small.response("gzip").headers
+
+
+def test_compression_middleware(client: TestClient, db: Session) -> None:
+    create_random_match(db)
+    r = client.get(f"{settings.API_V1_STR}/matches/", headers={"Accept-Encoding": "gzip"})
+    assert r.status_code == 200
+    assert r.headers["content-encoding"] == "gzip"
+    assert "Accept-Encoding" in r.headers["vary"]
+    assert int(r.headers["content-length"]) < len(r.content)
+    assert r.json()["matches"]
+
+    r = client.get(f"{settings.API_V1_STR}/matches/", headers={"Accept-Encoding": "identity"})
+    assert "content-encoding" not in r.headers
+
+    # Small responses are not compressed
+    r = client.get(f"{settings.API_V1_STR}/matches/0", headers={"Accept-Encoding": "gzip"})
+    assert r.status_code == 404
+    assert "content-encoding" not in r.headers
+
+
+def test_catalog_response_compressed_once(
+    client: TestClient, db: Session, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    monkeypatch.setattr(settings, "COMPRESSION_MINIMUM_SIZE", 10)
+    calls = []
+    compress = compression.compress
+    monkeypatch.setattr(compression, "compress", lambda body, encoding: calls.append(encoding) or compress(body, encoding))
+
+    teams = [client.get(f"{settings.API_V1_STR}/teams/", headers={"Accept-Encoding": "gzip"}) for _ in range(3)]
+    assert all(r.headers["content-encoding"] == "gzip" for r in teams)
+    assert teams[0].json() == teams[2].json()
+    assert calls == ["gzip"]
+
+    # New team: new response
+    team = create_random_team(db)
+    r = client.get(f"{settings.API_V1_STR}/teams/", headers={"Accept-Encoding": "gzip"})
+    assert r.json()["count"] == teams[0].json()["count"] + 1
+    assert team.name in [t["name"] for t in r.json()["data"]]
+    assert calls == ["gzip", "gzip"]
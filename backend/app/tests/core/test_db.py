@@ -0,0 +1,61 @@
+from sqlalchemy.pool import NullPool
+from sqlmodel import Session, create_engine, func, select
+
+from app.core.db import DEMO_TEAMS, init_db, seed_catalog, warm_pool
+from app.crud.competition import get_competition_by_name
+from app.models import CompetitionCreateAPI, Match, Team, TeamCreateBulk
+from app.tests.utils.utils import *
+
+def test_init_db_idempotent(db: Session) -> None:
+    # Data already created at startup: running again does not duplicate it
+    count = lambda model: db.exec(select(func.count()).select_from(model)).one()
+    teams, matches = count(Team), count(Match)
+    init_db(db)
+    assert count(Team) == teams
+    assert count(Match) == matches
+    names = [t.name for t in DEMO_TEAMS]
+    assert len(db.exec(select(Team).where(Team.name.in_(names))).all()) == len(names)
+
+
+def test_seed_catalog(db: Session) -> None:
+    # New teams and competition (with an existing team)
+    t = create_random_team(db)
+    new = TeamCreateBulk(name=random_lower_string(), country=random_lower_string())
+    competition = CompetitionCreateAPI(name=random_lower_string(), category=CategoryEnum.JUNIOR,
+                                       sport=SportEnum.FOOTBALL, teams=[t.name, new.name])
+    matches = [("01/01/2025", 10, 100, t.name, new.name)]
+    seed_catalog(db, [new, TeamCreateBulk(name=t.name, country=t.country)], [(competition, matches)])
+    db.commit()
+
+    # Check data
+    c = get_competition_by_name(db, competition.name)
+    assert sorted(x.name for x in c.teams) == sorted([t.name, new.name])
+    assert [(m.local_id, m.total_available_tickets) for m in c.matches] == [(t.id, 100)]
+
+    # Seeding again skips the existing competition (and its matches)
+    seed_catalog(db, [new], [(competition, matches)])
+    db.commit()
+    db.refresh(c)
+    assert len(c.matches) == 1
+
+    # Delete data created
+    db.delete(c.matches[0])
+    db.delete(c)
+    db.delete(t)
+    db.delete(db.exec(select(Team).where(Team.name == new.name)).one())
+    db.commit()
+
+
+def test_warm_pool(tmp_path) -> None:
+    engine = create_engine(f"sqlite:///{tmp_path / 'pool.sqlite'}", pool_size=3)
+    try:
+        # At most the pool size, kept open in the pool
+        assert warm_pool(engine, 10) == 3
+        assert engine.pool.checkedin() == 3
+        assert warm_pool(engine, 2) == 2
+        assert engine.pool.checkedin() == 3
+    finally:
+        engine.dispose()
+
+    null = create_engine(f"sqlite:///{tmp_path / 'pool.sqlite'}", poolclass=NullPool)
+    assert warm_pool(null, 10) == 0
@@ -0,0 +1,71 @@
+import json
+from pathlib import Path
+
+from app.core.metrics import Counter, Gauge, Histogram, MetricsRegistry
+
+
+def test_render() -> None:
+    registry = MetricsRegistry()
+    requests = Counter("requests_total", "Requests", registry=registry)
+    latency = Histogram("latency_seconds", "Latency", buckets=(0.1, 1), registry=registry)
+    Gauge("connections", "Connections", registry=registry).set(3)
+
+    requests.inc(route="a")
+    requests.inc(2, route="a")
+    requests.inc(route='b"c')
+    latency.observe(0.05)
+    latency.observe(0.5)
+    latency.observe(5)
+
+    lines = registry.render().splitlines()
+    assert "# TYPE requests_total counter" in lines
+    assert 'requests_total{route="a"} 3' in lines
+    assert 'requests_total{route="b\\"c"} 1' in lines
+    assert "connections 3" in lines
+    assert "# TYPE latency_seconds histogram" in lines
+    assert 'latency_seconds_bucket{le="0.1"} 1' in lines
+    assert 'latency_seconds_bucket{le="1"} 2' in lines
+    assert 'latency_seconds_bucket{le="+Inf"} 3' in lines
+    assert "latency_seconds_sum 5.55" in lines
+    assert "latency_seconds_count 3" in lines
+
+
+def test_collector() -> None:
+    registry = MetricsRegistry()
+    gauge = Gauge("value", "Value", registry=registry)
+    values = iter(range(10))
+    registry.collector(lambda: gauge.set(next(values)))
+    assert "value 0" in registry.render().splitlines()
+    assert "value 1" in registry.render().splitlines()
+
+
+def test_workers_aggregation(tmp_path: Path) -> None:
+    registry = MetricsRegistry(directory=str(tmp_path))
+    requests = Counter("requests_total", "Requests", registry=registry)
+    latency = Histogram("latency_seconds", "Latency", buckets=(1,), registry=registry)
+    gauge = Gauge("connections", "Connections", registry=registry)
+    requests.inc(2, route="a")
+    latency.observe(0.5)
+    gauge.set(1)
+
+    # Another worker (its file)
+    other = MetricsRegistry(directory=str(tmp_path))
+    Counter("requests_total", "Requests", registry=other).inc(3, route="a")
+    Histogram("latency_seconds", "Latency", buckets=(1,), registry=other).observe(2)
+    Gauge("connections", "Connections", registry=other).set(4)
+    (tmp_path / "metrics-1.json").write_text(json.dumps(other.snapshot()))
+
+    lines = registry.render().splitlines()
+    assert 'requests_total{route="a"} 5' in lines
+    assert 'latency_seconds_bucket{le="1"} 1' in lines
+    assert 'latency_seconds_bucket{le="+Inf"} 2' in lines
+    assert 'connections{pid="1"} 4' in lines
+    assert len([line for line in lines if line.startswith("connections{")]) == 2
+
+
+def test_disabled() -> None:
+    registry = MetricsRegistry(enabled=False)
+    Counter("requests_total", "Requests", registry=registry).inc()
+    Gauge("connections", "Connections", registry=registry).set(3)
+    Histogram("latency_seconds", "Latency", registry=registry).observe(1)
+    assert all(not metric["samples"] for metric in registry.snapshot().values())
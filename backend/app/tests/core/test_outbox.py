@@ -0,0 +1,135 @@
+import smtplib
+import socket
+from collections.abc import Generator
+from unittest.mock import patch
+
+import pytest
+from sqlmodel import Session
+
+from app.bench.smtp_sink import SMTPSink
+from app.core import outbox
+from app.core.outbox import OutboxWorker, SMTPSender, permanent
+from app.crud.email import count_emails, enqueue_email
+from app.models import EmailOutbox
+from app.tests.utils.utils import random_email
+from app.utils import send_email
+
+
+@pytest.fixture
+def sink() -> Generator[SMTPSink, None, None]:
+    with SMTPSink() as sink:
+        yield sink
+
+
+def worker(db: Session, sender: SMTPSender, **kwargs) -> OutboxWorker:
+    return OutboxWorker(db.get_bind(), sender, **kwargs)
+
+
+def test_worker_sends_emails(db: Session, sink: SMTPSink) -> None:
+    sender = SMTPSender(sink.host, sink.port)
+    emails = [enqueue_email(db, random_email(), f"Subject {i}", f"<p>{i}</p>", commit=True) for i in range(5)]
+    outbox_worker = worker(db, sender, batch_size=3)
+
+    # Batches of 3 through the same connection
+    assert outbox_worker.run_once() == 3
+    assert outbox_worker.run_once() == 2
+    assert outbox_worker.run_once() == 0
+    sender.close()
+
+    assert [message["To"] for message in sink.messages] == [email.email_to for email in emails]
+    assert sink.messages[0]["Subject"] == "Subject 0"
+    assert sink.messages[0].get_content_type() == "text/html"
+    assert sink.connections == sender.connections == 1
+    for email in emails:
+        db.refresh(email)
+        assert (email.status, email.attempts) == ("sent", 1)
+
+
+def test_worker_reconnects(db: Session, sink: SMTPSink) -> None:
+    sender = SMTPSender(sink.host, sink.port)
+    enqueue_email(db, random_email(), "Subject", "<p>Hello</p>", commit=True)
+    worker(db, sender).run_once()
+
+    # Closed by the server between batches
+    sender.connection.sock.shutdown(socket.SHUT_RDWR)
+    enqueue_email(db, random_email(), "Subject", "<p>Hello</p>", commit=True)
+    worker(db, sender).run_once()
+    sender.close()
+
+    assert len(sink.messages) == 2
+    assert sender.connections == 2
+
+
+def test_worker_retries(db: Session) -> None:
+    # Nothing listens on the port of a stopped sink
+    with SMTPSink() as sink:
+        sender = SMTPSender(sink.host, sink.port, timeout=1)
+    email = enqueue_email(db, random_email(), "Subject", "<p>Hello</p>", commit=True)
+    outbox_worker = worker(db, sender, max_attempts=2, retry_seconds=10)
+
+    assert outbox_worker.run_once() == 1
+    db.refresh(email)
+    assert (email.status, email.attempts) == ("pending", 1)
+    assert email.next_attempt_at >= email.created_at + 10
+    assert "ConnectionRefusedError" in email.last_error
+    # Not due until the retry time
+    assert outbox_worker.run_once() == 0
+
+    # The last attempt fails the email
+    with patch("app.core.outbox.time.time", return_value=email.next_attempt_at):
+        assert outbox_worker.run_once() == 1
+    db.refresh(email)
+    assert (email.status, email.attempts) == ("failed", 2)
+
+
+def test_worker_permanent_error(db: Session, sink: SMTPSink) -> None:
+    sender = SMTPSender(sink.host, sink.port)
+    refused = enqueue_email(db, random_email(), "Subject", "<p>Hello</p>", commit=True)
+    sent = enqueue_email(db, random_email(), "Subject", "<p>Hello</p>", commit=True)
+    sink.refuse.add(refused.email_to)
+
+    worker(db, sender).run_once()
+    sender.close()
+
+    db.refresh(refused)
+    db.refresh(sent)
+    assert (refused.status, refused.attempts) == ("failed", 1)
+    assert sent.status == "sent"
+    assert len(sink.messages) == 1
+
+
+def test_permanent() -> None:
+    assert permanent(smtplib.SMTPRecipientsRefused({"a@example.com": (550, b"unavailable")}))
+    assert not permanent(smtplib.SMTPRecipientsRefused({"a@example.com": (450, b"busy")}))
+    assert permanent(smtplib.SMTPDataError(554, b"rejected"))
+    assert not permanent(smtplib.SMTPServerDisconnected())
+    assert not permanent(ConnectionRefusedError())
+
+
+def test_send_email_enqueues(db: Session) -> None:
+    pending = count_emails(db, "pending")
+    email_to = random_email()
+    with patch("app.core.config.settings.SMTP_HOST", "smtp.example.com"), patch(
+        "app.core.config.settings.EMAILS_FROM_EMAIL", "admin@example.com"
+    ), patch.object(outbox, "wake_worker") as wake:
+        send_email(email_to=email_to, subject="Subject", html_content="<p>Hello</p>", session=db)
+        # Saved with the transaction of the session, the worker is woken when it commits
+        wake.assert_not_called()
+        db.commit()
+        wake.assert_called_once()
+
+    assert count_emails(db, "pending") == pending + 1
+    assert db.query(EmailOutbox).filter(EmailOutbox.email_to == email_to).one().subject == "Subject"
+
+
+def test_send_email_rolled_back(db: Session) -> None:
+    pending = count_emails(db, "pending")
+    with patch("app.core.config.settings.SMTP_HOST", "smtp.example.com"), patch(
+        "app.core.config.settings.EMAILS_FROM_EMAIL", "admin@example.com"
+    ), patch.object(outbox, "wake_worker") as wake:
+        send_email(email_to=random_email(), subject="Subject", html_content="<p>Hello</p>", session=db)
+        # The request failed: nothing is sent
+        db.rollback()
+        wake.assert_not_called()
+
+    assert count_emails(db, "pending") == pending
@@ -0,0 +1,65 @@
+import asyncio
+import json
+import time
+from datetime import timedelta
+from pathlib import Path
+
+from app.core.profiling import ProfileStore, Sampler, token_subject
+from app.core.security import create_access_token
+
+
+def busy_function(seconds: float) -> None:
+    end = time.perf_counter() + seconds
+    while time.perf_counter() < end:
+        pass
+
+
+async def busy_coroutine(seconds: float) -> None:
+    busy_function(seconds)
+    await asyncio.sleep(0)
+
+
+def frame_names(profile: dict) -> set[str]:
+    frames = profile["shared"]["frames"]
+    return {frames[i]["name"] for p in profile["profiles"] for stack in p["samples"] for i in stack}
+
+
+def test_sampler() -> None:
+    # Sync code (thread of the test) and async code (event loop)
+    sampler = Sampler(0.001)
+    sampler.start()
+    busy_function(0.05)
+    asyncio.run(busy_coroutine(0.05))
+    sampler.stop()
+
+    profile = sampler.speedscope("test")
+    assert profile["name"] == "test"
+    names = frame_names(profile)
+    assert {"busy_function", "busy_coroutine"} <= names
+    # The sampler does not sample itself
+    assert "profiler" not in {p["name"] for p in profile["profiles"]}
+    for p in profile["profiles"]:
+        assert p["type"] == "sampled"
+        assert len(p["samples"]) == len(p["weights"])
+        assert sum(p["weights"]) <= p["endValue"] + 1e-6
+
+
+def test_profile_store(tmp_path: Path) -> None:
+    store = ProfileStore(str(tmp_path), max_profiles=3)
+    ids = [f"{i}-1" for i in range(1, 6)]
+    for id in ids:
+        store.save(id, {"name": f"profile {id}"})
+
+    saved = store.saved()
+    assert [p["id"] for p in saved] == ids[:-4:-1]
+    assert json.loads(store.path("5-1").read_text())["name"] == "profile 5-1"
+    assert store.path("1-1") is None
+    assert store.path("../5-1") is None
+
+
+def test_token_subject() -> None:
+    token = create_access_token(1, timedelta(minutes=1))
+    assert token_subject(f"Bearer {token}") == 1
+    assert token_subject(f"Basic {token}") is None
+    assert token_subject("Bearer invalid") is None
+    assert token_subject(None) is None
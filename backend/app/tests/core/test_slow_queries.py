@@ -0,0 +1,69 @@
+import pytest
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError
+from sqlmodel import Session
+
+from app import crud
+from app.core.db import engine
+from app.core.slow_queries import SlowQueryLog, normalise, parameter_shape
+from app.tests.utils.utils import create_random_account
+
+
+def test_normalise() -> None:
+    assert normalise("SELECT *\n  FROM match WHERE id IN (?, ?, ?) AND name = 'O''Neil' AND price > 10.5") == \
+        "SELECT * FROM match WHERE id IN (...) AND name = ? AND price > ?"
+    assert normalise("SELECT a FROM t WHERE id IN (%(id_1_1)s, %(id_1_2)s) LIMIT %(param_1)s") == \
+        "SELECT a FROM t WHERE id IN (...) LIMIT %(param_1)s"
+
+
+def test_parameter_shape() -> None:
+    assert parameter_shape((1, "a", None)) == "(int, str, NoneType)"
+    assert parameter_shape({"id_1": 1}) == "{id_1: int}"
+    assert parameter_shape([(1, 2.0), (2, 3.0)], executemany=True) == "2 x (int, float)"
+
+
+def test_slow_query_log(db: Session) -> None:
+    log = SlowQueryLog(threshold=0, explain_threshold=0, size=50)
+    log.listen(engine)
+    try:
+        account = create_random_account(db)
+        crud.match.get_all_matches(session=db)
+        assert crud.account.get_money(session=db, id=account.id) == account.available_money
+    finally:
+        log.remove(engine)
+
+    entries = log.recent()
+    assert entries == sorted(entries, key=lambda e: e["duration"], reverse=True)
+    matches = [e for e in entries if e["crud"] == "app.crud.match.get_all_matches"]
+    assert len(matches) == 1
+    assert matches[0]["sql"].startswith('SELECT "match".')
+    assert matches[0]["parameters"] == "()"
+    assert matches[0]["plan"]
+
+    # Balances (encrypted) are never logged, only their type
+    insert = next(e for e in entries if e["sql"].startswith("INSERT INTO account"))
+    assert insert["parameters"] == "(int, str)"
+    assert str(account.available_money) not in str(entries)
+
+
+def test_slow_query_log_bounded(db: Session) -> None:
+    log = SlowQueryLog(threshold=0, size=2)
+    log.listen(engine)
+    try:
+        for n in range(3):
+            db.exec(text(f"SELECT {n}"))
+    finally:
+        log.remove(engine)
+    assert [entry["sql"] for entry in log.recent()] == ["SELECT ?", "SELECT ?"]
+    assert all(entry["route"] is None and entry["plan"] is None for entry in log.recent())
+
+
+def test_slow_query_log_failed_statement(db: Session) -> None:
+    log = SlowQueryLog(threshold=0)
+    log.listen(engine)
+    try:
+        with pytest.raises(OperationalError):
+            db.exec(text("SELECT * FROM missing_table"))
+        assert not db.connection().info["query_start"]
+    finally:
+        log.remove(engine)
@@ -0,0 +1,34 @@
+import time
+
+from app.core.timing import NO_TIMING, RequestTimings, current_timings, segment
+
+
+def test_segments_are_exclusive() -> None:
+    timings = RequestTimings()
+    with timings.segment("auth"):
+        time.sleep(0.01)
+        with timings.segment("db"):
+            time.sleep(0.02)
+    assert 0.02 <= timings.durations["db"] < 0.03 + 0.01
+    assert 0.01 <= timings.durations["auth"] < 0.02
+
+    timings.begin("serialize")
+    timings.end_all()
+    header = timings.header()
+    assert header.startswith("auth;dur=")
+    assert "db;dur=" in header and "serialize;dur=" in header
+    assert header.split(", ")[-1].startswith("total;dur=")
+
+
+def test_segment_without_request() -> None:
+    assert current_timings.get() is None
+    assert segment("db") is NO_TIMING
+
+    timings = RequestTimings()
+    token = current_timings.set(timings)
+    try:
+        with segment("crypto"):
+            pass
+    finally:
+        current_timings.reset(token)
+    assert "crypto" in timings.durations
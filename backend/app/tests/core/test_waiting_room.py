@@ -0,0 +1,51 @@
+from pathlib import Path
+
+from jose import jwt
+
+from app.core.config import settings
+from app.core.security import ALGORITHM
+from app.core.waiting_room import Room, WaitingRoom
+
+
+def test_room_admission() -> None:
+    room = Room(match_id=1, rate=2, issued=10, base_admitted=4, base_time=100, generation=1)
+    assert room.admitted(100) == 4
+    assert room.admitted(101.6) == 7
+    # Never more than the issued positions
+    assert room.admitted(1000) == 10
+    assert room.wait(4, 100) == 0.5
+    assert room.wait(9, 100) == 3
+    assert room.wait(3, 100) == 0
+
+
+def test_waiting_room(tmp_path: Path) -> None:
+    room = WaitingRoom(str(tmp_path / "room.sqlite"))
+    assert room.join(1, 10) is None
+
+    room.open(1, rate=0.001)
+    # The first user of an idle room is admitted at once, the next ones at the rate
+    token, first = room.join(1, 10)
+    _, second = room.join(1, 11)
+    assert (first.position, first.admitted) == (0, True)
+    assert (second.position, second.ahead, second.admitted) == (1, 0, False)
+    assert second.estimated_wait > 900
+    # Joining again keeps the position
+    assert room.join(1, 11)[1].position == 1
+
+    positions = room.positions(f"invalid,{token}", 10)
+    assert positions == {1: (room.room(1).generation, 0)}
+    assert room.positions(token, 11) == {}
+    # Not an access token
+    assert room.positions(jwt.encode({"sub": "10"}, settings.SECRET_KEY, algorithm=ALGORITHM), 10) == {}
+
+    # Changing the rate keeps the admitted positions and the queue
+    room.open(1, rate=1000)
+    assert room.room(1).issued == 2
+    assert room.room(1).generation == positions[1][0]
+
+    # Shared by the workers (connections) through the file
+    other = WaitingRoom(str(tmp_path / "room.sqlite"))
+    assert other.rooms([1, 2]).keys() == {1}
+    assert other.close(1)
+    assert room.room(1) is None
+    assert not room.close(1)
@@ -38,6 +38,23 @@ def test_get_competition(db: Session) -> None:
     db.delete(t)
     db.commit()
 
+def test_get_competition_matches(db: Session) -> None:
+    # Create match (competition with two teams)
+    m = create_random_match(db)
+    id = m.competition_id
+
+    # Get competition with teams
+    c = get_competition_with_teams(db, id)
+    assert sorted(t.id for t in c.teams) == sorted([m.local_id, m.visitor_id])
+
+    # Get matches of the competition (paginated)
+    assert [x.id for x in get_competition_matches(db, id)] == [m.id]
+    assert [x.id for x in get_competition_matches(db, id, limit=1)] == [m.id]
+    assert get_competition_matches(db, id, after=m.id) == []
+
+    # Delete data created
+    delete_match(db, m)
+
 def test_add_competition(db: Session) -> None:
     # Create competition (no teams)
     name = random_lower_string()
@@ -0,0 +1,71 @@
+from sqlmodel import Session
+
+from app.crud.email import *
+from app.models import EmailOutbox
+from app.tests.utils.utils import random_email
+
+
+def test_enqueue_email(db: Session) -> None:
+    pending = count_emails(db, "pending")
+    email = enqueue_email(db, random_email(), "Subject", "<p>Hello</p>")
+    # Committed with the transaction of the session
+    assert email.id is None
+    db.commit()
+
+    assert email.id is not None
+    assert email.status == "pending"
+    assert email.attempts == 0
+    assert count_emails(db, "pending") == pending + 1
+
+
+def test_claim_emails(db: Session) -> None:
+    emails = [enqueue_email(db, random_email(), "Subject", "<p>Hello</p>", commit=True) for _ in range(3)]
+    now = max(email.next_attempt_at for email in emails)
+
+    # Batches of the first worker, the second one gets the rest
+    first = claim_emails(db, "first", 2, now, 60)
+    second = claim_emails(db, "second", 10, now, 60)
+    assert [email.id for email in first] == [emails[0].id, emails[1].id]
+    assert [email.id for email in second] == [emails[2].id]
+    assert all(email.claimed_by == "first" and email.locked_until == now + 60 for email in first)
+
+    # Claimed emails are skipped until the claim expires
+    assert claim_emails(db, "third", 10, now + 30, 60) == []
+    expired = claim_emails(db, "third", 10, now + 61, 60)
+    assert [email.id for email in expired] == [email.id for email in emails]
+
+
+def test_claim_emails_not_due(db: Session) -> None:
+    email = enqueue_email(db, random_email(), "Subject", "<p>Hello</p>", commit=True)
+    mark_failed(db, email, "SMTPServerDisconnected()", email.next_attempt_at + 30)
+    db.commit()
+
+    assert claim_emails(db, "worker", 10, email.next_attempt_at - 1, 60) == []
+    assert [e.id for e in claim_emails(db, "worker", 10, email.next_attempt_at, 60)] == [email.id]
+
+
+def test_mark_sent(db: Session) -> None:
+    email = enqueue_email(db, random_email(), "Subject", "<p>Hello</p>", commit=True)
+    claim_emails(db, "worker", 10, email.next_attempt_at, 60)
+    mark_sent(db, email, email.next_attempt_at + 1)
+    db.commit()
+
+    db.refresh(email)
+    assert email.status == "sent"
+    assert email.attempts == 1
+    assert email.locked_until is None
+    assert email.sent_at == email.next_attempt_at + 1
+    # Sent emails are never claimed again
+    assert claim_emails(db, "worker", 10, email.next_attempt_at + 1000, 60) == []
+
+
+def test_mark_failed(db: Session) -> None:
+    email = enqueue_email(db, random_email(), "Subject", "<p>Hello</p>", commit=True)
+    mark_failed(db, email, "x" * 2000, None)
+    db.commit()
+
+    db.refresh(email)
+    assert email.status == "failed"
+    assert email.attempts == 1
+    assert len(email.last_error) == 1000
+    assert db.get(EmailOutbox, email.id).status == "failed"
@@ -120,3 +120,23 @@ def test_update_match(db: Session) -> None:
 
     # Delete data created
     delete_match(db, m)
+
+
+def test_reserve_tickets(db: Session) -> None:
+    # Create match
+    m = create_random_match(db)
+    tickets = m.total_available_tickets
+
+    # Reserve some tickets (match reloaded)
+    match = reserve_tickets(db, m.id, 1)
+    assert match is not None
+    assert match.total_available_tickets == tickets - 1
+
+    # More tickets than available: nothing reserved
+    assert reserve_tickets(db, m.id, tickets) is None
+    db.commit()
+    db.refresh(m)
+    assert m.total_available_tickets == tickets - 1
+
+    # Delete data created
+    delete_match(db, m)
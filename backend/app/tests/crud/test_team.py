@@ -27,6 +27,31 @@ def test_get_teams(db: Session) -> None:
     db.commit()
 
 
+def test_get_teams_page(db: Session) -> None:
+    # Create teams in the same country
+    country = random_lower_string()
+    t1 = create_random_team(db)
+    t2 = create_random_team(db)
+    t1.country = country
+    t2.country = country
+    db.commit()
+
+    # Get teams by country (only some columns)
+    rows = get_teams_page(db, columns=["country"], country=country)
+    assert rows == [{"id": t.id, "country": country} for t in sorted([t1, t2], key=lambda t: t.id)]
+    assert count_teams(db, country=country) == 2
+
+    # Get teams by name prefix, after the first one
+    rows = get_teams_page(db, name_prefix=t2.name[:16], after=min(t1.id, t2.id) - 1, limit=1)
+    assert rows == [{"id": t2.id, "name": t2.name, "country": country, "description": None}]
+    assert count_teams(db, name_prefix="%") == 0
+
+    # Delete data created
+    db.delete(t1)
+    db.delete(t2)
+    db.commit()
+
+
 def test_get_team(db: Session) -> None:
     # Get inexistent team (by name and id)
     assert get_team_by_name(db, random_lower_string()) is None
@@ -46,6 +71,25 @@ def test_get_team(db: Session) -> None:
     db.commit()
 
 
+def test_get_teams_by_names(db: Session) -> None:
+    # Create teams
+    t1 = create_random_team(db)
+    t2 = create_random_team(db)
+    missing = random_lower_string()
+
+    # Get teams by names (missing names not in result)
+    teams = get_teams_by_names(db, [t1.name, t2.name, missing, t1.name])
+    assert set(teams) == {t1.name, t2.name}
+    assert teams[t1.name].id == t1.id
+    assert teams[t2.name].id == t2.id
+    assert get_teams_by_names(db, []) == {}
+
+    # Delete data created
+    db.delete(t1)
+    db.delete(t2)
+    db.commit()
+
+
 def test_create_team(db: Session) -> None:
     # Create team with name
     name = random_lower_string()
@@ -0,0 +1,62 @@
+import json
+
+from sqlmodel import Session
+
+from app.crud.competition import get_competition_by_name
+from app.crud.team import get_team_by_name
+from app.importer import import_file, progress_path
+from app.tests.utils.utils import *
+
+def test_import_catalog(db: Session, tmp_path) -> None:
+    names = [random_lower_string() for _ in range(3)]
+    competition = random_lower_string()
+
+    # Teams (CSV): one repeated and one without country
+    teams = tmp_path / "teams.csv"
+    teams.write_text("name,country,description\n" + "".join(f"{n},Spain,\n" for n in names) +
+                     f"{names[0]},Spain,\n{random_lower_string()},,\n")
+    result = import_file(db, "teams", teams, "csv", chunk_size=2, transaction_size=2)
+    assert result == {"rows": 5, "imported": 3, "rejected": 2}
+    assert json.loads(progress_path(teams).read_text()) == {"rows": 5}
+    t = [get_team_by_name(db, n) for n in names]
+    assert all(x is not None and x.country == "Spain" for x in t)
+
+    # Competitions (JSONL): teams by name
+    competitions = tmp_path / "competitions.jsonl"
+    competitions.write_text(
+        json.dumps({"name": competition, "category": "Senior", "sport": "Futsal", "teams": names[:2]}) + "\n" +
+        json.dumps({"name": random_lower_string(), "category": "Senior", "sport": "Futsal", "teams": ["x"]}) + "\n"
+    )
+    assert import_file(db, "competitions", competitions, "jsonl") == {"rows": 2, "imported": 1, "rejected": 1}
+    c = get_competition_by_name(db, competition)
+    assert sorted(x.id for x in c.teams) == sorted(x.id for x in t[:2])
+
+    # Matches (CSV): by names and by ids, team not registered in competition
+    matches = tmp_path / "matches.csv"
+    matches.write_text("date,price,number_of_seats,competition,local,visitor,competition_id,local_id,visitor_id\n"
+                       f"01/01/2025,10.5,100,{competition},{names[0]},{names[1]},,,\n"
+                       f"02/01/2025,10.5,100,,,,{c.id},{t[1].id},{t[0].id}\n"
+                       f"03/01/2025,10.5,100,{competition},{names[0]},{names[2]},,,\n")
+    assert import_file(db, "matches", matches, "csv", transaction_size=1) == {"rows": 3, "imported": 2, "rejected": 1}
+    db.refresh(c)
+    assert sorted(m.date for m in c.matches) == ["01/01/2025", "02/01/2025"]
+
+    # Resume after the last committed row: nothing left
+    assert import_file(db, "matches", matches, "csv", resume=True) == {"rows": 0, "imported": 0, "rejected": 0}
+
+    # Resume from an earlier position (only the last row is read again)
+    progress_path(matches).write_text(json.dumps({"rows": 2}))
+    assert import_file(db, "matches", matches, "csv", resume=True) == {"rows": 1, "imported": 0, "rejected": 1}
+
+
+def test_import_invalid_jsonl(db: Session, tmp_path) -> None:
+    names = [random_lower_string() for _ in range(2)]
+
+    # Broken and non-object lines are rejected, the rest is imported
+    teams = tmp_path / "teams.jsonl"
+    teams.write_text(json.dumps({"name": names[0], "country": "Spain"}) + "\n" +
+                     '{"name": "broken", "country": \n' +
+                     "[1, 2]\n" +
+                     json.dumps({"name": names[1], "country": "Spain"}) + "\n")
+    assert import_file(db, "teams", teams, "jsonl") == {"rows": 4, "imported": 2, "rejected": 2}
+    assert all(get_team_by_name(db, n) is not None for n in names)
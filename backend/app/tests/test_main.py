@@ -0,0 +1,33 @@
+from unittest.mock import patch
+
+from fastapi.testclient import TestClient
+
+from app.core import outbox
+from app.core.catalog import catalog
+from app.core.config import settings
+from app.core.db import engine
+from app.main import create_app
+
+
+def test_lifespan_warm_up() -> None:
+    app = create_app()
+    engine.dispose()
+    with patch.object(catalog, "snapshot", wraps=catalog.snapshot) as snapshot:
+        with TestClient(app) as client:
+            # Pool connections opened before the first request, catalog loaded
+            assert engine.pool.checkedin() == min(settings.DB_POOL_WARMUP, engine.pool.size())
+            snapshot.assert_called_once()
+            assert client.get(f"{settings.API_V1_STR}/teams/").status_code == 200
+    # Pool disposed on shutdown
+    assert engine.pool.checkedin() == 0
+
+
+def test_lifespan_outbox_worker() -> None:
+    app = create_app()
+    with patch("app.core.config.settings.SMTP_HOST", "localhost"), patch(
+        "app.core.config.settings.EMAILS_FROM_EMAIL", "admin@example.com"
+    ), patch("app.core.config.settings.CATALOG_WARMUP", False):
+        with TestClient(app):
+            assert outbox.worker is not None
+            assert outbox.worker._thread.is_alive()
+        assert outbox.worker is None
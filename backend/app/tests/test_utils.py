@@ -0,0 +1,57 @@
+import os
+from pathlib import Path
+from unittest.mock import patch
+
+from app import utils
+from app.utils import email_environment, get_email_templates, load_email_templates, render_email_template
+
+
+def write_templates(directory: Path) -> None:
+    for name in utils.EMAIL_TEMPLATES:
+        (directory / name).write_text(f"<p>{name}: {{{{ project_name }}}} {{{{ email }}}}</p>")
+
+
+def test_render_email_template(tmp_path: Path) -> None:
+    write_templates(tmp_path)
+    with patch.object(utils, "EMAIL_TEMPLATES_DIR", tmp_path):
+        get_email_templates.cache_clear()
+        try:
+            html = render_email_template(template_name="test_email.html",
+                                         context={"project_name": "Tickets", "email": "a@example.com"})
+            assert html == "<p>test_email.html: Tickets a@example.com</p>"
+            # Compiled once
+            templates = get_email_templates()
+            assert templates is get_email_templates()
+            assert templates.get_template("test_email.html") is templates.get_template("test_email.html")
+        finally:
+            get_email_templates.cache_clear()
+
+
+def test_email_environment_auto_reload(tmp_path: Path) -> None:
+    (tmp_path / "email.html").write_text("old {{ email }}")
+    cached = email_environment(tmp_path)
+    reloaded = email_environment(tmp_path, auto_reload=True)
+    assert cached.get_template("email.html").render(email="a") == "old a"
+    assert reloaded.get_template("email.html").render(email="a") == "old a"
+
+    template = tmp_path / "email.html"
+    template.write_text("new {{ email }}")
+    # Newer modification time (file systems with a coarse resolution)
+    os.utime(template, (template.stat().st_atime, template.stat().st_mtime + 10))
+    assert cached.get_template("email.html").render(email="a") == "old a"
+    assert reloaded.get_template("email.html").render(email="a") == "new a"
+
+
+def test_load_email_templates(tmp_path: Path) -> None:
+    write_templates(tmp_path)
+    (tmp_path / "new_account.html").unlink()
+    with patch.object(utils, "EMAIL_TEMPLATES_DIR", tmp_path):
+        get_email_templates.cache_clear()
+        try:
+            # Missing templates are left for the first use
+            load_email_templates()
+            compiled = {name for _, name in get_email_templates().cache.keys()}
+            loaded = [name for name in utils.EMAIL_TEMPLATES if name in compiled]
+            assert loaded == ["test_email.html", "reset_password.html"]
+        finally:
+            get_email_templates.cache_clear()
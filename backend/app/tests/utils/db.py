@@ -0,0 +1,80 @@
+""" Seeded SQLite database template for the tests
+
+Migrating and seeding a database for every test session is slow, so the result is
+saved once as a template file and copied (SQLite backup API) to the database of
+every session or xdist worker. The template name is a hash of everything that
+changes its contents: migrations, seed code (with the crud writers and the models it
+uses) and the settings used by the seed.
+"""
+import hashlib
+import inspect
+import os
+import sqlite3
+from pathlib import Path
+
+from alembic import command
+from alembic.config import Config
+from sqlmodel import Session, create_engine
+
+from app.core import db
+from app.core.config import settings
+
+ALEMBIC_DIR = Path(__file__).resolve().parents[3] / "alembic"
+APP_DIR = Path(__file__).resolve().parents[2]
+# Packages used by the seed (app.core.db)
+SEED_PACKAGES = ("crud", "models")
+
+
+def template_key() -> str:
+    digest = hashlib.sha256()
+    for path in sorted((ALEMBIC_DIR / "versions").glob("*.py")):
+        digest.update(path.read_bytes())
+    digest.update(inspect.getsource(db).encode())
+    for package in SEED_PACKAGES:
+        for path in sorted((APP_DIR / package).rglob("*.py")):
+            digest.update(path.read_bytes())
+    for value in (settings.FIRST_SUPERUSER, settings.FIRST_SUPERUSER_PASSWORD,
+                  settings.FERNET_KEY, settings.BCRYPT_ROUNDS):
+        digest.update(repr(value).encode())
+    return digest.hexdigest()[:16]
+
+
+def build_template(path: Path) -> None:
+    # Built next to the final file and renamed, concurrent builders never see half a template
+    tmp = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    tmp.unlink(missing_ok=True)
+    engine = create_engine(f"sqlite:///{tmp}")
+    try:
+        with engine.begin() as connection:
+            config = Config()
+            config.set_main_option("script_location", str(ALEMBIC_DIR))
+            config.attributes["connection"] = connection
+            command.upgrade(config, "head")
+        with Session(engine) as session:
+            db.init_db(session)
+    finally:
+        engine.dispose()
+    os.replace(tmp, path)
+
+
+def get_template(directory: Path) -> Path:
+    """
+    Path of the template for the current code and settings (built if missing).
+    """
+    directory.mkdir(parents=True, exist_ok=True)
+    path = directory / f"template-{template_key()}.sqlite"
+    if not path.exists():
+        build_template(path)
+        for old in directory.glob("template-*.sqlite"):
+            if old != path:
+                old.unlink(missing_ok=True)
+    return path
+
+
+def clone_template(template: Path, target: str) -> None:
+    src, dst = sqlite3.connect(template), sqlite3.connect(target)
+    try:
+        src.backup(dst)
+    finally:
+        src.close()
+        dst.close()
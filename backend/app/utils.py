@@ -2,14 +2,21 @@
 import logging
 from dataclasses import dataclass
 from datetime import datetime, timedelta
+from functools import cache
 from pathlib import Path
-from typing import Any
+from typing import TYPE_CHECKING, Any
 
-import emails  # type: ignore
-from jinja2 import Template
 from jose import JWTError, jwt
+from sqlalchemy import event
+from sqlmodel import Session
 
+from app import crud
 from app.core.config import settings
+from app.core.db import engine
+
+# jinja2, emails and the email outbox are imported on first use (processes sending emails)
+if TYPE_CHECKING:
+    from jinja2 import Environment
 
 
 @dataclass
@@ -18,12 +25,39 @@ class EmailData:
     subject: str
 
 
+EMAIL_TEMPLATES_DIR = Path(__file__).parent / "email-templates" / "build"
+EMAIL_TEMPLATES = ("test_email.html", "reset_password.html", "new_account.html")
+
+
+def email_environment(directory: Path, auto_reload: bool = False) -> "Environment":
+    # Compiled templates are kept by the environment (checked for changes if auto_reload)
+    from jinja2 import Environment, FileSystemLoader
+
+    return Environment(loader=FileSystemLoader(directory), auto_reload=auto_reload)
+
+
+# Environment built once, templates edited in local environment are reloaded
+@cache
+def get_email_templates() -> "Environment":
+    return email_environment(EMAIL_TEMPLATES_DIR, auto_reload=settings.ENVIRONMENT == "local")
+
+
+def load_email_templates() -> None:
+    """
+    Compile the email templates before the first email (the missing ones are compiled
+    on first use, e.g. before the MJML build).
+    """
+    from jinja2 import TemplateNotFound
+
+    for template_name in EMAIL_TEMPLATES:
+        try:
+            get_email_templates().get_template(template_name)
+        except TemplateNotFound:
+            logging.warning(f"email template {template_name} not found in {EMAIL_TEMPLATES_DIR}")
+
+
 def render_email_template(*, template_name: str, context: dict[str, Any]) -> str:
-    template_str = (
-        Path(__file__).parent / "email-templates" / "build" / template_name
-    ).read_text()
-    html_content = Template(template_str).render(context)
-    return html_content
+    return get_email_templates().get_template(template_name).render(context)
 
 
 def send_email(
@@ -31,8 +65,24 @@ def send_email(
     email_to: str,
     subject: str = "",
     html_content: str = "",
+    session: Session | None = None,
 ) -> None:
     assert settings.emails_enabled, "no provided configuration for email variables"
+    if settings.EMAIL_OUTBOX_ENABLED:
+        from app.core import outbox
+
+        # Saved in the outbox and sent by the worker. With the session of a request the email
+        # is committed (and the worker woken) by the request: nothing is sent if it fails
+        if session is None:
+            with Session(engine) as session:
+                crud.email.enqueue_email(session, email_to, subject, html_content, commit=True)
+            outbox.wake_worker()
+        else:
+            crud.email.enqueue_email(session, email_to, subject, html_content)
+            event.listen(session, "after_commit", lambda session: outbox.wake_worker(), once=True)
+        return
+    import emails  # type: ignore
+
     message = emails.Message(
         subject=subject,
         html=html_content,
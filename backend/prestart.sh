@@ -3,6 +3,11 @@
 # Let the DB start
 python /app/app/backend_pre_start.py
 
+# Metrics saved by the workers of a previous run
+if [ -n "$METRICS_DIR" ]; then
+    rm -f "$METRICS_DIR"/metrics-*.json
+fi
+
 # Run migrations
 alembic upgrade head
 
@@ -24,24 +24,24 @@ curl -X "POST" "${URL}/users/" -H "${H1}" -H "${AUTH}" -H "${H2}/json" -d "{\"pa
 curl -X "POST" "${URL}/account/" -H "${H1}" -H "${H2}/json" -d "{\"available_money\": 1000000, \"password\": \".test_r3ch!\", \"email\": \"test_rich_user@sd.ub.edu\"}"
 curl -X "POST" "${URL}/account/" -H "${H1}" -H "${H2}/json" -d "{\"available_money\": 50, \"password\": \".test_p44r!\", \"email\": \"test_poor_user@sd.ub.edu\"}"
 
-# Team creation
+# Team creation (bulk, one request)
 countries=("Australia" "USA" "France" "Germany" "Japan" "Canada")
 TEAM_ID=10
+TEAMS=""
 for i in "${!countries[@]}"; do
     j=$((i+TEAM_ID))
-    curl -X "PUT" "${URL}/teams/?team_id=${j}" -H "${H1}" -H "${AUTH}" -H "${H2}/json" -d "{\"name\": \"${countries[$i]}\", \"country\": \"${countries[$i]}\"}"
+    TEAMS="${TEAMS}${TEAMS:+, }{\"id\": ${j}, \"name\": \"${countries[$i]}\", \"country\": \"${countries[$i]}\"}"
 done
-
-# Competition creation (without organizer)
-COMP_ID=$(curl -X "POST" "${URL}/competitions/" -H "${H1}" -H "${AUTH}" -H "${H2}/json" -d \
-"{\"name\": \"Paris Olympic Games\", \"category\": \"Senior\", \"sport\": \"Basketball\", \"teams\": [\"Australia\", \"USA\", \"France\", \"Germany\", \"Japan\", \"Canada\"]}" | \
-grep -o '"id":[0-9]*' | sed 's/"id":\([0-9]*\)/\1/')
-curl -X "POST" "${URL}/competitions/" -H "${H1}" -H "${AUTH}" -H "${H2}/json" -d "{\"name\": \"SD Empty Competition\", \"category\": \"Senior\", \"sport\": \"Basketball\"}"
-
-# Match creation, it was not specified match hour should be specified
-curl -X 'POST' "${URL}/matches/" -H "${H1}" -H "${AUTH}" -H "${H2}/json" -d \
-"{\"date\": \"29/07/2024\", \"price\": 325, \"number_of_seats\": 100, \"competition_id\": ${COMP_ID}, \"local_id\": ${TEAM_ID}, \"visitor_id\": $((TEAM_ID+2))}"
-curl -X 'POST' "${URL}/matches/" -H "${H1}" -H "${AUTH}" -H "${H2}/json" -d \
-"{\"date\": \"29/07/2024\", \"price\": 632, \"number_of_seats\": 20, \"competition_id\": ${COMP_ID}, \"local_id\": $((TEAM_ID+1)), \"visitor_id\": $((TEAM_ID+3))}"
-curl -X 'POST' "${URL}/matches/" -H "${H1}" -H "${AUTH}" -H "${H2}/json" -d \
-"{\"date\": \"30/07/2024\", \"price\": 50, \"number_of_seats\": 3, \"competition_id\": ${COMP_ID}, \"local_id\": $((TEAM_ID+4)), \"visitor_id\": $((TEAM_ID+5))}"
+curl -X "POST" "${URL}/teams/bulk" -H "${H1}" -H "${AUTH}" -H "${H2}/json" -d "[${TEAMS}]"
+
+# Competition creation (without organizer, bulk)
+COMP_ID=$(curl -X "POST" "${URL}/competitions/bulk" -H "${H1}" -H "${AUTH}" -H "${H2}/json" -d \
+"[{\"name\": \"Paris Olympic Games\", \"category\": \"Senior\", \"sport\": \"Basketball\", \"teams\": [\"Australia\", \"USA\", \"France\", \"Germany\", \"Japan\", \"Canada\"]}, \
+{\"name\": \"SD Empty Competition\", \"category\": \"Senior\", \"sport\": \"Basketball\"}]" | \
+grep -o '"ids":\[[0-9]*' | sed 's/"ids":\[\([0-9]*\)/\1/')
+
+# Match creation (bulk), it was not specified match hour should be specified
+curl -X 'POST' "${URL}/matches/bulk" -H "${H1}" -H "${AUTH}" -H "${H2}/json" -d \
+"[{\"date\": \"29/07/2024\", \"price\": 325, \"number_of_seats\": 100, \"competition_id\": ${COMP_ID}, \"local_id\": ${TEAM_ID}, \"visitor_id\": $((TEAM_ID+2))}, \
+{\"date\": \"29/07/2024\", \"price\": 632, \"number_of_seats\": 20, \"competition_id\": ${COMP_ID}, \"local_id\": $((TEAM_ID+1)), \"visitor_id\": $((TEAM_ID+3))}, \
+{\"date\": \"30/07/2024\", \"price\": 50, \"number_of_seats\": 3, \"competition_id\": ${COMP_ID}, \"local_id\": $((TEAM_ID+4)), \"visitor_id\": $((TEAM_ID+5))}]"